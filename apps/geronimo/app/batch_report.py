@@ -0,0 +1,84 @@
+"""
+Generate Geronimo reports for a batch of leads exported from the CRM.
+
+The input CSV uses the same columns as `test/test-data-dumy.csv`
+(name, job_title, company_name, country). The whole batch is planned first so that
+company level chains shared by several leads run only once.
+
+Usage:
+    python batch_report.py leads.csv --output reports.json
+"""
+
+import argparse
+import csv
+import json
+import time
+import utils.constants as constants
+from main import LeadInfo
+from utils.report_generator import batch_chain_caller
+
+
+def load_leads(file_path):
+    """Load lead rows from a CSV file."""
+    with open(file_path, mode="r", encoding="utf-8") as csvfile:
+        reader = csv.DictReader(csvfile)
+        return [row for row in reader]
+
+
+def create_lead_info(row):
+    """Create a LeadInfo object from a CSV row."""
+    name_parts = row["name"].split()
+    return LeadInfo(
+        firstName=name_parts[0] if name_parts else "",
+        lastName=" ".join(name_parts[1:]),
+        jobTitle=row.get("job_title", ""),
+        company=row.get("company_name", ""),
+        country=row.get("country", ""),
+        state=row.get("state", ""),
+        areaOfInterest="",
+        contactReason="",
+        industry="",
+        canHelpComment="",
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Generate Geronimo reports for a CSV of leads."
+    )
+    parser.add_argument("input", help="Path to the leads CSV file")
+    parser.add_argument(
+        "--output", "-o", default="reports.json", help="Path of the output JSON file"
+    )
+    args = parser.parse_args()
+
+    rows = load_leads(args.input)
+    lead_infos = [create_lead_info(row) for row in rows]
+
+    start_time = time.time()
+    reports = batch_chain_caller(
+        lead_infos,
+        on_lead_complete=lambda index: constants.LOGGER.info(
+            f"Report ready for {rows[index]['name']} ({rows[index]['company_name']})"
+        ),
+    )
+    response_time = time.time() - start_time
+
+    with open(args.output, mode="w", encoding="utf-8") as jsonfile:
+        json.dump(
+            [
+                {"input": row, "output": report}
+                for row, report in zip(rows, reports)
+            ],
+            jsonfile,
+            indent=4,
+        )
+
+    constants.LOGGER.info(
+        f"Generated {len(reports)} reports in {response_time:.2f}s, saved to {args.output}"
+    )
+
+
+# Entry point
+if __name__ == "__main__":
+    main()
@@ -1,15 +1,45 @@
 import os
+import json
+from contextlib import asynccontextmanager
+import httpx
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, StreamingResponse
 from pydantic import BaseModel, Field
 import utils.report_generator as report_generator
-from services.mail_service import send_mail_caller
+import utils.company_cache as company_cache
+import utils.llm_cache as llm_cache
+import utils.scrape_cache as scrape_cache
+import utils.web_search as web_search
+import utils.http_client as http_client
+import utils.llm_caller as llm_caller
+import utils.parse_pool as parse_pool
+import utils.web_scrape as web_scrape
+from utils.deadline import report_deadline
+from services.mail_service import async_send_mail_caller, send_mail_caller
+from services.job_service import JobQueueFullError, get_job, submit_job
+import utils.config as config
 import utils.constants as constants
 
 
+@asynccontextmanager
+async def lifespan(app):
+    # Shared HTTP client for the async pipeline
+    async with httpx.AsyncClient(
+        limits=httpx.Limits(
+            max_connections=config.ASYNC_SCRAPE_CONCURRENCY
+            + config.ASYNC_SEARCH_CONCURRENCY
+        ),
+        transport=httpx.AsyncHTTPTransport(retries=3),
+    ) as client:
+        app.state.http_client = client
+        yield
+    parse_pool.shutdown()
+
+
 # Create FastAPI instance
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
 
 
 # Define the request body schema
@@ -38,17 +68,103 @@ class LeadRequest(BaseModel):
     lead_info: LeadInfo = Field(..., alias="leadInfo")
 
 
+class BatchLeadRequest(BaseModel):
+    leads: list[LeadRequest]
+
+
+def run_report_pipeline(lead_info, email_info, on_section_complete=None):
+    """
+    Generate the report for a lead within REPORT_DEADLINE and mail it.
+
+    Returns:
+        dict: The generated report and the mail sending status.
+    """
+    response = report_generator.parallel_chain_caller(
+        lead_info, on_section_complete, report_deadline()
+    )
+    print(response)
+    mail_responce = send_mail_caller(response, email_info)
+    print(mail_responce)
+
+    return {"report": response, "mail_status": mail_responce}
+
+
+async def async_run_report_pipeline(lead_info, email_info, client=None):
+    """
+    Generate the report for a lead within REPORT_DEADLINE and mail it on the
+    event loop.
+
+    Returns:
+        dict: The generated report and the mail sending status.
+    """
+    client = client or getattr(app.state, "http_client", None)
+    if client is None:
+        async with httpx.AsyncClient() as client:
+            return await async_run_report_pipeline(lead_info, email_info, client)
+
+    response = await report_generator.async_parallel_chain_caller(
+        lead_info, client, deadline=report_deadline()
+    )
+    print(response)
+    mail_responce = await async_send_mail_caller(response, email_info, client)
+    print(mail_responce)
+
+    return {"report": response, "mail_status": mail_responce}
+
+
+def run_report_job(on_section_complete, lead_info, email_info):
+    """Job entry point for the background report pipeline."""
+    return run_report_pipeline(lead_info, email_info, on_section_complete)
+
+
+def run_batch_report_job(on_lead_complete, lead_requests):
+    """
+    Job entry point for the batch report pipeline.
+
+    Reports are generated for the whole batch first, sharing the chains that are
+    common to several leads, and are then mailed lead by lead.
+    """
+    reports = report_generator.batch_chain_caller(
+        [lead_request.lead_info for lead_request in lead_requests],
+        on_lead_complete=lambda index: on_lead_complete(str(index)),
+    )
+
+    results = []
+    for lead_request, report in zip(lead_requests, reports):
+        mail_responce = send_mail_caller(report, lead_request.email_info)
+        results.append({"report": report, "mail_status": mail_responce})
+
+    return results
+
+
 @app.post("/generate_report")
-async def generate_report(request_data: LeadRequest):
+async def generate_report(request_data: LeadRequest, background: bool = False):
     try:
         print("Request Data - ", request_data)
         lead_info = request_data.lead_info
         email_info = request_data.email_info
 
-        response = report_generator.parallel_chain_caller(lead_info)
-        print(response)
-        mail_responce = send_mail_caller(response, email_info)
-        print(mail_responce)
+        if background:
+            job_id = submit_job(
+                run_report_job,
+                lead_info,
+                email_info,
+                sections=constants.CHAIN_KEYS,
+            )
+            return JSONResponse(
+                content={
+                    "message": "Geronimo report job accepted",
+                    "status": "accepted",
+                    "job_id": job_id,
+                    "status_url": f"/jobs/{job_id}",
+                },
+                status_code=202,
+            )
+
+        if config.ASYNC_PIPELINE:
+            await async_run_report_pipeline(lead_info, email_info)
+        else:
+            await run_in_threadpool(run_report_pipeline, lead_info, email_info)
 
         return JSONResponse(
             content={
@@ -58,6 +174,106 @@ async def generate_report(request_data: LeadRequest):
             status_code=200,
         )
 
+    except JobQueueFullError as e:
+        constants.LOGGER.warning(str(e))
+        raise HTTPException(status_code=503, detail="Job queue is full")
     except Exception as e:
         constants.LOGGER.error(f"Unexpected error: {str(e)}")
         raise HTTPException(status_code=500, detail="Internal server error")
+
+
+def format_sse_event(event, data):
+    """Format a Server-Sent Event with a JSON payload."""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+def stream_report_events(lead_info):
+    """
+    Generate the report of a lead and yield each section as a Server-Sent Event
+    as soon as its chain finishes.
+    """
+    try:
+        for key, section in report_generator.iter_report_sections(
+            lead_info, report_deadline()
+        ):
+            yield format_sse_event("section", {"section": key, "data": section})
+        yield format_sse_event("complete", {"status": "success"})
+    except Exception as e:
+        constants.LOGGER.error(f"Unexpected error while streaming: {str(e)}")
+        yield format_sse_event("error", {"detail": "Internal server error"})
+
+
+@app.post("/generate_report/stream")
+async def generate_report_stream(lead_info: LeadInfo):
+    print("Stream Request Data - ", lead_info)
+    return StreamingResponse(
+        stream_report_events(lead_info),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.post("/generate_reports")
+async def generate_reports(request_data: BatchLeadRequest):
+    lead_requests = request_data.leads
+    if not lead_requests:
+        raise HTTPException(status_code=400, detail="No leads provided")
+    if len(lead_requests) > config.BATCH_MAX_LEADS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Too many leads, the maximum batch size is {config.BATCH_MAX_LEADS}",
+        )
+
+    try:
+        job_id = submit_job(
+            run_batch_report_job,
+            lead_requests,
+            sections=[str(index) for index in range(len(lead_requests))],
+        )
+        return JSONResponse(
+            content={
+                "message": "Geronimo batch report job accepted",
+                "status": "accepted",
+                "job_id": job_id,
+                "status_url": f"/jobs/{job_id}",
+            },
+            status_code=202,
+        )
+
+    except JobQueueFullError as e:
+        constants.LOGGER.warning(str(e))
+        raise HTTPException(status_code=503, detail="Job queue is full")
+    except Exception as e:
+        constants.LOGGER.error(f"Unexpected error: {str(e)}")
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+
+@app.get("/jobs/{job_id}")
+async def get_job_status(job_id: str):
+    job = get_job(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    return JSONResponse(content=job, status_code=200)
+
+
+@app.get("/stats")
+async def get_stats():
+    caches = {}
+    if config.CACHE_ENABLED:
+        caches = {
+            "company": company_cache.get_company_cache().stats(),
+            "search": web_search.get_search_cache().stats(),
+            "llm": llm_cache.get_llm_cache().stats(),
+            "scrape": scrape_cache.get_scrape_cache().stats(),
+        }
+
+    return JSONResponse(
+        content={
+            "caches": caches,
+            "http_pool": http_client.get_pool_stats(),
+            "llm_rate_limiter": llm_caller.RATE_LIMITER.stats(),
+            "scrape_stages": web_scrape.STAGE_TIMER.stats(),
+        },
+        status_code=200,
+    )
@@ -0,0 +1,5 @@
+# jobService/__init__.py
+
+from .job_manager import JobManager, JobQueueFullError, get_job, submit_job
+
+__all__ = ["JobManager", "JobQueueFullError", "get_job", "submit_job"]
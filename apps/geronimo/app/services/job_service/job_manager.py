@@ -0,0 +1,147 @@
+import copy
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+import utils.config as config
+import utils.constants as constants
+
+
+class JobQueueFullError(Exception):
+    """Raised when the job manager cannot accept more pending jobs."""
+
+
+class JobManager:
+    """
+    Run report pipelines on a bounded worker pool and keep track of their state.
+
+    Each job is stored as a dictionary holding its status, per-section progress,
+    result and error so that it can be polled while the pipeline is running.
+    """
+
+    def __init__(self, max_workers, max_pending, result_ttl):
+        self.max_pending = max_pending
+        self.result_ttl = result_ttl
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="geronimo-job"
+        )
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def submit(self, target, *args, sections=()):
+        """
+        Queue a job for execution.
+
+        Args:
+            target (callable): The function to run. It receives a progress callback
+                as its first argument, followed by ``args``.
+            sections (iterable): Section keys reported in the job progress.
+
+        Returns:
+            str: The job ID.
+        """
+        with self._lock:
+            self._purge_expired()
+            active_jobs = sum(
+                1
+                for job in self._jobs.values()
+                if job["status"]
+                in (constants.JOB_STATUS_QUEUED, constants.JOB_STATUS_RUNNING)
+            )
+            if active_jobs >= self.max_pending:
+                raise JobQueueFullError(
+                    f"Job queue is full ({active_jobs} jobs pending)"
+                )
+
+            job_id = uuid.uuid4().hex
+            self._jobs[job_id] = {
+                "job_id": job_id,
+                "status": constants.JOB_STATUS_QUEUED,
+                "created_at": time.time(),
+                "started_at": None,
+                "finished_at": None,
+                "progress": {
+                    section: constants.SECTION_STATUS_PENDING for section in sections
+                },
+                "result": None,
+                "error": None,
+            }
+
+        self._executor.submit(self._run, job_id, target, args)
+        return job_id
+
+    def get(self, job_id):
+        """
+        Get a snapshot of a job.
+
+        Returns:
+            dict: A copy of the job state, or None if the job is unknown or expired.
+        """
+        with self._lock:
+            self._purge_expired()
+            job = self._jobs.get(job_id)
+            return copy.deepcopy(job) if job else None
+
+    def mark_section_done(self, job_id, section):
+        """Record that a section of the job has finished."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job:
+                job["progress"][section] = constants.SECTION_STATUS_DONE
+
+    def _run(self, job_id, target, args):
+        self._update(
+            job_id, status=constants.JOB_STATUS_RUNNING, started_at=time.time()
+        )
+        try:
+            result = target(
+                lambda section: self.mark_section_done(job_id, section), *args
+            )
+            self._update(
+                job_id,
+                status=constants.JOB_STATUS_COMPLETED,
+                result=result,
+                finished_at=time.time(),
+            )
+        except Exception as e:
+            constants.LOGGER.error(f"Job {job_id} failed: {str(e)}", exc_info=True)
+            self._update(
+                job_id,
+                status=constants.JOB_STATUS_FAILED,
+                error=str(e),
+                finished_at=time.time(),
+            )
+
+    def _update(self, job_id, **fields):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job:
+                job.update(fields)
+
+    def _purge_expired(self):
+        # Caller must hold the lock
+        now = time.time()
+        expired = [
+            job_id
+            for job_id, job in self._jobs.items()
+            if job["finished_at"] and now - job["finished_at"] > self.result_ttl
+        ]
+        for job_id in expired:
+            del self._jobs[job_id]
+
+
+job_manager = JobManager(
+    max_workers=config.JOB_MAX_WORKERS,
+    max_pending=config.JOB_MAX_PENDING,
+    result_ttl=config.JOB_RESULT_TTL,
+)
+
+
+def submit_job(target, *args, sections=()):
+    """Queue a job on the shared job manager."""
+    return job_manager.submit(target, *args, sections=sections)
+
+
+def get_job(job_id):
+    """Get a job snapshot from the shared job manager."""
+    return job_manager.get(job_id)
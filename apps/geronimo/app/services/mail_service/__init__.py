@@ -1,5 +1,5 @@
 # mailService/__init__.py
 
-from .mail_sender import send_mail_caller
+from .mail_sender import async_send_mail_caller, send_mail_caller
 
-__all__ = ["send_mail_caller"]
+__all__ = ["async_send_mail_caller", "send_mail_caller"]
@@ -36,6 +36,21 @@ class EmailServiceClient:
         else:
             raise Exception(f"Failed to get access token: {response.text}")
 
+    async def async_get_access_token(self, client):
+        credentials = f"{self.client_id}:{self.client_secret}"
+        basic_auth = base64.b64encode(credentials.encode()).decode()
+        headers = {
+            "Authorization": f"Basic {basic_auth}",
+            "Content-Type": "application/x-www-form-urlencoded",
+        }
+        data = {"grant_type": "client_credentials"}
+        response = await client.post(self.token_endpoint, headers=headers, data=data)
+        if response.status_code == 200:
+            self.access_token = response.json()["access_token"]
+            return self.access_token
+        else:
+            raise Exception(f"Failed to get access token: {response.text}")
+
     @retry(
         stop=stop_after_attempt(3),
         wait=wait_exponential(multiplier=1, min=2, max=10),
@@ -80,6 +95,47 @@ class EmailServiceClient:
         else:
             raise Exception(f"Failed to send email: {response.text}")
 
+    @retry(
+        stop=stop_after_attempt(3),
+        wait=wait_exponential(multiplier=1, min=2, max=10),
+        retry=retry_if_exception_type(Exception),
+    )
+    async def async_send_email(
+        self,
+        client,
+        to_email,
+        template_content,
+        subject,
+        from_email,
+        cc=None,
+        bcc=None,
+        attachments=None,
+    ):
+        if not self.access_token:
+            await self.async_get_access_token(client)
+        encoded_template = base64.b64encode(template_content.encode()).decode()
+        email_data = {
+            "to": [to_email] if isinstance(to_email, str) else to_email,
+            "from": from_email,
+            "subject": subject,
+            "template": encoded_template,
+            "cc": cc if cc else [],
+            "bcc": bcc if bcc else [],
+            "attachments": attachments if attachments else [],
+        }
+        headers = {
+            "Authorization": f"Bearer {self.access_token}",
+            "Content-Type": "application/json",
+        }
+        response = await client.post(
+            f"{self.api_endpoint}/send-email", headers=headers, json=email_data
+        )
+        print("Mail Response : ", response.text)
+        if response.status_code == 200:
+            return "Email sent successfully"
+        else:
+            raise Exception(f"Failed to send email: {response.text}")
+
 
 def load_template(template_path):
     """Loads the email template from file."""
@@ -98,6 +154,23 @@ def format_template(template, response_data):
     return rendered_template
 
 
+def create_email_client():
+    """Create the email service client from the configuration."""
+    return EmailServiceClient(
+        client_id=config.CLIENT_ID,
+        client_secret=config.CLIENT_SECRET,
+        token_endpoint=config.TOKEN_ENDPOINT,
+        api_endpoint=config.API_ENDPOINT,
+    )
+
+
+def render_email_template(response_data):
+    """Load the email template and fill it with the response data."""
+    template_path = os.path.join(os.path.dirname(__file__), "mail_template.html")
+    email_template = load_template(template_path)
+    return format_template(email_template, response_data)
+
+
 def send_mail_caller(response_data, email_info):
     """
     Send an email using the new EmailServiceClient.
@@ -109,21 +182,14 @@ def send_mail_caller(response_data, email_info):
 
     print("Call Mail Sending Function")
 
-    client = EmailServiceClient(
-        client_id=config.CLIENT_ID,
-        client_secret=config.CLIENT_SECRET,
-        token_endpoint=config.TOKEN_ENDPOINT,
-        api_endpoint=config.API_ENDPOINT,
-    )
+    client = create_email_client()
     send_to = email_info.to if email_info.to else [None]
     subject = email_info.subject
     cc = email_info.cc if email_info.cc else []
     bcc = email_info.bcc if hasattr(email_info, "bcc") else []
 
     # Load and format the email template
-    template_path = os.path.join(os.path.dirname(__file__), "mail_template.html")
-    email_template = load_template(template_path)
-    formatted_template = format_template(email_template, response_data)
+    formatted_template = render_email_template(response_data)
     try:
         response = client.send_email(
             to_email=send_to,
@@ -136,3 +202,38 @@ def send_mail_caller(response_data, email_info):
         return response
     except Exception as e:
         return f"Email sending failed: {str(e)}"
+
+
+async def async_send_mail_caller(response_data, email_info, client):
+    """
+    Send an email using the EmailServiceClient without blocking the event loop.
+
+    Args:
+        response_data (dict): The data to be sent in the email.
+        email_info (dict): Email details (to, subject, etc.).
+        client (httpx.AsyncClient): The shared HTTP client.
+    """
+
+    print("Call Async Mail Sending Function")
+
+    email_client = create_email_client()
+    send_to = email_info.to if email_info.to else [None]
+    subject = email_info.subject
+    cc = email_info.cc if email_info.cc else []
+    bcc = email_info.bcc if hasattr(email_info, "bcc") else []
+
+    # Load and format the email template
+    formatted_template = render_email_template(response_data)
+    try:
+        response = await email_client.async_send_email(
+            client,
+            to_email=send_to,
+            template_content=formatted_template,
+            subject=subject,
+            from_email=config.ALERT_FROM,
+            cc=cc,
+            bcc=bcc,
+        )
+        return response
+    except Exception as e:
+        return f"Email sending failed: {str(e)}"
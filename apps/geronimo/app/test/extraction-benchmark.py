@@ -0,0 +1,90 @@
+"""
+Benchmark the lxml text extractor against the previous BeautifulSoup extraction.
+
+Runs both extractors over saved HTML pages (or a synthetic page with nested
+layout divs when none are given) and reports the time per page, the size of the
+extracted text and how many pages go over the 4000 characters summarization
+threshold.
+
+Usage:
+    python test/extraction-benchmark.py [page.html ...] [--repeat 20]
+"""
+
+import argparse
+import os
+import sys
+import time
+from bs4 import BeautifulSoup
+
+# Add the project root
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(project_root)
+
+import utils.constants as constants
+from utils.text_extractor import extract_text
+
+SUMMARIZATION_THRESHOLD = 4000
+
+
+def legacy_extract_text(markup):
+    """The extraction used before the lxml extractor."""
+    soup = BeautifulSoup(markup, "html.parser")
+
+    elements = soup.find_all(constants.TAGS)
+    content = "\n".join(
+        [tag.get_text(strip=True) for tag in elements if tag.get_text(strip=True)]
+    )
+
+    return content if content else "none"
+
+
+def synthetic_page(sections=40):
+    """Build a page with the nested div layout typical of company sites."""
+    body = "".join(
+        f"<div class='section'><div class='row'><div class='col'>"
+        f"<h2>Section {i}</h2><p>Paragraph {i} about the company and its products.</p>"
+        f"<ul><li>Feature {i}.1</li><li>Feature {i}.2</li></ul>"
+        f"</div></div></div>"
+        for i in range(sections)
+    )
+    return f"<html><head><title>Example</title></head><body><div id='app'>{body}</div></body></html>"
+
+
+def benchmark(extractor, pages, repeat):
+    """Run an extractor over the pages and return the mean time per page and outputs."""
+    start_time = time.perf_counter()
+    for _ in range(repeat):
+        outputs = [extractor(page) for page in pages]
+    elapsed = time.perf_counter() - start_time
+    return elapsed / (repeat * len(pages)), outputs
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("pages", nargs="*", help="Saved HTML pages")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    pages = []
+    for path in args.pages:
+        with open(path, mode="rb") as page_file:
+            pages.append(page_file.read())
+    if not pages:
+        pages = [synthetic_page()]
+
+    for label, extractor in (
+        ("beautifulsoup", legacy_extract_text),
+        ("lxml", extract_text),
+    ):
+        per_page, outputs = benchmark(extractor, pages, args.repeat)
+        characters = sum(len(output) for output in outputs)
+        summarized = sum(len(output) > SUMMARIZATION_THRESHOLD for output in outputs)
+        print(
+            f"{label:>14}: {per_page * 1000:8.2f} ms/page, "
+            f"{characters:>9} chars, {summarized}/{len(pages)} pages summarized"
+        )
+
+
+# Entry point
+if __name__ == "__main__":
+    main()
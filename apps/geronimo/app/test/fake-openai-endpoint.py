@@ -0,0 +1,118 @@
+"""
+A local fake Azure OpenAI chat completions endpoint with rate limits, to test the
+LLM rate limiter under load without using the real deployment quota.
+
+It enforces requests and tokens per minute like Azure does, returns the
+x-ratelimit-remaining-* headers with every response and answers with 429 and
+retry-after headers once a limit is hit.
+
+Usage:
+    python test/fake-openai-endpoint.py --rpm 60 --tpm 20000 --port 8100
+
+Then point Geronimo at it and generate reports, for example with batch_report.py:
+    OPENAI_API_BASE=http://localhost:8100 python batch_report.py leads.csv
+"""
+
+import argparse
+import asyncio
+import threading
+import time
+import uuid
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+app = FastAPI()
+limits = {"rpm": 60, "tpm": 20000, "latency": 0.5}
+calls = []
+lock = threading.Lock()
+counters = {"accepted": 0, "rate_limited": 0}
+
+
+def count_tokens(body):
+    """Approximate the prompt tokens of a request, 4 characters per token."""
+    return sum(len(str(message.get("content", ""))) for message in body["messages"]) // 4
+
+
+@app.post("/openai/deployments/{deployment}/chat/completions")
+async def chat_completions(deployment: str, request: Request):
+    body = await request.json()
+    prompt_tokens = count_tokens(body)
+    completion_tokens = 50
+
+    with lock:
+        now = time.monotonic()
+        calls[:] = [call for call in calls if now - call[0] < 60]
+        used_requests = len(calls)
+        used_tokens = sum(call[1] for call in calls)
+
+        if (
+            used_requests + 1 > limits["rpm"]
+            or used_tokens + prompt_tokens > limits["tpm"]
+        ):
+            counters["rate_limited"] += 1
+            retry_after = 60 - (now - calls[0][0]) if calls else 1
+            return JSONResponse(
+                status_code=429,
+                headers={
+                    "retry-after": str(int(retry_after) + 1),
+                    "retry-after-ms": str(int(retry_after * 1000)),
+                },
+                content={
+                    "error": {"code": "429", "message": "Rate limit is exceeded."}
+                },
+            )
+
+        calls.append((now, prompt_tokens + completion_tokens))
+        counters["accepted"] += 1
+        headers = {
+            "x-ratelimit-remaining-requests": str(limits["rpm"] - used_requests - 1),
+            "x-ratelimit-remaining-tokens": str(
+                limits["tpm"] - used_tokens - prompt_tokens - completion_tokens
+            ),
+        }
+
+    await asyncio.sleep(limits["latency"])
+    return JSONResponse(
+        headers=headers,
+        content={
+            "id": f"chatcmpl-{uuid.uuid4().hex}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": deployment,
+            "choices": [
+                {
+                    "index": 0,
+                    "message": {"role": "assistant", "content": "Fake response"},
+                    "finish_reason": "stop",
+                }
+            ],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens,
+            },
+        },
+    )
+
+
+@app.get("/stats")
+async def get_stats():
+    return counters
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rpm", type=int, default=limits["rpm"])
+    parser.add_argument("--tpm", type=int, default=limits["tpm"])
+    parser.add_argument("--latency", type=float, default=limits["latency"])
+    parser.add_argument("--port", type=int, default=8100)
+    args = parser.parse_args()
+
+    limits.update(rpm=args.rpm, tpm=args.tpm, latency=args.latency)
+    uvicorn.run(app, host="127.0.0.1", port=args.port)
+
+
+# Entry point
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""
+Benchmark the prompt tokens of the compact search result serialization against
+the repr of the scraped items previously passed to the chains.
+
+Renders the five chain prompt templates with scraped items loaded from JSON
+files (each a list of items with title, link, snippet and content, for example
+saved from `gather_results`), or with synthetic items when none are given, and
+reports the prompt tokens of both serializations.
+
+Usage:
+    python test/prompt-benchmark.py [scraped.json ...]
+"""
+
+import argparse
+import json
+import os
+import sys
+
+# Add the project root
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(project_root)
+
+from utils import prompt_templates
+from utils.prompt_format import format_results
+from utils.token_budget import count_tokens
+
+TEMPLATES = {
+    "personal_summary": prompt_templates.prompt_template_personal_summary,
+    "social_links": prompt_templates.prompt_template_social_links,
+    "company_summary": prompt_templates.prompt_template_company_summary,
+    "competitors": prompt_templates.prompt_template_competitors,
+    "news": prompt_templates.prompt_template_news,
+}
+
+LEAD_VARIABLES = {
+    "name": "John Doe",
+    "company": "TechCorp",
+    "position": "Software Engineer",
+    "country": "USA",
+    "date": "2025-01-01",
+}
+
+
+def synthetic_items(num_results=10):
+    """Build scraped items with the layout whitespace and failed pages of real scrapes."""
+    items = []
+    for position in range(num_results):
+        if position % 4 == 3:
+            content = " "
+        else:
+            content = "\n\n".join(
+                f"  TechCorp's {position}.{block} update:\t\"cloud\" and 'AI' services.  "
+                for block in range(30)
+            )
+        items.append(
+            {
+                "title": f"TechCorp news {position} | TechNews",
+                "link": f"https://technews.com/techcorp-{position}",
+                "snippet": f"TechCorp announced its {position} update.\n ...",
+                "content": content,
+            }
+        )
+    return items
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("results", nargs="*", help="JSON files of scraped items")
+    args = parser.parse_args()
+
+    result_sets = []
+    for path in args.results:
+        with open(path, mode="r", encoding="utf-8") as results_file:
+            result_sets.append(json.load(results_file))
+    if not result_sets:
+        result_sets = [synthetic_items()]
+
+    total_repr = total_compact = 0
+    for name, template in TEMPLATES.items():
+        repr_tokens = compact_tokens = 0
+        for items in result_sets:
+            variables = {
+                variable: LEAD_VARIABLES[variable]
+                for variable in template.input_variables
+                if variable != "google_results"
+            }
+            repr_tokens += count_tokens(
+                template.format(**variables, google_results=items)
+            )
+            compact_tokens += count_tokens(
+                template.format(**variables, google_results=format_results(items))
+            )
+        total_repr += repr_tokens
+        total_compact += compact_tokens
+        print(
+            f"{name:>16}: {repr_tokens:>8} -> {compact_tokens:>8} tokens "
+            f"({1 - compact_tokens / repr_tokens:6.1%} saved)"
+        )
+
+    print(
+        f"{'total':>16}: {total_repr:>8} -> {total_compact:>8} tokens "
+        f"({1 - total_compact / total_repr:6.1%} saved)"
+    )
+
+
+# Entry point
+if __name__ == "__main__":
+    main()
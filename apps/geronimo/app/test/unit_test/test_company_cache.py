@@ -0,0 +1,147 @@
+import pytest
+from types import SimpleNamespace
+from unittest.mock import patch
+import sys
+import os
+
+# Add the app directory to sys.path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../../")))
+
+import utils.company_cache as company_cache
+import utils.constants as constants
+from utils.sqlite_cache import SQLiteCache
+from utils.task_planner import plan_batch
+
+
+def make_lead(company="TechCorp", country="USA", first_name="John"):
+    return SimpleNamespace(
+        first_name=first_name,
+        last_name="Doe",
+        job_title="Engineer",
+        company=company,
+        country=country,
+    )
+
+
+@pytest.fixture(autouse=True)
+def temp_cache(tmp_path):
+    """Use a fresh company cache for every test."""
+    cache = SQLiteCache(str(tmp_path / "cache.sqlite3"), "company")
+    with patch("utils.config.CACHE_ENABLED", True), patch.object(
+        company_cache, "_cache", cache
+    ):
+        yield cache
+
+
+def test_company_sections_are_cached_by_normalized_company():
+    """Test a company section is shared by leads of the same company and country."""
+    company_cache.store_section(
+        constants.COMPANY_SUMMARY, make_lead(), "TechCorp builds software"
+    )
+
+    assert (
+        company_cache.get_cached_section(
+            constants.COMPANY_SUMMARY, make_lead(company="  techcorp ", first_name="Jane")
+        )
+        == "TechCorp builds software"
+    )
+    assert (
+        company_cache.get_cached_section(
+            constants.COMPANY_SUMMARY, make_lead(country="Canada")
+        )
+        is None
+    )
+
+
+@pytest.mark.parametrize(
+    "section, result",
+    [
+        # Person sections are never cached
+        (constants.PROFESSIONAL_SUMMARY, "John is an engineer"),
+        # Failed chains are never cached
+        (constants.COMPANY_NEWS, constants.CHAIN_FAILED_MESSAGE),
+        (constants.COMPANY_NEWS, ""),
+    ],
+)
+def test_uncacheable_results(section, result):
+    """Test person sections and failed chains are not stored."""
+    company_cache.store_section(section, make_lead(), result)
+    assert company_cache.get_cached_section(section, make_lead()) is None
+
+
+def test_incomplete_chains_are_not_cached():
+    """Test chains that ran without the full results of their searches are not stored."""
+    task = {"section": constants.COMPANY_NEWS, "lead_info": make_lead()}
+    company_cache.store_chain(task, "No news found", complete=False)
+
+    assert company_cache.get_cached_section(constants.COMPANY_NEWS, make_lead()) is None
+
+
+def test_section_ttls(temp_cache):
+    """Test each company section expires after its own TTL."""
+    with patch("utils.sqlite_cache.time.time", return_value=0):
+        company_cache.store_section(constants.COMPANY_NEWS, make_lead(), "News")
+        company_cache.store_section(constants.COMPANY_SUMMARY, make_lead(), "Summary")
+
+    ttls = {constants.COMPANY_NEWS: 100, constants.COMPANY_SUMMARY: 1000}
+    with patch.dict(company_cache.COMPANY_SECTION_TTLS, ttls), patch(
+        "utils.sqlite_cache.time.time", return_value=500
+    ):
+        assert company_cache.get_cached_section(constants.COMPANY_NEWS, make_lead()) is None
+        assert (
+            company_cache.get_cached_section(constants.COMPANY_SUMMARY, make_lead())
+            == "Summary"
+        )
+
+
+def test_pop_cached_chains():
+    """Test cached company chains and their searches are removed from the plan."""
+    for section in (
+        constants.COMPANY_SUMMARY,
+        constants.COMPANY_COMPETITORS,
+        constants.COMPANY_NEWS,
+    ):
+        company_cache.store_section(section, make_lead(), f"Cached {section}")
+
+    plan = plan_batch([make_lead()])
+    cached = company_cache.pop_cached_chains(plan)
+
+    assert sorted(cached.values()) == [
+        "Cached company_competitors",
+        "Cached company_news",
+        "Cached company_summary",
+    ]
+    assert sorted(task["section"] for task in plan["chains"].values()) == [
+        constants.PROFESSIONAL_SUMMARY,
+        constants.SOCIAL_MEDIA_LINKS,
+    ]
+    assert list(plan["searches"]) == ["john doe in techcorp"]
+
+
+def test_pop_cached_chains_resizes_shared_searches():
+    """Test shared searches split their budget across the remaining chains only."""
+    company_cache.store_section(constants.COMPANY_NEWS, make_lead(), "Cached news")
+    plan = plan_batch([make_lead()])
+    # The news chain also takes the top 3 results of the person search
+    news_task = next(
+        task
+        for task in plan["chains"].values()
+        if task["section"] == constants.COMPANY_NEWS
+    )
+    news_task["searches"].append(("john doe in techcorp", 3))
+    plan["searches"]["john doe in techcorp"]["budget_results"] = 3
+
+    company_cache.pop_cached_chains(plan)
+
+    assert plan["searches"]["john doe in techcorp"]["num_results"] == 8
+    assert plan["searches"]["john doe in techcorp"]["budget_results"] == 5
+
+
+def test_cache_disabled():
+    """Test nothing is served from the cache when caching is disabled."""
+    company_cache.store_section(constants.COMPANY_SUMMARY, make_lead(), "Summary")
+    with patch("utils.config.CACHE_ENABLED", False):
+        assert (
+            company_cache.get_cached_section(constants.COMPANY_SUMMARY, make_lead())
+            is None
+        )
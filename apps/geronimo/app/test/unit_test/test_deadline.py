@@ -0,0 +1,71 @@
+import math
+import pytest
+from unittest.mock import patch
+import sys
+import os
+
+# Add the app directory to sys.path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../../")))
+
+from utils.deadline import NO_DEADLINE, Deadline, report_deadline
+
+
+class FakeClock:
+    """A clock that only moves when the test advances it."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.mark.parametrize(
+    "elapsed, stage_timeout, expected_timeout",
+    [
+        # The stage timeout applies while more time is left
+        (0, 10, 10),
+        # The time left bounds the stage timeout
+        (25, 10, 5),
+        # A stage without its own timeout gets the time left
+        (25, None, 5),
+        # Nothing is left once the deadline passed
+        (40, 10, 0),
+    ],
+)
+def test_timeout_is_bounded_by_time_left(elapsed, stage_timeout, expected_timeout):
+    """Test stage timeouts are bounded by the time left."""
+    clock = FakeClock()
+    deadline = Deadline(30, clock=clock)
+    clock.now = elapsed
+
+    assert deadline.timeout(stage_timeout) == expected_timeout
+    assert deadline.expired() is (elapsed >= 30)
+
+
+def test_limit():
+    """Test a step deadline ends at its timeout or the deadline, whichever is first."""
+    clock = FakeClock()
+    deadline = Deadline(30, clock=clock)
+
+    assert deadline.limit(10).remaining() == 10
+    clock.now = 25
+    assert deadline.limit(10).remaining() == 5
+    assert 9 < NO_DEADLINE.limit(10).remaining() <= 10
+
+
+def test_no_deadline():
+    """Test a deadline without a budget never expires or bounds a timeout."""
+    assert NO_DEADLINE.remaining() == math.inf
+    assert not NO_DEADLINE.expired()
+    assert NO_DEADLINE.timeout(10) == 10
+    assert NO_DEADLINE.timeout() is None
+
+
+@pytest.mark.parametrize("report_deadline_seconds, bounded", [(120, True), (0, False)])
+def test_report_deadline(report_deadline_seconds, bounded):
+    """Test REPORT_DEADLINE sets the report deadline and 0 disables it."""
+    with patch("utils.config.REPORT_DEADLINE", report_deadline_seconds):
+        deadline = report_deadline()
+
+    assert (deadline.remaining() <= 120) is bounded
@@ -0,0 +1,201 @@
+import asyncio
+import random
+import time
+import pytest
+from unittest.mock import patch
+import sys
+import os
+
+# Add the app directory to sys.path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../../")))
+
+from utils.dedup import (
+    ContentDeduplicator,
+    canonical_url,
+    dedupe_search_results,
+    hamming_distance,
+    simhash,
+)
+from utils.report_generator import merge_selected_results
+from utils.web_scrape import (
+    async_parallel_scrape_caller,
+    parallel_scrape_caller,
+    web_scraping_handle,
+)
+
+WORDS = [f"word{index}" for index in range(2000)]
+
+
+def random_text(seed, num_words=400):
+    rng = random.Random(seed)
+    return " ".join(rng.choice(WORDS) for _ in range(num_words))
+
+
+PRESS_RELEASE = random_text(1)
+SYNDICATED_COPY = f"Published by NewsWire. {PRESS_RELEASE} Read more news."
+OTHER_ARTICLE = random_text(2)
+
+
+@pytest.mark.parametrize(
+    "first, second, same_page",
+    [
+        # Scheme, www prefix, trailing slash and fragment are ignored
+        ("https://www.example.com/news/", "http://example.com/news#top", True),
+        # Tracking parameters are ignored and the query order does not matter
+        (
+            "https://example.com/news?b=2&a=1&utm_source=mail",
+            "https://example.com/news?a=1&b=2&fbclid=abc",
+            True,
+        ),
+        # Other query parameters select another page
+        ("https://example.com/news?page=1", "https://example.com/news?page=2", False),
+        ("https://example.com/news", "https://example.com/blog", False),
+    ],
+)
+def test_canonical_url(first, second, same_page):
+    """Test URLs of the same page share a canonical URL."""
+    assert (canonical_url(first) == canonical_url(second)) is same_page
+
+
+def test_dedupe_search_results():
+    """Test results under the same canonical URL are scraped once, in search order."""
+    search_results = [
+        {"link": "https://www.example.com/news/"},
+        {"link": "https://example.com/about"},
+        {"link": "https://example.com/news?utm_source=google"},
+    ]
+
+    assert dedupe_search_results(search_results) == search_results[:2]
+
+
+def test_simhash():
+    """Test near duplicate texts have close fingerprints and short texts have none."""
+    fingerprint = simhash(PRESS_RELEASE)
+
+    assert hamming_distance(fingerprint, simhash(SYNDICATED_COPY)) <= 3
+    assert hamming_distance(fingerprint, simhash(OTHER_ARTICLE)) > 10
+    assert simhash("Too short to fingerprint") is None
+
+
+@pytest.mark.parametrize("enabled, expected_duplicates", [(True, 1), (False, 0)])
+def test_content_deduplicator(enabled, expected_duplicates):
+    """Test near duplicates are detected after the first copy and their tokens counted."""
+    deduplicator = ContentDeduplicator()
+
+    with patch("utils.config.DEDUP_ENABLED", enabled):
+        duplicates = [
+            deduplicator.is_duplicate(content, tokens=100)
+            for content in [PRESS_RELEASE, OTHER_ARTICLE, SYNDICATED_COPY]
+        ]
+
+    assert duplicates == [False, False, enabled]
+    assert deduplicator.duplicates == expected_duplicates
+    assert deduplicator.tokens_saved == 100 * expected_duplicates
+
+
+def test_content_deduplicator_keeps_best_ranked_copy():
+    """Test a better ranked copy seen later replaces the copy seen first."""
+    deduplicator = ContentDeduplicator()
+
+    with patch("utils.config.DEDUP_ENABLED", True):
+        assert not deduplicator.is_duplicate(SYNDICATED_COPY, 100, position=3)
+        assert not deduplicator.is_duplicate(PRESS_RELEASE, 100, position=1)
+        assert deduplicator.is_duplicate(SYNDICATED_COPY, 100, position=2)
+
+    assert deduplicator.dropped_positions == {3}
+    assert deduplicator.duplicates == 2
+    assert deduplicator.tokens_saved == 200
+
+
+@pytest.mark.parametrize("run_async", [False, True])
+def test_scrape_keeps_best_ranked_copy(run_async):
+    """Test the original page is kept when its lower ranked copy is scraped first."""
+    search_results = [
+        {"link": "https://example.com/press"},
+        {"link": "https://mirror.com/press"},
+    ]
+
+    def fetch(url, *args):
+        if url == "https://example.com/press":
+            time.sleep(0.2)
+            return PRESS_RELEASE
+        return SYNDICATED_COPY
+
+    async def async_fetch(url, *args):
+        if url == "https://example.com/press":
+            await asyncio.sleep(0.2)
+            return PRESS_RELEASE
+        return SYNDICATED_COPY
+
+    with patch("utils.config.DEDUP_ENABLED", True), patch(
+        "utils.web_scrape.fetch_with_requests", side_effect=fetch
+    ), patch("utils.web_scrape.async_fetch", side_effect=async_fetch):
+        if run_async:
+            scraped = asyncio.run(
+                async_parallel_scrape_caller(
+                    search_results, "query", 2, None, deduplicator=ContentDeduplicator()
+                )
+            )
+        else:
+            scraped = parallel_scrape_caller(
+                search_results, "query", 2, deduplicator=ContentDeduplicator()
+            )
+
+    assert [item["link"] for item in scraped] == ["https://example.com/press"]
+
+
+@patch("utils.llm_caller.summarize_large_content", return_value="Summary")
+@patch("utils.web_scrape.fetch_with_requests", return_value=PRESS_RELEASE)
+def test_duplicate_page_is_not_summarized(mock_fetch, mock_summarize):
+    """Test a near duplicate page is dropped before it is summarized."""
+    deduplicator = ContentDeduplicator()
+
+    with patch("utils.config.CACHE_ENABLED", False), patch(
+        "utils.config.SUMMARY_STRATEGY", "llm"
+    ):
+        first = web_scraping_handle(
+            {"link": "https://example.com/a"}, "query", 50, deduplicator=deduplicator
+        )
+        second = web_scraping_handle(
+            {"link": "https://mirror.com/a"}, "query", 50, deduplicator=deduplicator
+        )
+
+    assert first["content"] == "Summary"
+    assert second is None
+    mock_summarize.assert_called_once()
+    assert deduplicator.tokens_saved == 50
+
+
+def test_merge_selected_results_drops_duplicates_across_searches():
+    """Test results found again by another search are merged once."""
+    gathered_by_search = {
+        "first": {
+            "search_results": [{"link": "https://www.example.com/news/"}],
+            "scraped": [
+                {"link": "https://www.example.com/news/", "content": PRESS_RELEASE}
+            ],
+        },
+        "second": {
+            "search_results": [
+                {"link": "https://example.com/news"},
+                {"link": "https://mirror.com/news"},
+                {"link": "https://other.com/article"},
+            ],
+            "scraped": [
+                {"link": "https://example.com/news", "content": PRESS_RELEASE},
+                {"link": "https://mirror.com/news", "content": SYNDICATED_COPY},
+                {"link": "https://other.com/article", "content": OTHER_ARTICLE},
+            ],
+        },
+    }
+    task = {"searches": [("first", 1), ("second", 3)]}
+    deduplicator = ContentDeduplicator()
+
+    merged = merge_selected_results(gathered_by_search, task, deduplicator)
+
+    assert [item["link"] for item in merged] == [
+        "https://www.example.com/news/",
+        "https://other.com/article",
+    ]
+    assert deduplicator.duplicates == 1
+    assert deduplicator.tokens_saved > 0
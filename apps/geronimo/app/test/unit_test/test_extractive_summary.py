@@ -0,0 +1,126 @@
+import asyncio
+import pytest
+from unittest.mock import AsyncMock, patch
+import sys
+import os
+
+# Add the app directory to sys.path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../../")))
+
+from utils.extractive_summary import (
+    split_sentences,
+    summarize,
+    summary_strategy,
+    textrank_scores,
+)
+from utils.token_budget import count_tokens
+from utils.web_scrape import async_web_scraping_handle, web_scraping_handle
+
+PAGE = (
+    "TechCorp builds cloud platforms for banks.\n"
+    "The cloud platforms of TechCorp run payments for banks.\n"
+    "Banks use TechCorp cloud platforms to run payments.\n"
+    "Subscribe to our newsletter!\n"
+    "Accept all cookies."
+)
+
+
+@pytest.mark.parametrize(
+    "strategy, content_tokens, expected",
+    [
+        # Mid-size pages are summarized locally
+        ("auto", 10000, "extractive"),
+        # Large pages are reduced locally, then summarized by the LLM
+        ("auto", 100000, "hybrid"),
+        # A strategy can be forced
+        ("llm", 10000, "llm"),
+        ("extractive", 100000, "extractive"),
+    ],
+)
+def test_summary_strategy(strategy, content_tokens, expected):
+    """Test the summarization strategy is picked by page size."""
+    with patch("utils.config.SUMMARY_STRATEGY", strategy), patch(
+        "utils.config.SUMMARY_EXTRACTIVE_MAX_TOKENS", 30000
+    ):
+        assert summary_strategy(content_tokens) == expected
+
+
+def test_split_sentences():
+    """Test text is split at sentence ends and text blocks."""
+    assert split_sentences("First one. Second one!\nThird block\n\n") == [
+        "First one.",
+        "Second one!",
+        "Third block",
+    ]
+
+
+def test_textrank_scores_rank_central_sentences_first():
+    """Test sentences similar to the rest of the page outrank boilerplate."""
+    scores = textrank_scores(split_sentences(PAGE))
+
+    assert min(scores[:3]) > max(scores[3:])
+
+
+def test_summarize():
+    """Test the summary keeps the best sentences in text order within the budget."""
+    summary = summarize(PAGE, 25)
+
+    assert count_tokens(summary) <= 25
+    assert "cookies" not in summary
+    sentences = split_sentences(PAGE)
+    kept = summary.splitlines()
+    assert kept == [sentence for sentence in sentences if sentence in kept]
+
+
+def test_summarize_ranks_long_pages_in_groups():
+    """Test every group of sentences of a long page gets part of the budget."""
+    sentences = [f"Sentence {index} about TechCorp." for index in range(30)]
+
+    with patch("utils.extractive_summary.MAX_GRAPH_SENTENCES", 10):
+        summary = summarize(" ".join(sentences), 60)
+
+    assert count_tokens(summary) <= 60
+    assert {
+        int(sentence.split()[1]) // 10 for sentence in summary.splitlines()
+    } == {0, 1, 2}
+
+
+def test_summarize_truncates_without_fitting_sentences():
+    """Test a page without a sentence that fits is truncated."""
+    assert count_tokens(summarize("x" * 1000, 10)) <= 10
+
+
+@pytest.mark.parametrize(
+    "strategy, llm_calls", [("extractive", 0), ("hybrid", 1), ("llm", 1)]
+)
+@patch("utils.llm_caller.summarize_large_content", return_value="Summary")
+@patch("utils.web_scrape.fetch_with_requests", return_value=PAGE * 20)
+def test_handle_summary_strategy(mock_fetch, mock_summarize, strategy, llm_calls):
+    """Test only the LLM and hybrid strategies call the LLM."""
+    with patch("utils.config.CACHE_ENABLED", False), patch(
+        "utils.config.PASSAGE_RANKING", False
+    ), patch("utils.config.SUMMARY_STRATEGY", strategy), patch(
+        "utils.config.SUMMARY_CHUNK_TOKENS", 200
+    ), patch("utils.config.PARSE_PROCESSES", False):
+        scraped_item = web_scraping_handle({"link": "https://techcorp.com"}, "q", 50)
+
+    assert mock_summarize.call_count == llm_calls
+    if strategy == "extractive":
+        assert 0 < count_tokens(scraped_item["content"]) <= 50
+    if strategy == "hybrid":
+        assert count_tokens(mock_summarize.call_args.args[0]) <= 200
+
+
+@patch("utils.llm_caller.async_summarize_large_content", new_callable=AsyncMock)
+@patch("utils.web_scrape.async_fetch", new_callable=AsyncMock, return_value=PAGE * 20)
+def test_async_handle_extractive_summary(mock_fetch, mock_summarize):
+    """Test the async pipeline summarizes mid-size pages without the LLM."""
+    with patch("utils.config.PASSAGE_RANKING", False), patch(
+        "utils.config.SUMMARY_STRATEGY", "auto"
+    ), patch("utils.config.PARSE_PROCESSES", False):
+        scraped_item = asyncio.run(
+            async_web_scraping_handle({"link": "https://techcorp.com"}, "q", None, 50)
+        )
+
+    mock_summarize.assert_not_called()
+    assert 0 < count_tokens(scraped_item["content"]) <= 50
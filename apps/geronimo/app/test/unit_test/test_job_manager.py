@@ -0,0 +1,89 @@
+import pytest
+import threading
+import time
+import sys
+import os
+
+# Add the app directory to sys.path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../../")))
+
+from services.job_service import JobManager, JobQueueFullError
+
+SECTIONS = ["section_a", "section_b"]
+
+
+def wait_for_status(manager, job_id, statuses, timeout=5):
+    """Poll the job until it reaches one of the given statuses."""
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        job = manager.get(job_id)
+        if job["status"] in statuses:
+            return job
+        time.sleep(0.01)
+    raise AssertionError(f"Job {job_id} did not reach {statuses}")
+
+
+@pytest.fixture
+def manager():
+    return JobManager(max_workers=2, max_pending=2, result_ttl=60)
+
+
+def test_job_completes_with_progress(manager):
+    """Test a job reports section progress and its result."""
+
+    def target(on_section_complete, value):
+        for section in SECTIONS:
+            on_section_complete(section)
+        return {"value": value}
+
+    job_id = manager.submit(target, 42, sections=SECTIONS)
+    job = wait_for_status(manager, job_id, {"completed"})
+
+    assert job["result"] == {"value": 42}
+    assert job["progress"] == {"section_a": "done", "section_b": "done"}
+    assert job["error"] is None
+    assert job["started_at"] is not None
+    assert job["finished_at"] is not None
+
+
+def test_job_failure_is_recorded(manager):
+    """Test a failing job is marked as failed with the error message."""
+
+    def target(on_section_complete):
+        raise ValueError("pipeline broke")
+
+    job_id = manager.submit(target, sections=SECTIONS)
+    job = wait_for_status(manager, job_id, {"failed"})
+
+    assert job["error"] == "pipeline broke"
+    assert job["progress"] == {"section_a": "pending", "section_b": "pending"}
+
+
+def test_job_queue_full(manager):
+    """Test submitting beyond the pending limit is rejected."""
+    release = threading.Event()
+
+    def target(on_section_complete):
+        release.wait(timeout=5)
+
+    manager.submit(target)
+    manager.submit(target)
+    with pytest.raises(JobQueueFullError):
+        manager.submit(target)
+    release.set()
+
+
+def test_unknown_job(manager):
+    """Test an unknown job ID returns None."""
+    assert manager.get("missing") is None
+
+
+def test_finished_jobs_expire():
+    """Test finished jobs are purged after the result TTL."""
+    manager = JobManager(max_workers=1, max_pending=1, result_ttl=0)
+    job_id = manager.submit(lambda on_section_complete: "done")
+
+    deadline = time.time() + 5
+    while manager.get(job_id) is not None and time.time() < deadline:
+        time.sleep(0.01)
+    assert manager.get(job_id) is None
@@ -5,7 +5,7 @@ import os
 # Add the app directory to sys.path
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../../")))
 
-from utils.json_format import format_json_string
+from utils.json_format import format_json_string, parse_json_object
 
 
 @pytest.mark.parametrize(
@@ -44,3 +44,32 @@ def test_format_json_string(input_string, expected_output):
     """Test format_json_string function with different inputs."""
     result = format_json_string(input_string)
     assert result == expected_output
+
+
+@pytest.mark.parametrize(
+    "response, valid",
+    [
+        # Object with every required key
+        ('{"summary": "Text", "news": []}', True),
+        # Missing a required key
+        ('{"summary": "Text"}', False),
+        # Null or wrongly typed values
+        ('{"summary": null, "news": []}', False),
+        ('{"summary": "Text", "news": 3}', False),
+        ('{"summary": {"text": "Text"}, "news": []}', False),
+        # Not an object
+        ('[{"summary": "Text", "news": []}]', False),
+        # Not JSON
+        ("Summary: Text", False),
+    ],
+)
+def test_parse_json_object(response, valid):
+    """Test JSON mode responses must be objects with the required keys"""
+    if valid:
+        assert parse_json_object(response, ["summary", "news"]) == {
+            "summary": "Text",
+            "news": [],
+        }
+    else:
+        with pytest.raises(ValueError):
+            parse_json_object(response, ["summary", "news"])
@@ -0,0 +1,98 @@
+import asyncio
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+import sys
+import os
+
+# Add the app directory to sys.path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../../")))
+
+from langchain_core.messages import AIMessage
+import utils.llm_cache as llm_cache
+from utils.llm_caller import async_call_llm, call_llm
+from utils.prompt_templates import (
+    prompt_template_competitors,
+    prompt_template_summarization,
+)
+from utils.sqlite_cache import SQLiteCache
+
+
+@pytest.fixture(autouse=True)
+def temp_cache(tmp_path):
+    """Use a fresh LLM cache for every test."""
+    cache = SQLiteCache(str(tmp_path / "cache.sqlite3"), "llm")
+    with patch("utils.config.CACHE_ENABLED", True), patch.object(
+        llm_cache, "_cache", cache
+    ):
+        yield cache
+
+
+@pytest.fixture
+def mock_llm():
+    """Answer every prompt with a fixed response."""
+    llm = MagicMock()
+    llm.invoke.return_value = AIMessage(content="Summary")
+    llm.ainvoke = AsyncMock(return_value=AIMessage(content="Summary"))
+    with patch("utils.llm_caller.llm", llm):
+        yield llm
+
+
+def test_identical_prompts_are_served_from_cache(mock_llm, temp_cache):
+    """Test an identical prompt reuses the cached response."""
+    variables = {"query": "TechCorp overview", "chunk": "TechCorp builds software"}
+    assert call_llm(prompt_template_summarization, variables) == "Summary"
+    assert call_llm(prompt_template_summarization, dict(variables)) == "Summary"
+    async_response = asyncio.run(
+        async_call_llm(prompt_template_summarization, variables)
+    )
+    assert async_response == "Summary"
+
+    assert mock_llm.invoke.call_count == 1
+    mock_llm.ainvoke.assert_not_called()
+    assert temp_cache.stats()["hits"] == 2
+
+
+def test_cache_key():
+    """Test the key depends on the template and the variables it uses only."""
+    variables = {"company": "TechCorp", "google_results": [], "date": "2024-01-01"}
+    key = llm_cache.llm_cache_key(prompt_template_competitors, variables)
+
+    assert key == llm_cache.llm_cache_key(
+        prompt_template_competitors, {**variables, "unused": "value"}
+    )
+    assert key != llm_cache.llm_cache_key(
+        prompt_template_competitors, {**variables, "company": "OtherCorp"}
+    )
+    with patch("utils.config.OPENAI_DEPLOYMENT_NAME", "other-deployment"):
+        assert key != llm_cache.llm_cache_key(prompt_template_competitors, variables)
+
+
+def test_empty_responses_are_not_cached(mock_llm):
+    """Test an empty response is not reused."""
+    mock_llm.invoke.return_value = AIMessage(content="")
+    variables = {"query": "TechCorp overview", "chunk": "TechCorp builds software"}
+    call_llm(prompt_template_summarization, variables)
+    call_llm(prompt_template_summarization, variables)
+
+    assert mock_llm.invoke.call_count == 2
+
+
+def test_invalid_json_responses_are_not_cached(mock_llm):
+    """Test a JSON mode response without the required keys raises and is not reused."""
+    mock_llm.bind.return_value = mock_llm
+    mock_llm.invoke.side_effect = [
+        AIMessage(content='{"summary": "Text"}'),
+        AIMessage(content='{"summary": "Text", "news": []}'),
+    ]
+    variables = {"query": "TechCorp overview", "chunk": "TechCorp builds software"}
+
+    with pytest.raises(ValueError):
+        call_llm(
+            prompt_template_summarization, variables, json_keys=["summary", "news"]
+        )
+    response = call_llm(
+        prompt_template_summarization, variables, json_keys=["summary", "news"]
+    )
+
+    assert response == {"summary": "Text", "news": []}
+    mock_llm.bind.assert_called_with(response_format={"type": "json_object"})
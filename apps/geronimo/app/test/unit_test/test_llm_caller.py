@@ -0,0 +1,216 @@
+import asyncio
+import time
+import pytest
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, patch
+import sys
+import os
+
+# Add the app directory to sys.path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../../")))
+
+import httpx
+import openai
+from langchain_core.messages import AIMessage
+from langchain_core.prompts import PromptTemplate
+import utils.constants as constants
+from utils.deadline import Deadline
+from utils.token_budget import CharacterEncoding
+from utils.rate_limiter import RateLimiter
+from utils.llm_caller import (
+    async_summarize_large_content,
+    async_invoke_llm_chain,
+    call_llm,
+    group_summaries,
+    invoke_llm_chain,
+    summarize_large_content,
+)
+from utils.prompt_templates import prompt_template_summarization
+
+CONTENT = "".join(f"{i:03d}" + "x" * 97 for i in range(10))
+
+
+@pytest.fixture(autouse=True)
+def character_tokens():
+    """Count one token per character."""
+    with patch("utils.token_budget.get_encoding", return_value=CharacterEncoding(1)):
+        yield
+
+
+@pytest.fixture
+def mock_llm():
+    """Summarize a chunk to its first 20 characters."""
+    def summarize_chunk(prompt, variables, key, deadline):
+        return variables["chunk"][:20]
+
+    with patch(
+        "utils.llm_caller.call_llm", side_effect=summarize_chunk
+    ) as call_llm, patch(
+        "utils.llm_caller.async_call_llm", AsyncMock(side_effect=summarize_chunk)
+    ) as async_call_llm:
+        yield SimpleNamespace(call_llm=call_llm, async_call_llm=async_call_llm)
+
+
+def summarize(content):
+    return summarize_large_content(
+        content, "query", "https://example.com", chunk_tokens=100, overlap_tokens=0
+    )
+
+
+def async_summarize(content):
+    return asyncio.run(
+        async_summarize_large_content(
+            content,
+            "query",
+            "https://example.com",
+            chunk_tokens=100,
+            overlap_tokens=0,
+        )
+    )
+
+
+def test_group_summaries():
+    """Test summaries are grouped into pieces of at most chunk_tokens tokens."""
+    assert group_summaries(["a" * 40, "b" * 40, "c" * 40], 100) == [
+        "a" * 40 + "\n" + "b" * 40,
+        "c" * 40,
+    ]
+
+
+@pytest.mark.parametrize("summarizer", [summarize, async_summarize])
+def test_map_reduce(mock_llm, summarizer):
+    """Test chunks are summarized, then reduced in a tree until they fit in a chunk."""
+    result = summarizer(CONTENT)
+
+    # 10 map calls leave 209 tokens, reduced by 3 calls over groups of 4
+    calls = mock_llm.call_llm.call_count + mock_llm.async_call_llm.call_count
+    assert calls == 13
+    assert result.split("\n")[0].startswith("000")
+    assert len(result) <= 100
+
+
+def test_token_budget(mock_llm):
+    """Test only the leading chunks within the token budget are summarized."""
+    with patch("utils.config.SUMMARY_TOKEN_BUDGET", 200):
+        result = summarize(CONTENT)
+
+    assert mock_llm.call_llm.call_count == 2
+    assert result == CONTENT[:20] + "\n" + CONTENT[100:120]
+
+
+def test_depth_limit(mock_llm):
+    """Test the summary is truncated once the reduce tree reaches its depth limit."""
+    with patch("utils.config.SUMMARY_MAX_DEPTH", 1):
+        result = summarize(CONTENT)
+
+    assert mock_llm.call_llm.call_count == 10
+    assert len(result) == 100
+
+
+def test_failed_chunk_does_not_fail_summary(mock_llm):
+    """Test a failed chunk summary is left out instead of failing the page."""
+
+    def fail_first_chunk(prompt, variables, key, deadline):
+        if variables["chunk"].startswith("000"):
+            raise Exception("LLM error")
+        return "summary"
+
+    mock_llm.call_llm.side_effect = fail_first_chunk
+    result = summarize(CONTENT)
+
+    assert result == "\n" + "\n".join(["summary"] * 9)
+
+
+def test_summary_stops_at_deadline(mock_llm):
+    """Test the content is truncated when the deadline is reached while summarizing."""
+
+    def slow_summary(prompt, variables, key, deadline):
+        time.sleep(0.5)
+        return "summary"
+
+    mock_llm.call_llm.side_effect = slow_summary
+    start_time = time.monotonic()
+    result = summarize_large_content(
+        CONTENT,
+        "query",
+        "https://example.com",
+        chunk_tokens=100,
+        overlap_tokens=0,
+        deadline=Deadline(0.1),
+    )
+
+    assert time.monotonic() - start_time < 0.5
+    assert result == CONTENT[:100]
+
+
+def test_summary_fits_max_tokens(mock_llm):
+    """Test the reduce tree continues until the summary fits in max_tokens."""
+    result = summarize_large_content(
+        CONTENT,
+        "query",
+        "https://example.com",
+        max_tokens=30,
+        chunk_tokens=100,
+        overlap_tokens=0,
+    )
+
+    assert len(result) <= 30
+
+
+def rate_limit_error():
+    return openai.RateLimitError(
+        "Rate limit exceeded",
+        response=httpx.Response(
+            429,
+            headers={"retry-after-ms": "10"},
+            request=httpx.Request("POST", "https://example.com"),
+        ),
+        body=None,
+    )
+
+
+@pytest.mark.parametrize("failures, succeeds", [(1, True), (4, False)])
+def test_call_llm_rate_limited(failures, succeeds):
+    """Test a 429 slows the limiter down and the call is retried after retry-after."""
+    limiter = RateLimiter(100, 100000, 4)
+    with patch("utils.config.CACHE_ENABLED", False), patch(
+        "utils.llm_caller.RATE_LIMITER", limiter
+    ), patch("utils.llm_caller.llm") as mock_llm:
+        mock_llm.invoke.side_effect = [rate_limit_error()] * failures + [
+            AIMessage(content="Summary")
+        ]
+        variables = {"query": "query", "chunk": "chunk"}
+        if succeeds:
+            assert call_llm(prompt_template_summarization, variables) == "Summary"
+        else:
+            with pytest.raises(openai.RateLimitError):
+                call_llm(prompt_template_summarization, variables)
+
+    assert limiter.throttled == failures
+    assert limiter.stats()["in_flight"] == 0
+
+
+@pytest.mark.parametrize("run_async", [False, True])
+def test_chain_not_retried_when_rate_limited(run_async):
+    """Test a chain that keeps getting 429s only makes the rate limit retries."""
+    limiter = RateLimiter(100, 100000, 4)
+    prompt = PromptTemplate.from_template("{google_results}")
+    arguments = ("John Doe", {}, prompt, [])
+    with patch("utils.config.CACHE_ENABLED", False), patch(
+        "utils.config.LLM_RATE_LIMIT_RETRIES", 3
+    ), patch("utils.llm_caller.RATE_LIMITER", limiter), patch(
+        "utils.llm_caller.build_chain_inputs", return_value={}
+    ), patch(
+        "utils.llm_caller.llm"
+    ) as mock_llm:
+        mock_llm.invoke.side_effect = rate_limit_error()
+        mock_llm.ainvoke = AsyncMock(side_effect=rate_limit_error())
+        if run_async:
+            result = asyncio.run(async_invoke_llm_chain(*arguments))
+            calls = mock_llm.ainvoke.call_count
+        else:
+            result = invoke_llm_chain(*arguments)
+            calls = mock_llm.invoke.call_count
+
+    assert result == constants.CHAIN_FAILED_MESSAGE
+    assert calls == 4
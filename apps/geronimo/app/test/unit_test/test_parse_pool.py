@@ -0,0 +1,119 @@
+import asyncio
+import pytest
+from unittest.mock import MagicMock, patch
+import sys
+import os
+
+# Add the app directory to sys.path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../../")))
+
+from concurrent.futures.process import BrokenProcessPool
+import utils.parse_pool as parse_pool
+from utils.stage_timer import StageTimer
+from utils.deadline import Deadline
+from utils.token_budget import count_tokens
+from utils.web_scrape import STAGE_TIMER, fetch_with_requests, summarize_locally
+
+PAGE = "<html><body><h1>Café</h1><p>TechCorp news</p></body></html>".encode(
+    "latin-1"
+)
+CONTENT_TYPE = "text/html; charset=latin-1"
+
+
+@pytest.fixture
+def parse_processes():
+    """Parse pages in a fresh pool of one process."""
+    with patch("utils.config.PARSE_PROCESSES", True), patch(
+        "utils.config.PARSE_WORKERS", 1
+    ), patch.object(parse_pool, "_executor", None):
+        yield
+        parse_pool.shutdown()
+
+
+def test_extract_page_text_in_process_pool(parse_processes):
+    """Test pages are decoded and extracted in the parsing processes."""
+    assert parse_pool.extract_page_text(PAGE, CONTENT_TYPE) == "Café\nTechCorp news"
+    assert asyncio.run(parse_pool.async_extract_page_text(PAGE, CONTENT_TYPE)) == (
+        "Café\nTechCorp news"
+    )
+    assert parse_pool.get_executor() is not None
+
+
+def test_summarize_text_in_process_pool(parse_processes):
+    """Test extractive summaries are computed in the parsing processes."""
+    text = "TechCorp builds cloud platforms.\nBanks use TechCorp cloud platforms."
+
+    assert parse_pool.summarize_text(text, 100) == text
+    assert asyncio.run(parse_pool.async_summarize_text(text, 100)) == text
+    assert parse_pool.get_executor() is not None
+
+
+def test_summary_truncated_at_deadline():
+    """Test a page is truncated when its summary is not ready by the deadline."""
+    with patch.object(parse_pool, "summarize_text", side_effect=TimeoutError):
+        content = summarize_locally("word " * 100, 10, Deadline(0))
+
+    assert count_tokens(content) <= 10
+
+
+def test_extract_page_text_without_processes():
+    """Test pages are parsed in the calling thread when the pool is off."""
+    with patch("utils.config.PARSE_PROCESSES", False):
+        assert parse_pool.get_executor() is None
+        assert parse_pool.extract_page_text(PAGE, CONTENT_TYPE) == (
+            "Café\nTechCorp news"
+        )
+
+
+def test_broken_pool_falls_back_to_thread(parse_processes):
+    """Test a broken pool is replaced and the page is parsed in the thread."""
+    broken_executor = MagicMock()
+    broken_executor.submit.return_value.result.side_effect = BrokenProcessPool()
+
+    with patch.object(parse_pool, "_executor", broken_executor):
+        text = parse_pool.extract_page_text(PAGE, CONTENT_TYPE)
+        assert parse_pool._executor is None
+
+    assert text == "Café\nTechCorp news"
+
+
+def test_stage_timer():
+    """Test stage times are counted, summed and their maximum kept."""
+    timer = StageTimer()
+    timer.record("fetch", 1.0)
+    timer.record("fetch", 3.0)
+    timer.record("parse", 0.5)
+
+    assert timer.stats() == {
+        "fetch": {
+            "count": 2,
+            "total_seconds": 4.0,
+            "mean_seconds": 2.0,
+            "max_seconds": 3.0,
+        },
+        "parse": {
+            "count": 1,
+            "total_seconds": 0.5,
+            "mean_seconds": 0.5,
+            "max_seconds": 0.5,
+        },
+    }
+
+
+@patch("utils.http_client.get_session")
+def test_fetch_records_fetch_and_parse_times(mock_get_session):
+    """Test a fetched page records its fetch and parse times separately."""
+    response = MagicMock()
+    response.status_code = 200
+    response.headers = {"Content-Type": CONTENT_TYPE}
+    response.iter_content.return_value = [PAGE]
+    mock_get_session.return_value.get.return_value = response
+
+    with patch("utils.config.CACHE_ENABLED", False), patch(
+        "utils.config.PARSE_PROCESSES", False
+    ), patch.object(STAGE_TIMER, "_stages", {}):
+        content = fetch_with_requests("https://techcorp.com")
+        stats = STAGE_TIMER.stats()
+
+    assert content == "Café\nTechCorp news"
+    assert stats["fetch"]["count"] == stats["parse"]["count"] == 1
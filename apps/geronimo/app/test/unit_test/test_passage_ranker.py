@@ -0,0 +1,99 @@
+import pytest
+from unittest.mock import patch
+import sys
+import os
+
+# Add the app directory to sys.path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../../")))
+
+from utils.passage_ranker import bm25_scores, select_passages, split_passages
+from utils.token_budget import count_tokens
+from utils.web_scrape import web_scraping_handle
+
+FILLER = "\n".join(
+    f"Cookie notice {index}: we use cookies to improve the site experience."
+    for index in range(40)
+)
+PAGE = (
+    f"{FILLER}\n"
+    "John Doe joined TechCorp as a software engineer in 2019.\n"
+    f"{FILLER}\n"
+    "At TechCorp, John Doe leads the cloud platform team.\n"
+    f"{FILLER}"
+)
+
+
+def test_split_passages():
+    """Test passages keep the text order and fit the passage size."""
+    passages = split_passages(PAGE, 50)
+
+    assert all(count_tokens(passage) <= 50 for passage in passages)
+    assert "\n".join(passages).split() == PAGE.split()
+
+
+def test_split_passages_splits_long_blocks():
+    """Test a block longer than a passage is split."""
+    passages = split_passages("word " * 200, 50)
+
+    assert len(passages) > 1
+    assert all(count_tokens(passage) <= 50 for passage in passages)
+
+
+def test_bm25_scores():
+    """Test passages with more query words score higher and others score 0."""
+    scores = bm25_scores(
+        [
+            "John Doe works at TechCorp",
+            "TechCorp sells cloud services",
+            "We use cookies",
+        ],
+        "John Doe in TechCorp",
+    )
+
+    assert scores[0] > scores[1] > scores[2] == 0
+
+
+@pytest.mark.parametrize(
+    "ranking, query, expected",
+    [
+        # The passages about the lead are kept in text order
+        (True, "John Doe in TechCorp", ["joined TechCorp", "leads the cloud"]),
+        # No passage matches the query
+        (True, "Jane Smith in Acme", None),
+        # Disabled, the page is summarized
+        (False, "John Doe in TechCorp", None),
+    ],
+)
+def test_select_passages(ranking, query, expected):
+    """Test the best matching passages are selected within the budget."""
+    with patch("utils.config.PASSAGE_RANKING", ranking), patch(
+        "utils.config.PASSAGE_TOKENS", 50
+    ):
+        content = select_passages(PAGE, query, 200)
+
+    if expected is None:
+        assert content is None
+    else:
+        assert count_tokens(content) <= 200
+        assert content.index(expected[0]) < content.index(expected[1])
+
+
+@pytest.mark.parametrize(
+    "query, summarized",
+    [("John Doe in TechCorp", False), ("Jane Smith in Acme", True)],
+)
+@patch("utils.llm_caller.summarize_large_content", return_value="Summary")
+@patch("utils.web_scrape.fetch_with_requests", return_value=PAGE)
+def test_handle_summarizes_only_without_matching_passages(
+    mock_fetch, mock_summarize, query, summarized
+):
+    """Test overflowing pages are cut to their passages before falling back to summaries."""
+    with patch("utils.config.CACHE_ENABLED", False), patch(
+        "utils.config.SUMMARY_STRATEGY", "llm"
+    ):
+        scraped_item = web_scraping_handle(
+            {"link": "https://example.com/john"}, query, 200
+        )
+
+    assert mock_summarize.called is summarized
+    assert (scraped_item["content"] == "Summary") is summarized
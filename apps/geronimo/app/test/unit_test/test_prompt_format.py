@@ -0,0 +1,75 @@
+import pytest
+from unittest.mock import patch
+import sys
+import os
+
+# Add the app directory to sys.path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../../")))
+
+from utils.prompt_format import format_results
+from utils.token_budget import count_tokens
+
+SCRAPED_ITEMS = [
+    {
+        "title": "TechCorp   launches\n AI platform",
+        "link": "https://technews.com/techcorp-ai",
+        "snippet": "TechCorp has introduced\tan AI-driven platform.",
+        "content": "TechCorp launches AI platform\n\n\n   The platform   analyses data.  \n",
+    },
+    {
+        "title": "TechCorp - About",
+        "link": "https://techcorp.com/about",
+        "snippet": "",
+        "content": " ",
+    },
+    {
+        "title": "TechCorp careers",
+        "link": "https://techcorp.com/careers",
+        "snippet": None,
+        "content": "none",
+    },
+]
+
+
+def test_format_results():
+    """Test results are written in position order with collapsed whitespace."""
+    assert format_results(SCRAPED_ITEMS) == (
+        "Position: 1\n"
+        "Title: TechCorp launches AI platform\n"
+        "Link: https://technews.com/techcorp-ai\n"
+        "Snippet: TechCorp has introduced an AI-driven platform.\n"
+        "Content: TechCorp launches AI platform\nThe platform analyses data.\n\n"
+        "Position: 2\n"
+        "Title: TechCorp - About\n"
+        "Link: https://techcorp.com/about\n\n"
+        "Position: 3\n"
+        "Title: TechCorp careers\n"
+        "Link: https://techcorp.com/careers"
+    )
+
+
+def test_format_results_is_smaller_than_repr():
+    """Test the serialized results use fewer tokens than the repr of the items."""
+    assert count_tokens(format_results(SCRAPED_ITEMS)) < count_tokens(
+        str(SCRAPED_ITEMS)
+    )
+
+
+@pytest.mark.parametrize("field", ["title", "snippet", "content"])
+def test_fields_are_truncated(field):
+    """Test long fields are truncated to their token limit and links are kept."""
+    item = {"link": "https://example.com/" + "a" * 500, field: "word " * 500}
+
+    with patch(f"utils.config.PROMPT_{field.upper()}_MAX_TOKENS", 10):
+        formatted = format_results([item])
+
+    label = field.capitalize() + ": "
+    text = next(line for line in formatted.splitlines() if line.startswith(label))
+    assert count_tokens(text[len(label) :]) <= 10
+    assert item["link"] in formatted
+
+
+def test_format_results_without_results():
+    """Test items with nothing to show are skipped."""
+    assert format_results([]) == ""
+    assert format_results([{"content": " "}]) == ""
@@ -0,0 +1,159 @@
+import asyncio
+import threading
+import time
+import pytest
+import sys
+import os
+
+# Add the app directory to sys.path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../../")))
+
+from utils.rate_limiter import RateLimiter, retry_after_seconds
+
+
+class FakeClock:
+    """A clock that only moves when the test advances it."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def wait_until(condition, timeout=2):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "condition not reached"
+        time.sleep(0.01)
+
+
+@pytest.mark.parametrize(
+    "requests_per_minute, tokens_per_minute, tokens, calls_granted",
+    [
+        # Requests per minute bound
+        (3, 100000, 10, 3),
+        # Tokens per minute bound
+        (100, 1000, 400, 2),
+    ],
+)
+def test_buckets_bound_calls(
+    requests_per_minute, tokens_per_minute, tokens, calls_granted
+):
+    """Test calls are held back once either bucket is empty."""
+    limiter = RateLimiter(requests_per_minute, tokens_per_minute, 10, FakeClock())
+    granted = [limiter.acquire(tokens, timeout=0.05) for _ in range(calls_granted + 1)]
+
+    assert granted == [True] * calls_granted + [False]
+
+
+def test_buckets_refill():
+    """Test the buckets refill over time."""
+    clock = FakeClock()
+    limiter = RateLimiter(60, 100000, 10, clock)
+    for _ in range(60):
+        limiter.acquire(10)
+        limiter.release()
+    assert not limiter.acquire(10, timeout=0.05)
+
+    clock.now += 1
+    assert limiter.acquire(10, timeout=0.05)
+
+
+def test_concurrency_limit():
+    """Test at most the concurrency limit of calls run at once."""
+    limiter = RateLimiter(100, 100000, 2, FakeClock())
+    assert limiter.acquire(10) and limiter.acquire(10)
+    assert not limiter.acquire(10, timeout=0.05)
+
+    limiter.release()
+    assert limiter.acquire(10, timeout=0.05)
+
+
+def test_adapts_to_headers_and_usage():
+    """Test remaining limits from response headers and actual usage are applied."""
+    limiter = RateLimiter(100, 10000, 10, FakeClock())
+    limiter.update_from_headers(
+        {"x-ratelimit-remaining-requests": "50", "x-ratelimit-remaining-tokens": "900"}
+    )
+    assert limiter.stats()["requests_available"] == 50
+    assert limiter.stats()["tokens_available"] == 900
+
+    assert limiter.acquire(800)
+    limiter.record_usage(800, 300)
+    assert limiter.stats()["tokens_available"] == 600
+
+
+def test_penalize_blocks_and_reduces_concurrency():
+    """Test a 429 blocks every call for its retry-after time and halves concurrency."""
+    clock = FakeClock()
+    limiter = RateLimiter(100, 100000, 8, clock)
+    limiter.penalize(retry_after=5)
+
+    assert limiter.concurrency_limit == 4
+    assert not limiter.acquire(10, timeout=0.05)
+
+    clock.now += 5
+    assert limiter.acquire(10, timeout=0.05)
+    # The limit grows back by one after limit successful calls
+    for _ in range(4):
+        limiter.release()
+        limiter.acquire(10)
+    assert limiter.concurrency_limit == 5
+
+
+def test_fair_across_keys():
+    """Test queued calls are served in turn across keys."""
+    clock = FakeClock()
+    limiter = RateLimiter(1, 100000, 10, clock)
+    limiter.acquire(10)
+
+    order = []
+
+    def call(key, name):
+        limiter.acquire(10, key=key)
+        order.append(name)
+
+    threads = []
+    calls = [("lead-a", "a1"), ("lead-a", "a2"), ("lead-a", "a3"), ("lead-b", "b1")]
+    for key, name in calls:
+        thread = threading.Thread(target=call, args=(key, name))
+        thread.start()
+        threads.append(thread)
+        wait_until(lambda: limiter.stats()["waiting"] == len(threads))
+
+    for granted in range(1, 5):
+        clock.now += 60
+        wait_until(lambda: len(order) == granted)
+    for thread in threads:
+        thread.join()
+
+    assert order == ["a1", "b1", "a2", "a3"]
+
+
+def test_async_acquire():
+    """Test the async API shares the buckets of the sync one."""
+    limiter = RateLimiter(2, 100000, 10, FakeClock())
+    limiter.acquire(10)
+
+    async def run():
+        await limiter.async_acquire(10)
+        return await asyncio.wait_for(limiter.async_acquire(10), timeout=0.1)
+
+    with pytest.raises(asyncio.TimeoutError):
+        asyncio.run(run())
+    assert limiter.stats()["waiting"] == 0
+
+
+@pytest.mark.parametrize(
+    "headers, expected",
+    [
+        ({"retry-after-ms": "1500", "retry-after": "2"}, 1.5),
+        ({"retry-after": "2"}, 2.0),
+        ({}, None),
+        (None, None),
+    ],
+)
+def test_retry_after_seconds(headers, expected):
+    """Test the retry-after time is read from the response headers."""
+    assert retry_after_seconds(headers) == expected
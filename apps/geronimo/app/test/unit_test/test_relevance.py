@@ -0,0 +1,75 @@
+import pytest
+from unittest.mock import patch
+import sys
+import os
+
+# Add the app directory to sys.path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../../")))
+
+from utils.llm_caller import gather_results
+from utils.relevance import filter_relevant, score_result
+
+PERSON_TERMS = [("John Doe", 2), ("TechCorp", 1)]
+
+SEARCH_RESULTS = [
+    {
+        "title": "John Doe - Engineer - TechCorp | LinkedIn",
+        "snippet": "View John Doe's profile on LinkedIn",
+        "link": "https://www.linkedin.com/in/john-doe-123",
+    },
+    {
+        "title": "John Doe - Lawyer at Smith & Co",
+        "snippet": "John Doe is a lawyer",
+        "link": "https://smithco.com/john",
+    },
+    {
+        "title": "Best pizza in town",
+        "snippet": "Order pizza online",
+        "link": "https://pizza.com",
+    },
+]
+
+
+def test_score_result_ranks_likely_hits_first():
+    """Test results about the lead score above results about someone else."""
+    scores = [score_result(result, PERSON_TERMS) for result in SEARCH_RESULTS]
+    assert scores == sorted(scores, reverse=True)
+    assert scores[0] == 100
+
+
+def test_score_result_matches_profile_links():
+    """Test a name written as a profile URL slug still matches."""
+    result = {"title": "Profile", "link": "https://github.com/john-doe"}
+    assert score_result(result, [("John Doe", 1)]) == 100
+
+
+@pytest.mark.parametrize(
+    "min_score, terms, expected_links",
+    [
+        # Unrelated results are skipped
+        (60, PERSON_TERMS, [SEARCH_RESULTS[0]["link"], SEARCH_RESULTS[1]["link"]]),
+        # Disabled, every result is kept
+        (0, PERSON_TERMS, [result["link"] for result in SEARCH_RESULTS]),
+        # A search without terms keeps every result
+        (60, None, [result["link"] for result in SEARCH_RESULTS]),
+    ],
+)
+def test_filter_relevant(min_score, terms, expected_links):
+    """Test results below the relevance score are dropped, in search order."""
+    with patch("utils.config.RELEVANCE_MIN_SCORE", min_score):
+        relevant_results = filter_relevant(SEARCH_RESULTS, terms)
+
+    assert [result["link"] for result in relevant_results] == expected_links
+
+
+@patch("utils.web_scrape.parallel_scrape_caller", return_value=[])
+@patch("utils.web_search.google_search", return_value=SEARCH_RESULTS)
+def test_gather_results_skips_irrelevant_results(
+    mock_google_search, mock_parallel_scrape_caller
+):
+    """Test only relevant results are scraped and all search results are kept."""
+    gathered = gather_results("John Doe in TechCorp", 3, terms=PERSON_TERMS)
+
+    scraped_results = mock_parallel_scrape_caller.call_args.args[0]
+    assert SEARCH_RESULTS[2] not in scraped_results
+    assert gathered["search_results"] == SEARCH_RESULTS
@@ -1,5 +1,6 @@
+import asyncio
 import pytest
-from unittest.mock import patch
+from unittest.mock import AsyncMock, patch
 import json
 import sys
 import os
@@ -7,7 +8,17 @@ import os
 # Add the app directory to sys.path
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../../")))
 
-from utils.report_generator import format_response
+from types import SimpleNamespace
+import time
+from utils.deadline import Deadline
+from utils.report_generator import (
+    async_parallel_chain_caller,
+    chain_complete,
+    format_response,
+    format_section,
+    iter_report_sections,
+    parallel_chain_caller,
+)
 from utils.json_format import format_json_string
 
 DUMMY_RESPONSES = [
@@ -148,6 +159,23 @@ DUMMY_RESPONSES = [
     },
 ]
 
+LEAD_INFO = SimpleNamespace(
+    first_name="John",
+    last_name="Doe",
+    job_title="Engineer",
+    company="TechCorp",
+    country="USA",
+)
+
+
+
+@pytest.fixture(autouse=True)
+def disable_cache():
+    """Keep the persistent caches out of the report generator tests."""
+    with patch("utils.config.CACHE_ENABLED", False):
+        yield
+
+
 REQUIRED_FIELDS = [
     "professional_summary",
     "social_media_links",
@@ -172,3 +200,310 @@ def test_format_response(mock_json_formatter, input_data):
     # Ensure all required fields are present in the result
     for field in REQUIRED_FIELDS:
         assert field in result, f"Missing field: {field}"
+
+
+def test_format_section_matches_format_response():
+    """Test each formatted section equals the matching format_response field."""
+    input_data = DUMMY_RESPONSES[0]
+    result = format_response(input_data)
+    for field in REQUIRED_FIELDS:
+        assert format_section(field, input_data) == result[field]
+
+
+@pytest.mark.parametrize("value", [None, 42, True])
+def test_format_section_invalid_values(value):
+    """Test null and wrongly typed values get the section defaults."""
+    response_data = {key: value for key in REQUIRED_FIELDS}
+
+    assert format_response(response_data) == {
+        "professional_summary": "No Personal Detail Available",
+        "social_media_links": None,
+        "company_summary": "No Company Detail Available",
+        "company_competitors": [],
+        "company_news": None,
+    }
+
+
+def test_format_section_unknown_key():
+    """Test formatting an unknown section raises an error."""
+    with pytest.raises(ValueError):
+        format_section("unknown_section", {})
+
+
+@patch("utils.report_generator.invoke_llm_chain")
+@patch("utils.report_generator.gather_results")
+def test_iter_report_sections_streams_in_completion_order(
+    mock_gather_results, mock_invoke_llm_chain
+):
+    """Test sections are yielded as soon as their chain finishes."""
+
+    def fake_gather_results(query, num_results, deadline=None, **kwargs):
+        return {"search_results": [], "scraped": []}
+
+    def fake_invoke_llm_chain(
+        name, lead_info, llm_prompt, formatted_results, json_keys=None, deadline=None
+    ):
+        if "news" in llm_prompt.template:
+            time.sleep(0.2)
+            return '[{"title": "News"}]'
+        return "Result"
+
+    mock_gather_results.side_effect = fake_gather_results
+    mock_invoke_llm_chain.side_effect = fake_invoke_llm_chain
+
+    sections = list(iter_report_sections(LEAD_INFO))
+
+    assert sorted(key for key, _ in sections) == sorted(REQUIRED_FIELDS)
+    assert sections[-1] == ("company_news", [{"title": "News"}])
+
+
+@patch("utils.report_generator.invoke_llm_chain", return_value="Result")
+@patch("utils.report_generator.gather_results")
+def test_chains_with_same_query_share_search(
+    mock_gather_results, mock_invoke_llm_chain
+):
+    """Test chains issuing the same query share one search with the most results."""
+    search_results = [
+        {"title": f"Result {i}", "link": f"https://example.com/{i}"} for i in range(8)
+    ]
+    mock_gather_results.return_value = {
+        "search_results": search_results,
+        "scraped": [{**result, "content": "Content"} for result in search_results],
+    }
+
+    parallel_chain_caller(LEAD_INFO)
+
+    queries = [call.args for call in mock_gather_results.call_args_list]
+    assert sorted(queries) == sorted(
+        [
+            ("John Doe in TechCorp", 8),
+            ("TechCorp in USA overview", 5),
+            ("TechCorp competitors", 4),
+            ("TechCorp company in USA recent news", 4),
+        ]
+    )
+
+    # Each chain gets the slice of results it asked for
+    slice_sizes = sorted(
+        len(call.args[3]) for call in mock_invoke_llm_chain.call_args_list
+    )
+    assert slice_sizes == [4, 4, 5, 5, 8]
+
+
+@patch("utils.report_generator.invoke_llm_chain")
+@patch("utils.report_generator.gather_results")
+def test_combined_company_call(mock_gather_results, mock_invoke_llm_chain):
+    """Test company sections come from one JSON call over the merged company results."""
+
+    def fake_gather_results(query, num_results, deadline=None, **kwargs):
+        # The company searches overlap on one result
+        links = ["https://techcorp.com", f"https://example.com/{query}"]
+        search_results = [{"title": query, "link": link} for link in links]
+        return {
+            "search_results": search_results,
+            "scraped": [{**result, "content": "Content"} for result in search_results],
+        }
+
+    def fake_invoke_llm_chain(
+        name, lead_info, llm_prompt, formatted_results, json_keys=None, deadline=None
+    ):
+        if json_keys:
+            return {
+                "company_summary": "TechCorp builds software",
+                "company_competitors": ["OtherCorp"],
+                "company_news": [{"title": "News"}],
+            }
+        return "Result"
+
+    mock_gather_results.side_effect = fake_gather_results
+    mock_invoke_llm_chain.side_effect = fake_invoke_llm_chain
+
+    with patch("utils.config.COMBINED_COMPANY_CALL", True):
+        response = parallel_chain_caller(LEAD_INFO)
+
+    assert mock_invoke_llm_chain.call_count == 3
+    profile_call = next(
+        call for call in mock_invoke_llm_chain.call_args_list if call.args[4]
+    )
+    # 3 company searches with 2 results each, sharing one link
+    assert len(profile_call.args[3]) == 4
+    assert response["company_summary"] == "TechCorp builds software"
+    assert response["company_competitors"] == ["OtherCorp"]
+    assert response["company_news"] == [{"title": "News"}]
+
+
+@patch("utils.report_generator.invoke_llm_chain")
+@patch("utils.report_generator.gather_results")
+def test_partial_report_at_deadline(mock_gather_results, mock_invoke_llm_chain):
+    """Test the sections finished by the deadline are returned without waiting."""
+
+    def fake_invoke_llm_chain(
+        name, lead_info, llm_prompt, formatted_results, json_keys=None, deadline=None
+    ):
+        if "news" in llm_prompt.template:
+            time.sleep(1)
+            return '[{"title": "News"}]'
+        return "Result"
+
+    mock_gather_results.return_value = {"search_results": [], "scraped": []}
+    mock_invoke_llm_chain.side_effect = fake_invoke_llm_chain
+
+    start_time = time.monotonic()
+    response = parallel_chain_caller(LEAD_INFO, deadline=Deadline(0.3))
+
+    assert time.monotonic() - start_time < 1
+    assert response["professional_summary"] == "Result"
+    assert response["company_news"] is None
+    # Every stage gets the report deadline
+    assert all(
+        call.kwargs["deadline"] for call in mock_invoke_llm_chain.call_args_list
+    )
+
+
+@patch("utils.report_generator.async_invoke_llm_chain")
+@patch("utils.report_generator.async_gather_results")
+def test_async_partial_report_at_deadline(
+    mock_gather_results, mock_invoke_llm_chain
+):
+    """Test the async pipeline returns the sections finished by the deadline."""
+
+    async def fake_invoke_llm_chain(
+        name, lead_info, llm_prompt, formatted_results, json_keys=None, deadline=None
+    ):
+        if "news" in llm_prompt.template:
+            await asyncio.sleep(1)
+            return '[{"title": "News"}]'
+        return "Result"
+
+    mock_gather_results.return_value = {"search_results": [], "scraped": []}
+    mock_invoke_llm_chain.side_effect = fake_invoke_llm_chain
+
+    start_time = time.monotonic()
+    response = asyncio.run(
+        async_parallel_chain_caller(
+            LEAD_INFO, client=object(), deadline=Deadline(0.3)
+        )
+    )
+
+    assert time.monotonic() - start_time < 1
+    assert response["professional_summary"] == "Result"
+    assert response["company_news"] is None
+
+
+@patch("main.send_mail_caller", return_value="Mail sent")
+@patch("utils.report_generator.invoke_llm_chain")
+@patch("utils.report_generator.gather_results")
+def test_batch_survives_failed_search(
+    mock_gather_results, mock_invoke_llm_chain, mock_send_mail_caller
+):
+    """Test a failed search of one lead does not stop the reports of the batch."""
+    from main import run_batch_report_job
+
+    def fake_gather_results(query, num_results, deadline=None, **kwargs):
+        if query.startswith("Jane Unknown"):
+            raise Exception("No search results found")
+        search_results = [{"title": query, "link": f"https://example.com/{query}"}]
+        return {
+            "search_results": search_results,
+            "scraped": [{**result, "content": "Content"} for result in search_results],
+        }
+
+    def fake_invoke_llm_chain(
+        name, lead_info, llm_prompt, formatted_results, json_keys=None, deadline=None
+    ):
+        return f"Result from {len(formatted_results)} results"
+
+    mock_gather_results.side_effect = fake_gather_results
+    mock_invoke_llm_chain.side_effect = fake_invoke_llm_chain
+    unknown_lead = SimpleNamespace(**{**vars(LEAD_INFO), "first_name": "Jane"})
+    unknown_lead.last_name = "Unknown"
+    lead_requests = [
+        SimpleNamespace(lead_info=LEAD_INFO, email_info="john@example.com"),
+        SimpleNamespace(lead_info=unknown_lead, email_info="jane@example.com"),
+    ]
+
+    results = run_batch_report_job(lambda index: None, lead_requests)
+
+    assert [result["mail_status"] for result in results] == ["Mail sent"] * 2
+    assert mock_send_mail_caller.call_count == 2
+    assert results[0]["report"]["professional_summary"] == "Result from 1 results"
+    # The chains of the failed search run without results
+    assert results[1]["report"]["professional_summary"] == "Result from 0 results"
+    assert results[1]["report"]["company_summary"] == "Result from 1 results"
+
+
+@patch("utils.report_generator.async_invoke_llm_chain")
+@patch("utils.report_generator.async_gather_results")
+def test_async_failed_search(mock_gather_results, mock_invoke_llm_chain):
+    """Test a failed search in the async pipeline leaves the other sections intact."""
+
+    async def fake_gather_results(query, num_results, client, deadline=None, **kwargs):
+        if "competitors" in query:
+            raise Exception("No search results found")
+        return {"search_results": [], "scraped": []}
+
+    async def fake_invoke_llm_chain(
+        name, lead_info, llm_prompt, formatted_results, json_keys=None, deadline=None
+    ):
+        return "Result"
+
+    mock_gather_results.side_effect = fake_gather_results
+    mock_invoke_llm_chain.side_effect = fake_invoke_llm_chain
+
+    response = asyncio.run(async_parallel_chain_caller(LEAD_INFO, client=object()))
+
+    assert mock_invoke_llm_chain.call_count == 5
+    assert response["professional_summary"] == "Result"
+
+
+@pytest.mark.parametrize("run_async", [False, True])
+@patch("utils.company_cache.store_chain")
+def test_degraded_chains_are_not_cached(mock_store_chain, run_async):
+    """Test chains of failed or empty searches are not cached for the company."""
+
+    def fake_gather_results(query, num_results, *args, **kwargs):
+        if "competitors" in query:
+            raise Exception("Quota exceeded")
+        if "news" in query:
+            return {"search_results": [], "scraped": []}
+        search_results = [{"title": query, "link": f"https://example.com/{query}"}]
+        return {
+            "search_results": search_results,
+            "scraped": [{**result, "content": "Content"} for result in search_results],
+        }
+
+    with patch(
+        "utils.report_generator.gather_results", side_effect=fake_gather_results
+    ), patch(
+        "utils.report_generator.async_gather_results",
+        AsyncMock(side_effect=fake_gather_results),
+    ), patch(
+        "utils.report_generator.invoke_llm_chain", return_value="Result"
+    ), patch(
+        "utils.report_generator.async_invoke_llm_chain",
+        AsyncMock(return_value="Result"),
+    ):
+        if run_async:
+            asyncio.run(async_parallel_chain_caller(LEAD_INFO, client=object()))
+        else:
+            parallel_chain_caller(LEAD_INFO)
+
+    complete = {
+        call.args[0]["section"]: call.args[2] for call in mock_store_chain.call_args_list
+    }
+    assert complete == {
+        "professional_summary": True,
+        "social_media_links": True,
+        "company_summary": True,
+        "company_competitors": False,
+        "company_news": False,
+    }
+
+
+def test_chains_finished_past_the_deadline_are_not_cached():
+    """Test a chain whose scraping was cut short by the deadline is not cached."""
+    task = {"searches": [("techcorp", 3)]}
+    gathered_by_search = {"techcorp": {"scraped": [{"content": "Content"}]}}
+
+    assert chain_complete(task, gathered_by_search, Deadline(10))
+    assert not chain_complete(task, gathered_by_search, Deadline(0))
@@ -0,0 +1,123 @@
+import asyncio
+import pytest
+from unittest.mock import MagicMock, patch
+import sys
+import os
+
+# Add the app directory to sys.path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../../")))
+
+import httpx
+import utils.scrape_cache as scrape_cache
+from utils.sqlite_cache import SQLiteCache
+from utils.token_budget import CharacterEncoding
+from utils.web_scrape import async_fetch, fetch_with_requests, web_scraping_handle
+
+URL = "https://example.com"
+PAGE_HEADERS = {
+    "Content-Type": "text/html",
+    "ETag": '"v1"',
+    "Last-Modified": "Wed, 01 Jan 2025 00:00:00 GMT",
+}
+
+
+@pytest.fixture(autouse=True)
+def temp_cache(tmp_path):
+    """Use a fresh scrape cache for every test."""
+    cache = SQLiteCache(str(tmp_path / "cache.sqlite3"), "scrape")
+    with patch("utils.config.CACHE_ENABLED", True), patch.object(
+        scrape_cache, "_cache", cache
+    ), patch("utils.config.PARSE_PROCESSES", False):
+        yield cache
+
+
+def page_response(status_code=200, content=b"<p>Version 1</p>", headers=None):
+    response = MagicMock()
+    response.status_code = status_code
+    response.headers = PAGE_HEADERS if headers is None else headers
+    response.iter_content.return_value = iter([content])
+    return response
+
+
+def test_fresh_page_is_served_without_request():
+    """Test a fresh cached page does not hit the network."""
+    with patch("requests.Session.get", return_value=page_response()) as mock_get:
+        assert fetch_with_requests(URL) == "Version 1"
+        assert fetch_with_requests(URL) == "Version 1"
+
+    assert mock_get.call_count == 1
+
+
+@pytest.mark.parametrize(
+    "response, expected_content",
+    [
+        # Not modified, the cached text is reused
+        (page_response(304, b"", headers={}), "Version 1"),
+        # Modified, the new text replaces the cached one
+        (page_response(content=b"<p>Version 2</p>"), "Version 2"),
+    ],
+)
+def test_stale_page_is_revalidated(response, expected_content, temp_cache):
+    """Test a stale page is revalidated with a conditional GET."""
+    with patch("requests.Session.get", return_value=page_response()):
+        fetch_with_requests(URL)
+
+    with patch("requests.Session.get", return_value=response) as mock_get, patch(
+        "utils.config.SCRAPE_CACHE_FRESH_TTL", -1
+    ):
+        assert fetch_with_requests(URL) == expected_content
+
+    headers = mock_get.call_args.kwargs["headers"]
+    assert headers["If-None-Match"] == '"v1"'
+    assert headers["If-Modified-Since"] == "Wed, 01 Jan 2025 00:00:00 GMT"
+    # Revalidation makes the entry fresh again
+    assert scrape_cache.get_cached_page(URL)["fresh"]
+    assert scrape_cache.get_cached_page(URL)["content"] == expected_content
+
+
+def test_failed_fetches_are_not_cached():
+    """Test a failed fetch is retried on the next call."""
+    with patch("requests.Session.get", side_effect=ConnectionError) as mock_get:
+        assert fetch_with_requests(URL) == " "
+        assert fetch_with_requests(URL) == " "
+
+    assert mock_get.call_count == 2
+
+
+def test_async_fetch_revalidates_stale_page():
+    """Test async_fetch revalidates a stale page and reuses it on 304."""
+    requests_headers = []
+
+    def handler(request):
+        requests_headers.append(request.headers)
+        if "If-None-Match" in request.headers:
+            return httpx.Response(304)
+        return httpx.Response(200, headers=PAGE_HEADERS, content=b"<p>Version 1</p>")
+
+    async def run():
+        transport = httpx.MockTransport(handler)
+        async with httpx.AsyncClient(transport=transport) as client:
+            first = await async_fetch(URL, client)
+            with patch("utils.config.SCRAPE_CACHE_FRESH_TTL", -1):
+                second = await async_fetch(URL, client)
+            return first, second
+
+    assert asyncio.run(run()) == ("Version 1", "Version 1")
+    assert requests_headers[1]["If-None-Match"] == '"v1"'
+
+
+@patch("utils.llm_caller.summarize_large_content", return_value="Summary")
+def test_summaries_are_cached(mock_summarize):
+    """Test a page that did not change is not summarized again for the same query."""
+    result = {"link": URL}
+    with patch(
+        "utils.web_scrape.fetch_with_requests", return_value="x" * 400
+    ), patch(
+        "utils.token_budget.get_encoding", return_value=CharacterEncoding(1)
+    ), patch("utils.config.SUMMARY_STRATEGY", "llm"):
+        first = web_scraping_handle(result, "query", 100)
+        second = web_scraping_handle(result, "query", 100)
+        other_query = web_scraping_handle(result, "other query", 100)
+
+    assert first["content"] == second["content"] == other_query["content"] == "Summary"
+    assert mock_summarize.call_count == 2
@@ -0,0 +1,82 @@
+import pytest
+from unittest.mock import patch
+import sys
+import os
+
+# Add the app directory to sys.path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../../")))
+
+from utils.sqlite_cache import SQLiteCache
+
+
+@pytest.fixture
+def cache_path(tmp_path):
+    return str(tmp_path / "cache" / "test.sqlite3")
+
+
+def test_set_and_get(cache_path):
+    """Test values round trip through the cache as JSON."""
+    cache = SQLiteCache(cache_path, "test")
+    cache.set("key", {"content": "value", "items": [1, 2]})
+
+    assert cache.get("key") == {"content": "value", "items": [1, 2]}
+    assert cache.get("missing") is None
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+    assert cache.stats()["hit_rate"] == 0.5
+
+
+def test_ttl_expiry(cache_path):
+    """Test entries older than the TTL are treated as misses."""
+    cache = SQLiteCache(cache_path, "test")
+    with patch("utils.sqlite_cache.time.time", return_value=1000):
+        cache.set("key", "value")
+    with patch("utils.sqlite_cache.time.time", return_value=1100):
+        assert cache.get("key", ttl=200) == "value"
+        assert cache.get("key", ttl=50) is None
+
+
+def test_namespaces_are_isolated(cache_path):
+    """Test two namespaces sharing a database do not see each other's entries."""
+    SQLiteCache(cache_path, "first").set("key", "first value")
+    assert SQLiteCache(cache_path, "second").get("key") is None
+    assert SQLiteCache(cache_path, "first").get("key") == "first value"
+
+
+def test_lru_eviction_by_entries(cache_path):
+    """Test the least recently used entries are evicted beyond max_entries."""
+    cache = SQLiteCache(cache_path, "test", max_entries=2)
+    with patch("utils.sqlite_cache.time.time", side_effect=range(1, 100)):
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+
+        assert cache.get("a") == 1
+        assert cache.get("b") is None
+        assert cache.get("c") == 3
+
+
+def test_eviction_by_size(cache_path):
+    """Test the least recently used entries are evicted beyond max_bytes."""
+    cache = SQLiteCache(cache_path, "test", max_bytes=20)
+    with patch("utils.sqlite_cache.time.time", side_effect=range(1, 100)):
+        cache.set("a", "x" * 10)
+        cache.set("b", "y" * 10)
+
+        assert cache.get("a") is None
+        assert cache.get("b") == "y" * 10
+        assert cache.stats()["bytes"] <= 20
+
+
+def test_get_entry_and_touch(cache_path):
+    """Test entries are read whatever their age and touch makes them new again."""
+    cache = SQLiteCache(cache_path, "test")
+    with patch("utils.sqlite_cache.time.time", return_value=1000):
+        cache.set("key", "value")
+    with patch("utils.sqlite_cache.time.time", return_value=1500):
+        assert cache.get_entry("key") == {"value": "value", "age": 500}
+        cache.touch("key")
+    with patch("utils.sqlite_cache.time.time", return_value=1600):
+        assert cache.get_entry("key")["age"] == 100
+    assert cache.get_entry("missing") is None
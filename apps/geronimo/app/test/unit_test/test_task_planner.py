@@ -0,0 +1,112 @@
+import pytest
+from types import SimpleNamespace
+from unittest.mock import patch
+import sys
+import os
+
+# Add the app directory to sys.path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../../")))
+
+from utils.task_planner import build_chain_tasks, chain_signature, plan_batch
+import utils.constants as constants
+
+
+def make_lead(first_name, last_name, company, country="USA", job_title="Engineer"):
+    return SimpleNamespace(
+        first_name=first_name,
+        last_name=last_name,
+        job_title=job_title,
+        company=company,
+        country=country,
+    )
+
+
+def test_build_chain_tasks_covers_all_sections():
+    """Test a task is built for every chain key."""
+    tasks = build_chain_tasks(make_lead("John", "Doe", "TechCorp"))
+    assert list(tasks) == constants.CHAIN_KEYS
+    assert tasks[constants.PROFESSIONAL_SUMMARY]["query"] == "John Doe in TechCorp"
+
+
+def test_company_chains_shared_across_leads():
+    """Test company chains are planned once for leads of the same company."""
+    leads = [
+        make_lead("John", "Doe", "TechCorp"),
+        make_lead("Jane", "Smith", "techcorp ", job_title="CTO"),
+    ]
+    plan = plan_batch(leads)
+
+    # 2 x 2 person chains + 3 shared company chains
+    assert len(plan["chains"]) == 7
+    # Person chains of a lead share one query, run with the most results
+    assert len(plan["searches"]) == 5
+    assert plan["searches"]["john doe in techcorp"]["num_results"] == 8
+    # and split the token budget across the fewest results they use
+    assert plan["searches"]["john doe in techcorp"]["budget_results"] == 5
+    for section in (
+        constants.COMPANY_SUMMARY,
+        constants.COMPANY_COMPETITORS,
+        constants.COMPANY_NEWS,
+    ):
+        assert plan["leads"][0][section] == plan["leads"][1][section]
+    assert (
+        plan["leads"][0][constants.PROFESSIONAL_SUMMARY]
+        != plan["leads"][1][constants.PROFESSIONAL_SUMMARY]
+    )
+
+
+@pytest.mark.parametrize(
+    "section, other_lead, shared",
+    [
+        # Competitors prompt does not use the country
+        (constants.COMPANY_COMPETITORS, make_lead("A", "B", "TechCorp", "Canada"), True),
+        # Company summary prompt and query depend on the country
+        (constants.COMPANY_SUMMARY, make_lead("A", "B", "TechCorp", "Canada"), False),
+        # Duplicate lead rows share the person chains
+        (constants.PROFESSIONAL_SUMMARY, make_lead("John", "Doe", "TechCorp"), True),
+        # Same person with a different title renders a different prompt
+        (
+            constants.PROFESSIONAL_SUMMARY,
+            make_lead("John", "Doe", "TechCorp", job_title="CTO"),
+            False,
+        ),
+    ],
+)
+def test_chain_signature(section, other_lead, shared):
+    """Test chain signatures only depend on the inputs the chain uses."""
+    lead = make_lead("John", "Doe", "TechCorp")
+    signature = chain_signature(section, lead, build_chain_tasks(lead)[section])
+    other_signature = chain_signature(
+        section, other_lead, build_chain_tasks(other_lead)[section]
+    )
+    assert (signature == other_signature) is shared
+
+
+def test_combined_company_call():
+    """Test company sections are planned as one profile chain over all company searches."""
+    with patch("utils.config.COMBINED_COMPANY_CALL", True):
+        plan = plan_batch([make_lead("John", "Doe", "TechCorp")])
+
+    assert len(plan["chains"]) == 3
+    assert len(plan["searches"]) == 4
+    profile_signature = plan["leads"][0][constants.COMPANY_SUMMARY]
+    for section in constants.COMPANY_SECTIONS:
+        assert plan["leads"][0][section] == profile_signature
+    profile = plan["chains"][profile_signature]
+    assert profile["json_keys"] == constants.COMPANY_SECTIONS
+    assert [search_key for search_key, _ in profile["searches"]] == [
+        "techcorp in usa overview",
+        "techcorp competitors",
+        "techcorp company in usa recent news",
+    ]
+
+
+def test_searches_carry_relevance_terms():
+    """Test each planned search carries the terms its results are scored against."""
+    plan = plan_batch([make_lead("John", "Doe", "TechCorp")])
+
+    assert plan["searches"]["john doe in techcorp"]["terms"] == [
+        ("John Doe", 2),
+        ("TechCorp", 1),
+    ]
+    assert plan["searches"]["techcorp competitors"]["terms"] == [("TechCorp", 1)]
@@ -0,0 +1,45 @@
+import pytest
+import sys
+import os
+
+# Add the app directory to sys.path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../../")))
+
+from utils.text_extractor import extract_text
+
+
+@pytest.mark.parametrize(
+    "markup, expected_output",
+    [
+        # Nested scrapable tags emit their text once
+        (
+            "<div><div><p>Paragraph</p><ul><li>Item</li></ul></div></div>",
+            "Paragraph\nItem",
+        ),
+        # Text around a nested tag stays in document order
+        ("<div>Before<p>Inside</p>After</div>", "Before\nInside\nAfter"),
+        # Inline tags are part of the enclosing block
+        ("<p>Hello <b>bold</b>\n   world</p>", "Hello bold world"),
+        # Scripts, styles and comments are dropped
+        (
+            "<div><script>var a;</script><style>p {}</style><!-- note --><p>Text</p></div>",
+            "Text",
+        ),
+        # Text outside scrapable tags is dropped
+        ("<body><span>Ignored</span><h2>Kept</h2></body>", "Kept"),
+        # Empty markup
+        ("", "none"),
+        ("<html><body></body></html>", "none"),
+    ],
+)
+def test_extract_text(markup, expected_output):
+    """Test every text node is extracted once, in document order."""
+    assert extract_text(markup) == expected_output
+
+
+def test_extract_text_detects_declared_charset():
+    """Test raw bytes are decoded with the charset declared in the document."""
+    markup = (
+        '<html><head><meta charset="iso-8859-1"></head><body><p>Café</p></body></html>'
+    ).encode("iso-8859-1")
+    assert extract_text(markup) == "Café"
@@ -0,0 +1,70 @@
+import pytest
+from unittest.mock import patch
+import sys
+import os
+
+# Add the app directory to sys.path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../../")))
+
+from utils.token_budget import (
+    CharacterEncoding,
+    count_tokens,
+    position_shares,
+    split_into_token_chunks,
+    truncate_to_tokens,
+)
+
+
+@pytest.fixture(autouse=True)
+def character_tokens():
+    """Count one token per character."""
+    with patch("utils.token_budget.get_encoding", return_value=CharacterEncoding(1)):
+        yield
+
+
+def test_count_and_truncate():
+    """Test tokens are counted and texts truncated on token boundaries."""
+    assert count_tokens("") == 0
+    assert count_tokens("abcdef") == 6
+    assert truncate_to_tokens("abcdef", 4) == "abcd"
+    assert truncate_to_tokens("abc", 4) == "abc"
+
+
+@pytest.mark.parametrize(
+    "text, expected_chunks",
+    [
+        ("abcdefghij", ["abcd", "cdef", "efgh", "ghij"]),
+        # The last chunk is not only overlap with the previous one
+        ("abcdefghi", ["abcd", "cdef", "efgh", "ghi"]),
+        ("abc", ["abc"]),
+        ("", []),
+    ],
+)
+def test_split_into_token_chunks(text, expected_chunks):
+    """Test texts are split into overlapping token chunks."""
+    assert split_into_token_chunks(text, 4, 2) == expected_chunks
+
+
+def test_position_shares():
+    """Test the budget is split by search position, favouring the top results."""
+    shares = position_shares(1100, 3)
+
+    assert shares == sorted(shares, reverse=True)
+    assert sum(shares) <= 1100
+    assert shares[0] == 2 * shares[1]
+    assert position_shares(1000, 0) == []
+
+
+def test_position_shares_of_shared_search():
+    """Test the chains taking the top results of a shared search get their full budget."""
+    shares = position_shares(24000, 8, budget_results=5)
+
+    assert shares[:5] == position_shares(24000, 5)
+    assert shares[5] < shares[4]
+
+
+def test_approximate_encoding():
+    """Test the fallback encoding counts a token every 4 characters."""
+    encoding = CharacterEncoding()
+    assert len(encoding.encode("a" * 9)) == 3
+    assert encoding.decode(encoding.encode("abcdefghi")) == "abcdefghi"
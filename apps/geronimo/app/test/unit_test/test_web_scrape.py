@@ -1,4 +1,6 @@
 import pytest
+import asyncio
+import httpx
 from unittest import mock
 from unittest.mock import MagicMock, patch
 import requests
@@ -6,12 +8,24 @@ from concurrent.futures import ThreadPoolExecutor
 import concurrent.futures
 import sys
 import os
+import socket
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, HTTPServer
 from bs4 import BeautifulSoup
+from urllib3.connection import HTTPConnection
+from urllib3.exceptions import NewConnectionError
 
 # Add the app directory to sys.path
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../../")))
 
+import utils.http_client as http_client
+
+socket_getaddrinfo = socket.getaddrinfo
+from utils.token_budget import CharacterEncoding
 from utils.web_scrape import (
+    async_fetch,
+    async_parallel_scrape_caller,
     parallel_scrape_caller,
     web_scraping_handle,
     fetch_with_requests,
@@ -19,6 +33,20 @@ from utils.web_scrape import (
 
 
 # Common fixtures
+@pytest.fixture(autouse=True)
+def disable_cache():
+    """Keep the persistent caches out of the scraping tests."""
+    with patch("utils.config.CACHE_ENABLED", False):
+        yield
+
+
+@pytest.fixture(autouse=True)
+def parse_in_thread():
+    """Parse pages in the test thread instead of spawning parsing processes."""
+    with patch("utils.config.PARSE_PROCESSES", False):
+        yield
+
+
 @pytest.fixture
 def mock_fetch_with_requests():
     with mock.patch("utils.web_scrape.fetch_with_requests") as mock_fetch:
@@ -196,7 +224,7 @@ class TestParallelScraping:
 
         # Mock ThreadPoolExecutor
         mock_executor = MagicMock()
-        mock_thread_pool_executor.return_value.__enter__.return_value = mock_executor
+        mock_thread_pool_executor.return_value = mock_executor
         mock_executor.submit.side_effect = [mock_future1, mock_future2]
 
         with mock.patch("concurrent.futures.wait") as mock_wait:
@@ -233,7 +261,7 @@ class TestParallelScraping:
         }
 
         mock_executor = MagicMock()
-        mock_thread_pool_executor.return_value.__enter__.return_value = mock_executor
+        mock_thread_pool_executor.return_value = mock_executor
         mock_executor.submit.return_value = mock_future
 
         with mock.patch("concurrent.futures.wait") as mock_wait:
@@ -250,7 +278,7 @@ class TestParallelScraping:
         mock_future.result.side_effect = ConnectionError("Failed to connect")
 
         mock_executor = MagicMock()
-        mock_thread_pool_executor.return_value.__enter__.return_value = mock_executor
+        mock_thread_pool_executor.return_value = mock_executor
         mock_executor.submit.return_value = mock_future
 
         with mock.patch("concurrent.futures.wait") as mock_wait:
@@ -279,7 +307,7 @@ class TestParallelScraping:
         mock_future.result.side_effect = requests.exceptions.Timeout()
 
         mock_executor = MagicMock()
-        mock_thread_pool_executor.return_value.__enter__.return_value = mock_executor
+        mock_thread_pool_executor.return_value = mock_executor
         mock_executor.submit.return_value = mock_future
 
         with mock.patch("concurrent.futures.wait") as mock_wait:
@@ -287,6 +315,108 @@ class TestParallelScraping:
             result = parallel_scrape_caller(search_results, "test query", 2)
             assert len(result) == 0
             assert mock_executor.submit.called
+            mock_executor.shutdown.assert_called_once_with(
+                wait=False, cancel_futures=True
+            )
+
+    def test_parallel_scrape_caller_does_not_wait_for_slow_pages(
+        self, search_results_fixture
+    ):
+        """Test results are returned at the timeout without waiting for slow pages"""
+
+        def fake_handle(result, query, max_tokens, deadline, deduplicator, position):
+            if result["link"].endswith("page2"):
+                time.sleep(1)
+            return {**result, "content": "Some content"}
+
+        start_time = time.monotonic()
+        with mock.patch(
+            "utils.web_scrape.web_scraping_handle", side_effect=fake_handle
+        ), patch("utils.config.SCRAPE_TIMEOUT", 0.2):
+            result = parallel_scrape_caller(search_results_fixture, "test query", 2)
+
+        assert time.monotonic() - start_time < 1
+        assert [item["link"] for item in result] == ["https://example.com/page1"]
+
+
+QUORUM_RESULTS = [
+    {"link": f"https://example.com/page{position}", "title": f"Example {position}"}
+    for position in range(4)
+]
+
+
+@pytest.fixture
+def quorum():
+    with patch("utils.config.SCRAPE_QUORUM", True), patch(
+        "utils.config.SCRAPE_QUORUM_RESULTS", 2
+    ), patch("utils.config.SCRAPE_QUORUM_TOKENS", 1000), patch(
+        "utils.config.SCRAPE_QUORUM_TIMEOUT", 0.2
+    ), patch(
+        "utils.token_budget.get_encoding", return_value=CharacterEncoding(1)
+    ):
+        yield
+
+
+class TestQuorumScraping:
+    """Tests for quorum scraping"""
+
+    @pytest.mark.parametrize(
+        "slow_positions, content_size, required_positions, waited",
+        [
+            # The top 2 results are in, the slow third one is dropped
+            ({2}, 10, [0, 1], False),
+            # The top result is slow but two others have enough content
+            ({0}, 500, [], False),
+            # Not enough content without the top result, wait for the soft timeout
+            ({0}, 10, [1, 2, 3], True),
+        ],
+    )
+    def test_parallel_scrape_caller_quorum(
+        self, quorum, slow_positions, content_size, required_positions, waited
+    ):
+        """Test results are returned once the quorum is reached"""
+
+        def fake_handle(result, query, max_tokens, deadline, deduplicator, position):
+            if int(result["link"][-1]) in slow_positions:
+                time.sleep(1)
+            return {**result, "content": "x" * content_size}
+
+        start_time = time.monotonic()
+        with mock.patch(
+            "utils.web_scrape.web_scraping_handle", side_effect=fake_handle
+        ):
+            result = parallel_scrape_caller(QUORUM_RESULTS, "test query", 4)
+        elapsed = time.monotonic() - start_time
+
+        links = [item["link"] for item in result]
+        assert len(links) >= 2
+        assert all(QUORUM_RESULTS[i]["link"] in links for i in required_positions)
+        assert not any(QUORUM_RESULTS[i]["link"] in links for i in slow_positions)
+        assert (elapsed >= 0.2) is waited
+        assert elapsed < 0.5
+
+    def test_async_parallel_scrape_caller_quorum(self, quorum):
+        """Test async scraping returns once the top results are in"""
+
+        async def fake_handle(
+            result, query, client, max_tokens, deadline, deduplicator, position
+        ):
+            if result["link"].endswith("page1"):
+                await asyncio.sleep(1)
+            return {**result, "content": "Some content"}
+
+        start_time = time.monotonic()
+        with mock.patch(
+            "utils.web_scrape.async_web_scraping_handle", side_effect=fake_handle
+        ):
+            result = asyncio.run(
+                async_parallel_scrape_caller(QUORUM_RESULTS, "test query", 4, None)
+            )
+
+        assert time.monotonic() - start_time < 0.5
+        assert [item["link"] for item in result] == [
+            QUORUM_RESULTS[i]["link"] for i in (0, 2, 3)
+        ]
 
 
 class TestWebScraping:
@@ -306,10 +436,49 @@ class TestWebScraping:
         assert output["title"] == "Example 1"
         assert output["link"] == "https://example.com/page1"
         assert output["snippet"] == "Snippet 1"
+        mock_llm_caller.assert_not_called()
+
+    @pytest.mark.parametrize(
+        "content, max_tokens, scrape_max_tokens, expected_output, summarized",
+        [
+            # Within its share, the page is kept as is
+            ("x" * 400, 100, 1000, "x" * 400, False),
+            # Over its share, the page is summarized to fit it
+            ("x" * 404, 100, 1000, "Summary", True),
+            # Over the scrape limit, the page is dropped
+            ("x" * 404, 200, 100, "", False),
+        ],
+    )
+    def test_web_scraping_handle_token_share(
+        self,
+        mock_llm_caller,
+        mock_fetch_with_requests,
+        content,
+        max_tokens,
+        scrape_max_tokens,
+        expected_output,
+        summarized,
+    ):
+        """Test only pages that overflow their token share are summarized"""
+        mock_fetch_with_requests.return_value = content
+        mock_llm_caller.return_value = "Summary"
+        result = {"link": "https://example.com/page1"}
+
+        with patch(
+            "utils.token_budget.get_encoding", return_value=CharacterEncoding(4)
+        ), patch("utils.config.SCRAPE_MAX_TOKENS", scrape_max_tokens), patch(
+            "utils.config.SUMMARY_STRATEGY", "llm"
+        ):
+            output = web_scraping_handle(result, "test query", max_tokens)
+
+        assert output["content"] == expected_output
+        assert mock_llm_caller.called is summarized
+        if summarized:
+            assert mock_llm_caller.call_args.kwargs["max_tokens"] == max_tokens
 
     def test_fetch_with_requests_invalid_url(self):
         """Test handling of invalid URLs"""
-        with mock.patch("requests.get") as mock_get:
+        with mock.patch("requests.Session.get") as mock_get:
             mock_get.side_effect = requests.exceptions.RequestException
             result = fetch_with_requests("https://invalid-url.com")
             assert result == " "
@@ -327,16 +496,278 @@ class TestWebScraping:
         exception_scenario,
     ):
         """Test fetch_with_requests function with different content types and scenarios"""
-        with patch("requests.get") as mock_get:
+        with patch("requests.Session.get") as mock_get:
             if exception_scenario:
                 mock_get.side_effect = exception_scenario
             else:
                 mock_response = MagicMock()
                 mock_response.status_code = mock_status
                 mock_response.headers = mock_headers
-                mock_response.text = mock_text
+                mock_response.iter_content.return_value = iter([mock_text.encode()])
                 mock_response.raise_for_status = MagicMock()
                 mock_get.return_value = mock_response
 
             result = fetch_with_requests("https://example.com")
             assert result == expected_output
+
+    @pytest.mark.parametrize(
+        "headers, chunks",
+        [
+            # Declared size over the budget, the body is never read
+            ({"Content-Type": "text/html", "Content-Length": "1000"}, []),
+            # No declared size, the download stops once the budget is hit
+            ({"Content-Type": "text/html"}, [b"<p>" + b"x" * 60 + b"</p>"] * 10),
+        ],
+    )
+    def test_fetch_with_requests_byte_budget(self, headers, chunks):
+        """Test pages over the byte budget are skipped without reading the whole body"""
+        mock_response = MagicMock()
+        mock_response.headers = headers
+        chunk_iterator = iter(chunks)
+        mock_response.iter_content.return_value = chunk_iterator
+
+        with patch("requests.Session.get", return_value=mock_response), patch(
+            "utils.config.SCRAPE_MAX_BYTES", 100
+        ):
+            assert fetch_with_requests("https://example.com") == ""
+
+        assert len(list(chunk_iterator)) == max(len(chunks) - 2, 0)
+        mock_response.close.assert_called_once()
+
+    def test_fetch_with_requests_decodes_declared_charset(self):
+        """Test the body is decoded with the charset of the Content-Type header"""
+        mock_response = MagicMock()
+        mock_response.headers = {"Content-Type": "text/html; charset=iso-8859-1"}
+        mock_response.iter_content.return_value = iter(
+            ["<p>Café</p>".encode("iso-8859-1")]
+        )
+
+        with patch("requests.Session.get", return_value=mock_response):
+            assert fetch_with_requests("https://example.com") == "Café"
+
+
+    def test_fetch_with_requests_page_timeout(self):
+        """Test a page still downloading at its page timeout is dropped"""
+
+        def slow_chunks():
+            for _ in range(10):
+                time.sleep(0.05)
+                yield b"<p>Content</p>"
+
+        mock_response = MagicMock()
+        mock_response.headers = {"Content-Type": "text/html"}
+        mock_response.iter_content.return_value = slow_chunks()
+
+        with patch(
+            "requests.Session.get", return_value=mock_response
+        ) as mock_get, patch("utils.config.SCRAPE_PAGE_TIMEOUT", 0.1):
+            assert fetch_with_requests("https://example.com") == " "
+
+        connect_timeout, read_timeout = mock_get.call_args.kwargs["timeout"]
+        assert connect_timeout <= 0.1 and read_timeout <= 0.1
+        mock_response.close.assert_called_once()
+
+
+class TestAsyncScraping:
+    """Tests for the async scraping pipeline"""
+
+    @pytest.mark.parametrize(
+        "mock_status, mock_headers, mock_text, expected_output, exception_scenario",
+        FETCH_WITH_REQUESTS_TEST_CASES,
+    )
+    def test_async_fetch(
+        self,
+        mock_status,
+        mock_headers,
+        mock_text,
+        expected_output,
+        exception_scenario,
+    ):
+        """Test async_fetch gives the same output as fetch_with_requests"""
+
+        def handler(request):
+            if exception_scenario:
+                raise httpx.ConnectError("Failed to connect")
+            return httpx.Response(
+                mock_status, headers=mock_headers, content=mock_text.encode()
+            )
+
+        async def run():
+            transport = httpx.MockTransport(handler)
+            async with httpx.AsyncClient(transport=transport) as client:
+                return await async_fetch("https://example.com", client)
+
+        assert asyncio.run(run()) == expected_output
+
+    def test_async_fetch_byte_budget(self):
+        """Test async_fetch skips pages over the byte budget"""
+
+        def handler(request):
+            return httpx.Response(
+                200, headers={"Content-Type": "text/html"}, content=b"<p>" + b"x" * 500
+            )
+
+        async def run():
+            transport = httpx.MockTransport(handler)
+            async with httpx.AsyncClient(transport=transport) as client:
+                return await async_fetch("https://example.com", client)
+
+        with patch("utils.config.SCRAPE_MAX_BYTES", 100):
+            assert asyncio.run(run()) == ""
+
+    def test_async_fetch_page_timeout(self):
+        """Test async_fetch cancels a page still downloading at its page timeout"""
+
+        async def handler(request):
+            await asyncio.sleep(1)
+            return httpx.Response(200, headers={"Content-Type": "text/html"})
+
+        async def run():
+            transport = httpx.MockTransport(handler)
+            async with httpx.AsyncClient(transport=transport) as client:
+                return await async_fetch("https://example.com", client)
+
+        start_time = time.monotonic()
+        with patch("utils.config.SCRAPE_PAGE_TIMEOUT", 0.1):
+            assert asyncio.run(run()) == " "
+        assert time.monotonic() - start_time < 1
+
+    def test_async_parallel_scrape_caller(self, search_results_fixture):
+        """Test async scraping returns the scraped items and skips failures"""
+
+        async def fake_handle(
+            result, query, client, max_tokens, deadline, deduplicator, position
+        ):
+            if result["link"].endswith("page2"):
+                raise ConnectionError("Failed to connect")
+            return {**result, "content": "Some content"}
+
+        with mock.patch(
+            "utils.web_scrape.async_web_scraping_handle", side_effect=fake_handle
+        ):
+            result = asyncio.run(
+                async_parallel_scrape_caller(
+                    search_results_fixture, "test query", 2, client=None
+                )
+            )
+
+        assert len(result) == 1
+        assert result[0]["title"] == "Example 1"
+        assert result[0]["content"] == "Some content"
+
+    def test_async_parallel_scrape_caller_empty_results(self):
+        """Test async scraping of empty search results"""
+        assert asyncio.run(async_parallel_scrape_caller([], "q", 2, client=None)) == []
+
+
+class PageHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header("Content-Length", "2")
+        self.end_headers()
+        self.wfile.write(b"ok")
+
+    def log_message(self, *args):
+        pass
+
+
+class TestHttpClient:
+    """Tests for the pooled scraping session"""
+
+    def test_session_is_shared_and_retries(self):
+        """Test the scraping session is reused and has the retry policy mounted"""
+        session = http_client.get_session()
+        assert http_client.get_session() is session
+
+        adapter = session.get_adapter("https://example.com")
+        assert adapter.max_retries.total == 3
+        assert 503 in adapter.max_retries.status_forcelist
+
+    def test_fetch_uses_pooled_session(self):
+        """Test fetch_with_requests goes through the pooled session"""
+        with patch.object(http_client.get_session(), "get") as mock_get:
+            mock_get.side_effect = requests.exceptions.ConnectionError
+            assert fetch_with_requests("https://example.com") == " "
+            mock_get.assert_called_once()
+
+    def test_pool_stats(self):
+        """Test the pool statistics report the totals"""
+        stats = http_client.get_pool_stats()
+        assert set(stats["totals"]) == {"hosts", "connections", "requests", "reuse_rate"}
+
+    def test_dns_cache(self):
+        """Test DNS lookups are served from the cache within the TTL"""
+        now = [0.0]
+        cache = http_client.DNSCache(ttl=300, max_entries=2, clock=lambda: now[0])
+        address = [(socket.AF_INET, socket.SOCK_STREAM, 6, "", ("10.0.0.1", 443))]
+
+        with patch("socket.getaddrinfo", return_value=address) as mock_getaddrinfo:
+            assert cache.resolve("example.com", 443) == ["10.0.0.1"]
+            assert cache.resolve("example.com", 443) == ["10.0.0.1"]
+            assert mock_getaddrinfo.call_count == 1
+
+            now[0] = 301
+            cache.resolve("example.com", 443)
+            assert mock_getaddrinfo.call_count == 2
+
+    def test_dns_cache_is_bounded(self):
+        """Test a full DNS cache drops expired entries, then the oldest ones"""
+        now = [0.0]
+        cache = http_client.DNSCache(ttl=300, max_entries=2, clock=lambda: now[0])
+        address = [(socket.AF_INET, socket.SOCK_STREAM, 6, "", ("10.0.0.1", 443))]
+
+        with patch("socket.getaddrinfo", return_value=address):
+            cache.resolve("expired.com", 443)
+            now[0] = 200
+            cache.resolve("a.com", 443)
+            now[0] = 400
+            cache.resolve("b.com", 443)
+            assert set(cache._entries) == {("a.com", 443), ("b.com", 443)}
+
+            cache.resolve("a.com", 443)
+            cache.resolve("c.com", 443)
+            assert set(cache._entries) == {("a.com", 443), ("c.com", 443)}
+
+    @pytest.mark.parametrize("connects", [True, False])
+    def test_cached_addresses_are_tried_in_turn(self, connects):
+        """Test a connection falls back to the next cached address when one fails"""
+        connection = http_client.CachedDNSHTTPConnection("example.com", 80)
+        tried = []
+
+        def new_conn():
+            tried.append(connection._dns_host)
+            if connection._dns_host == "2001:db8::1" or not connects:
+                raise NewConnectionError(connection, "Network is unreachable")
+            return "socket"
+
+        with patch.object(
+            http_client.DNS_CACHE, "resolve", return_value=["2001:db8::1", "10.0.0.1"]
+        ), patch.object(HTTPConnection, "_new_conn", side_effect=new_conn):
+            if connects:
+                assert connection._new_conn() == "socket"
+            else:
+                with pytest.raises(NewConnectionError):
+                    connection._new_conn()
+
+        assert tried == ["2001:db8::1", "10.0.0.1"]
+        assert connection._dns_host == "example.com"
+
+    def test_dns_cache_is_scoped_to_scraping_session(self):
+        """Test only the scraping session resolves hosts through the DNS cache"""
+        server = HTTPServer(("127.0.0.1", 0), PageHandler)
+        threading.Thread(target=server.handle_request, daemon=True).start()
+        session = requests.Session()
+        session.mount("http://", http_client.CachedDNSAdapter())
+
+        try:
+            with patch.object(
+                http_client, "DNS_CACHE", http_client.DNSCache(300, 10)
+            ) as cache:
+                response = session.get(
+                    f"http://localhost:{server.server_port}/", timeout=5
+                )
+                assert response.text == "ok"
+                assert len(cache) == 1
+        finally:
+            server.server_close()
+        assert socket.getaddrinfo is socket_getaddrinfo
@@ -1,4 +1,7 @@
 import pytest
+import asyncio
+import queue
+import httpx
 from unittest.mock import patch
 import sys
 import os
@@ -6,7 +9,28 @@ import os
 # Add the app directory to sys.path
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../../")))
 
-from utils.web_search import google_search
+import utils.web_search as web_search
+from utils.web_search import async_google_search, google_search
+from utils.sqlite_cache import SQLiteCache
+
+
+@pytest.fixture(autouse=True)
+def isolated_search_state():
+    """Start every test with no pooled clients and caching disabled."""
+    with patch.object(web_search, "_search_clients", queue.SimpleQueue()), patch(
+        "utils.config.CACHE_ENABLED", False
+    ):
+        yield
+
+
+@pytest.fixture
+def search_cache(tmp_path):
+    """Enable the search cache on a temporary database."""
+    cache = SQLiteCache(str(tmp_path / "cache.sqlite3"), "search")
+    with patch.object(web_search, "_search_cache", cache), patch(
+        "utils.config.CACHE_ENABLED", True
+    ):
+        yield cache
 
 
 @pytest.mark.parametrize(
@@ -46,3 +70,93 @@ def test_google_search_api_failure():
 
         with pytest.raises(Exception, match="API Error"):
             google_search("Test Query", 5)
+
+
+def test_async_google_search():
+    """Test async_google_search maps Custom Search items to search results."""
+
+    def handler(request):
+        assert request.url.params["q"] == "Python testing"
+        assert request.url.params["num"] == "2"
+        return httpx.Response(
+            200,
+            json={
+                "items": [
+                    {
+                        "title": "Python Testing Guide",
+                        "link": "https://example.com",
+                        "snippet": "Guide",
+                        "kind": "customsearch#result",
+                    },
+                    {"title": "No Snippet", "link": "https://example.org"},
+                ]
+            },
+        )
+
+    async def run():
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            return await async_google_search("Python testing", 2, client)
+
+    results = asyncio.run(run())
+    assert results == [
+        {"title": "Python Testing Guide", "link": "https://example.com", "snippet": "Guide"},
+        {"title": "No Snippet", "link": "https://example.org"},
+    ]
+
+
+def test_async_google_search_no_results():
+    """Test async_google_search raises when no results are found."""
+
+    async def run():
+        transport = httpx.MockTransport(lambda request: httpx.Response(200, json={}))
+        async with httpx.AsyncClient(transport=transport) as client:
+            return await async_google_search("Nothing", 5, client)
+
+    with pytest.raises(Exception, match="No search results found"):
+        asyncio.run(run())
+
+
+def test_google_search_cache_hit(search_cache):
+    """Test repeated searches are served from the cache."""
+    mock_response = [{"title": "Python Testing Guide", "link": "https://example.com"}]
+    with patch("utils.web_search.GoogleSearchAPIWrapper") as MockSearchAPI:
+        MockSearchAPI.return_value.results.return_value = mock_response
+
+        assert google_search("Python testing", 5) == mock_response
+        assert google_search("  python   TESTING ", 5) == mock_response
+        # A different number of results is a different search
+        assert google_search("Python testing", 3) == mock_response
+
+        assert MockSearchAPI.return_value.results.call_count == 2
+        # The client is reused between calls
+        assert MockSearchAPI.call_count == 1
+
+    assert search_cache.stats()["hits"] == 1
+    assert search_cache.stats()["misses"] == 2
+
+
+def test_google_search_no_results_not_cached(search_cache):
+    """Test the "no results" placeholder of the API wrapper is not cached."""
+    no_results = [{"Result": "No good Google Search Result was found"}]
+    with patch("utils.web_search.GoogleSearchAPIWrapper") as MockSearchAPI:
+        MockSearchAPI.return_value.results.return_value = no_results
+
+        google_search("Unknown query", 5)
+        google_search("Unknown query", 5)
+
+        assert MockSearchAPI.return_value.results.call_count == 2
+
+
+def test_async_google_search_uses_cache(search_cache):
+    """Test async searches share the search cache."""
+    cached_results = [{"title": "Cached", "link": "https://example.com"}]
+    search_cache.set(web_search.search_cache_key("Python testing", 2), cached_results)
+
+    def handler(request):
+        raise AssertionError("The search API should not be called")
+
+    async def run():
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            return await async_google_search("Python testing", 2, client)
+
+    assert asyncio.run(run()) == cached_results
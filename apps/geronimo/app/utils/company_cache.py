@@ -0,0 +1,154 @@
+import threading
+import utils.config as config
+import utils.constants as constants
+from utils.sqlite_cache import SQLiteCache
+from utils.task_planner import normalize_text
+
+# Time to live of each company level section, in seconds
+COMPANY_SECTION_TTLS = {
+    constants.COMPANY_SUMMARY: config.COMPANY_SUMMARY_TTL,
+    constants.COMPANY_COMPETITORS: config.COMPANY_COMPETITORS_TTL,
+    constants.COMPANY_NEWS: config.COMPANY_NEWS_TTL,
+}
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_company_cache():
+    """Get the shared company cache, creating it on first use."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = SQLiteCache(
+                config.CACHE_PATH,
+                namespace="company",
+                max_entries=config.COMPANY_CACHE_MAX_ENTRIES,
+            )
+        return _cache
+
+
+def company_cache_key(section, lead_info):
+    """Build the cache key of a company section from the normalized company and country."""
+    return (
+        f"{section}|{normalize_text(lead_info.company)}|"
+        f"{normalize_text(lead_info.country)}"
+    )
+
+
+def get_cached_section(section, lead_info):
+    """
+    Get a cached company section of a lead.
+
+    Returns:
+        str: The cached chain result, or None if the section is not a company
+            section, is not cached or has expired.
+    """
+    if not config.CACHE_ENABLED or section not in COMPANY_SECTION_TTLS:
+        return None
+
+    return get_company_cache().get(
+        company_cache_key(section, lead_info), ttl=COMPANY_SECTION_TTLS[section]
+    )
+
+
+def store_section(section, lead_info, result):
+    """
+    Cache the chain result of a company section. Failed chains are not cached.
+    """
+    if not config.CACHE_ENABLED or section not in COMPANY_SECTION_TTLS:
+        return
+    if not result or result == constants.CHAIN_FAILED_MESSAGE:
+        return
+
+    get_company_cache().set(company_cache_key(section, lead_info), result)
+
+
+def get_cached_chain(task):
+    """
+    Get the cached result of a planned chain.
+
+    Returns:
+        The cached result, a dict of the cached sections for a company profile
+            chain, or None unless every section of the chain is cached.
+    """
+    if "sections" not in task:
+        return get_cached_section(task["section"], task["lead_info"])
+
+    sections = {
+        section: get_cached_section(section, task["lead_info"])
+        for section in task["sections"]
+    }
+    if any(result is None for result in sections.values()):
+        return None
+    return sections
+
+
+def store_chain(task, result, complete=True):
+    """
+    Cache the result of a planned chain. A company profile chain result is cached
+    section by section, so it is shared with chains planned without it.
+
+    Args:
+        task (dict): The planned chain.
+        result: The chain result.
+        complete (bool): Whether the chain ran on the full results of its
+            searches. Results built from failed or empty searches, or from a
+            scrape cut short by the deadline, are not cached, so later leads of
+            the company do not get the degraded section.
+    """
+    if not complete:
+        return
+    if isinstance(result, dict) and "sections" in task:
+        for section in task["sections"]:
+            store_section(section, task["lead_info"], result.get(section))
+    else:
+        store_section(task["section"], task["lead_info"], result)
+
+
+def pop_cached_chains(plan):
+    """
+    Take the company chains that can be served from the cache out of a plan.
+
+    The searches that are no longer needed by any remaining chain are removed from
+    the plan as well, and the remaining searches only fetch as many results as the
+    remaining chains need and split the token budget across the fewest results
+    they use.
+
+    Args:
+        plan (dict): The plan built by `task_planner.plan_batch`.
+
+    Returns:
+        dict: Chain signatures mapped to their cached results.
+    """
+    cached = {}
+    for signature, task in list(plan["chains"].items()):
+        result = get_cached_chain(task)
+        if result is not None:
+            cached[signature] = result
+            del plan["chains"][signature]
+
+    if cached:
+        num_results = {}
+        budget_results = {}
+        for task in plan["chains"].values():
+            for search_key, search_num_results in task["searches"]:
+                num_results[search_key] = max(
+                    num_results.get(search_key, 0), search_num_results
+                )
+                budget_results[search_key] = min(
+                    budget_results.get(search_key, search_num_results),
+                    search_num_results,
+                )
+        for search_key in list(plan["searches"]):
+            if search_key in num_results:
+                plan["searches"][search_key]["num_results"] = num_results[search_key]
+                plan["searches"][search_key]["budget_results"] = budget_results[
+                    search_key
+                ]
+            else:
+                del plan["searches"][search_key]
+
+        constants.LOGGER.info(f"Served {len(cached)} company chains from the cache")
+
+    return cached
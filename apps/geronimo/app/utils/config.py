@@ -26,6 +26,104 @@ TEST_MAIL_ADDRESS = os.getenv("TEST_MAIL_ADDRESS")
 # logger level
 LOGGING_LEVEL = os.getenv("LOGGING_LEVEL", "INFO").upper()
 
+# background job configurations
+JOB_MAX_WORKERS = int(os.getenv("JOB_MAX_WORKERS", "4"))
+JOB_MAX_PENDING = int(os.getenv("JOB_MAX_PENDING", "500"))
+JOB_RESULT_TTL = int(os.getenv("JOB_RESULT_TTL", "3600"))
+
+# batch report configurations
+BATCH_MAX_LEADS = int(os.getenv("BATCH_MAX_LEADS", "500"))
+BATCH_MAX_WORKERS = int(os.getenv("BATCH_MAX_WORKERS", "8"))
+
+# async pipeline configurations
+ASYNC_PIPELINE = os.getenv("ASYNC_PIPELINE", "false").lower() == "true"
+ASYNC_SEARCH_CONCURRENCY = int(os.getenv("ASYNC_SEARCH_CONCURRENCY", "16"))
+ASYNC_SCRAPE_CONCURRENCY = int(os.getenv("ASYNC_SCRAPE_CONCURRENCY", "64"))
+ASYNC_LLM_CONCURRENCY = int(os.getenv("ASYNC_LLM_CONCURRENCY", "16"))
+
+# company profile configurations
+COMBINED_COMPANY_CALL = os.getenv("COMBINED_COMPANY_CALL", "false").lower() == "true"
+
+# report latency configurations
+REPORT_DEADLINE = float(os.getenv("REPORT_DEADLINE", "120"))
+
+# scraping HTTP client configurations
+HTTP_POOL_HOSTS = int(os.getenv("HTTP_POOL_HOSTS", "100"))
+HTTP_POOL_SIZE_PER_HOST = int(os.getenv("HTTP_POOL_SIZE_PER_HOST", "10"))
+DNS_CACHE_TTL = int(os.getenv("DNS_CACHE_TTL", "300"))
+DNS_CACHE_MAX_ENTRIES = int(os.getenv("DNS_CACHE_MAX_ENTRIES", "1000"))
+SCRAPE_MAX_BYTES = int(os.getenv("SCRAPE_MAX_BYTES", "5000000"))
+SCRAPE_CHUNK_SIZE = int(os.getenv("SCRAPE_CHUNK_SIZE", "65536"))
+SCRAPE_TIMEOUT = float(os.getenv("SCRAPE_TIMEOUT", "60"))
+SCRAPE_PAGE_TIMEOUT = float(os.getenv("SCRAPE_PAGE_TIMEOUT", "15"))
+SCRAPE_CONNECT_TIMEOUT = float(os.getenv("SCRAPE_CONNECT_TIMEOUT", "5"))
+
+# HTML parsing configurations
+PARSE_PROCESSES = os.getenv("PARSE_PROCESSES", "true").lower() == "true"
+PARSE_WORKERS = int(os.getenv("PARSE_WORKERS", str(os.cpu_count() or 1)))
+
+# search result relevance configurations
+RELEVANCE_MIN_SCORE = float(os.getenv("RELEVANCE_MIN_SCORE", "60"))
+
+# duplicate content configurations
+DEDUP_ENABLED = os.getenv("DEDUP_ENABLED", "true").lower() == "true"
+DEDUP_MAX_DISTANCE = int(os.getenv("DEDUP_MAX_DISTANCE", "3"))
+
+# scraping quorum configurations
+SCRAPE_QUORUM = os.getenv("SCRAPE_QUORUM", "false").lower() == "true"
+SCRAPE_QUORUM_RESULTS = int(os.getenv("SCRAPE_QUORUM_RESULTS", "3"))
+SCRAPE_QUORUM_TOKENS = int(os.getenv("SCRAPE_QUORUM_TOKENS", "12000"))
+SCRAPE_QUORUM_TIMEOUT = float(os.getenv("SCRAPE_QUORUM_TIMEOUT", "10"))
+
+# LLM rate limit configurations
+LLM_REQUESTS_PER_MINUTE = int(os.getenv("LLM_REQUESTS_PER_MINUTE", "720"))
+LLM_TOKENS_PER_MINUTE = int(os.getenv("LLM_TOKENS_PER_MINUTE", "120000"))
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "16"))
+LLM_RATE_LIMIT_RETRIES = int(os.getenv("LLM_RATE_LIMIT_RETRIES", "3"))
+LLM_COMPLETION_TOKENS_ESTIMATE = int(
+    os.getenv("LLM_COMPLETION_TOKENS_ESTIMATE", "800")
+)
+
+# token budget configurations
+TOKEN_ENCODING = os.getenv("TOKEN_ENCODING", "o200k_base")
+CHAIN_RESULTS_TOKEN_BUDGET = int(os.getenv("CHAIN_RESULTS_TOKEN_BUDGET", "24000"))
+SCRAPE_MAX_TOKENS = int(os.getenv("SCRAPE_MAX_TOKENS", "125000"))
+
+# prompt serialization configurations
+PROMPT_TITLE_MAX_TOKENS = int(os.getenv("PROMPT_TITLE_MAX_TOKENS", "40"))
+PROMPT_SNIPPET_MAX_TOKENS = int(os.getenv("PROMPT_SNIPPET_MAX_TOKENS", "120"))
+PROMPT_CONTENT_MAX_TOKENS = int(os.getenv("PROMPT_CONTENT_MAX_TOKENS", "0"))
+
+# passage ranking configurations
+PASSAGE_RANKING = os.getenv("PASSAGE_RANKING", "true").lower() == "true"
+PASSAGE_TOKENS = int(os.getenv("PASSAGE_TOKENS", "150"))
+
+# summarization configurations
+SUMMARY_CHUNK_TOKENS = int(os.getenv("SUMMARY_CHUNK_TOKENS", "20000"))
+SUMMARY_CHUNK_OVERLAP_TOKENS = int(os.getenv("SUMMARY_CHUNK_OVERLAP_TOKENS", "500"))
+SUMMARY_MAX_WORKERS = int(os.getenv("SUMMARY_MAX_WORKERS", "4"))
+SUMMARY_MAX_DEPTH = int(os.getenv("SUMMARY_MAX_DEPTH", "3"))
+SUMMARY_TOKEN_BUDGET = int(os.getenv("SUMMARY_TOKEN_BUDGET", "200000"))
+SUMMARY_STRATEGY = os.getenv("SUMMARY_STRATEGY", "auto").lower()
+SUMMARY_EXTRACTIVE_MAX_TOKENS = int(
+    os.getenv("SUMMARY_EXTRACTIVE_MAX_TOKENS", "30000")
+)
+
+# cache configurations
+CACHE_ENABLED = os.getenv("CACHE_ENABLED", "true").lower() == "true"
+CACHE_PATH = os.getenv("CACHE_PATH", os.path.join(".cache", "geronimo.sqlite3"))
+COMPANY_CACHE_MAX_ENTRIES = int(os.getenv("COMPANY_CACHE_MAX_ENTRIES", "20000"))
+COMPANY_SUMMARY_TTL = int(os.getenv("COMPANY_SUMMARY_TTL", "604800"))
+COMPANY_COMPETITORS_TTL = int(os.getenv("COMPANY_COMPETITORS_TTL", "604800"))
+COMPANY_NEWS_TTL = int(os.getenv("COMPANY_NEWS_TTL", "21600"))
+SEARCH_CACHE_TTL = int(os.getenv("SEARCH_CACHE_TTL", "86400"))
+SEARCH_CACHE_MAX_ENTRIES = int(os.getenv("SEARCH_CACHE_MAX_ENTRIES", "50000"))
+LLM_CACHE_TTL = int(os.getenv("LLM_CACHE_TTL", "604800"))
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "100000"))
+LLM_CACHE_MAX_BYTES = int(os.getenv("LLM_CACHE_MAX_BYTES", "268435456"))
+SCRAPE_CACHE_FRESH_TTL = int(os.getenv("SCRAPE_CACHE_FRESH_TTL", "86400"))
+SCRAPE_CACHE_MAX_ENTRIES = int(os.getenv("SCRAPE_CACHE_MAX_ENTRIES", "50000"))
+SCRAPE_CACHE_MAX_BYTES = int(os.getenv("SCRAPE_CACHE_MAX_BYTES", "536870912"))
 
 # List of all required environment variables
 required_vars = [
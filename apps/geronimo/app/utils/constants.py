@@ -16,6 +16,34 @@ COMPANY_SUMMARY = "company_summary"
 COMPANY_COMPETITORS = "company_competitors"
 COMPANY_NEWS = "company_news"
 
+CHAIN_KEYS = [
+    PROFESSIONAL_SUMMARY,
+    SOCIAL_MEDIA_LINKS,
+    COMPANY_SUMMARY,
+    COMPANY_COMPETITORS,
+    COMPANY_NEWS,
+]
+
+# Company level sections, generated together by the combined company profile chain
+COMPANY_SECTIONS = [COMPANY_SUMMARY, COMPANY_COMPETITORS, COMPANY_NEWS]
+COMPANY_PROFILE = "company_profile"
+
+# Chain result when the LLM call fails
+CHAIN_FAILED_MESSAGE = "Geronimo was unable to gather data"
+
+# Job statuses
+JOB_STATUS_QUEUED = "queued"
+JOB_STATUS_RUNNING = "running"
+JOB_STATUS_COMPLETED = "completed"
+JOB_STATUS_FAILED = "failed"
+
+# Job section progress statuses
+SECTION_STATUS_PENDING = "pending"
+SECTION_STATUS_DONE = "done"
+
+# Google Custom Search JSON API endpoint
+GOOGLE_SEARCH_URL = "https://www.googleapis.com/customsearch/v1"
+
 # valid tags to scrape
 TAGS = ["p", "h1", "h2", "li", "div", "title", "description", "to", "message"]
 
@@ -0,0 +1,68 @@
+import math
+import time
+import utils.config as config
+
+
+class Deadline:
+    """
+    The time by which a report must be generated.
+
+    One deadline is created per report and passed down to every stage (search,
+    scrape, summarization and chain calls). Each stage bounds its own timeout by
+    the time remaining, so the stages share one latency budget instead of adding
+    up their timeouts.
+    """
+
+    def __init__(self, seconds=None, clock=time.monotonic):
+        """
+        Args:
+            seconds (float): The latency budget. The deadline never expires when None.
+            clock (callable): The monotonic clock, replaced in tests.
+        """
+        self._clock = clock
+        self.expires_at = None if seconds is None else clock() + seconds
+
+    def remaining(self):
+        """Get the seconds left, or math.inf when the deadline never expires."""
+        if self.expires_at is None:
+            return math.inf
+        return max(self.expires_at - self._clock(), 0.0)
+
+    def expired(self):
+        """Check whether the budget is used up."""
+        return self.remaining() <= 0
+
+    def timeout(self, stage_timeout=None):
+        """
+        Get the timeout of a stage bounded by the time remaining.
+
+        Args:
+            stage_timeout (float): The stage's own timeout. None for no timeout.
+
+        Returns:
+            float: The timeout to use, or None when neither the stage nor the
+                deadline bounds it.
+        """
+        timeout = min(
+            math.inf if stage_timeout is None else stage_timeout, self.remaining()
+        )
+        return None if timeout == math.inf else timeout
+
+    def limit(self, seconds):
+        """
+        Get a deadline for a single step: seconds from now, or this deadline when
+        it is sooner.
+        """
+        step = Deadline(seconds, clock=self._clock)
+        if self.expires_at is not None and self.expires_at < step.expires_at:
+            step.expires_at = self.expires_at
+        return step
+
+
+# Deadline of the stages called without one
+NO_DEADLINE = Deadline()
+
+
+def report_deadline():
+    """Start the deadline of a report, REPORT_DEADLINE seconds from now."""
+    return Deadline(config.REPORT_DEADLINE if config.REPORT_DEADLINE > 0 else None)
@@ -0,0 +1,155 @@
+import hashlib
+import re
+import threading
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+import numpy as np
+import utils.config as config
+import utils.token_budget as token_budget
+
+# Query parameters that only track the visit and do not change the page
+TRACKING_PARAMETERS = {"fbclid", "gclid", "igshid", "mc_cid", "mc_eid", "ref", "trk"}
+
+# Words per shingle hashed into the SimHash fingerprint
+SHINGLE_WORDS = 3
+
+# Pages with fewer words are too short for a meaningful fingerprint
+MIN_WORDS = 50
+
+
+def canonical_url(url):
+    """
+    Build the canonical form of a URL, so the same page under different URLs is
+    scraped once.
+
+    The scheme and ``www.`` prefix, the fragment, tracking parameters, the
+    trailing slash and the order of the query parameters are ignored.
+    """
+    if not url:
+        return url
+    parts = urlsplit(url.strip())
+    host = parts.netloc.lower()
+    if host.startswith("www."):
+        host = host[4:]
+    query = sorted(
+        (name, value)
+        for name, value in parse_qsl(parts.query, keep_blank_values=True)
+        if name.lower() not in TRACKING_PARAMETERS
+        and not name.lower().startswith("utm_")
+    )
+    return urlunsplit(("", host, parts.path.rstrip("/"), urlencode(query), ""))
+
+
+def dedupe_search_results(search_results):
+    """
+    Drop the search results whose canonical URL is the same as an earlier result.
+
+    Returns:
+        list: The remaining results, in search position order.
+    """
+    urls = set()
+    unique_results = []
+    for result in search_results:
+        url = canonical_url(result.get("link"))
+        if url in urls:
+            continue
+        urls.add(url)
+        unique_results.append(result)
+    return unique_results
+
+
+def simhash(text):
+    """
+    Compute the 64 bit SimHash fingerprint of a text from its word shingles.
+
+    Returns:
+        int: The fingerprint, or None when the text is too short.
+    """
+    words = re.findall(r"\w+", text.casefold())
+    if len(words) < MIN_WORDS:
+        return None
+
+    shingles = {
+        " ".join(words[start : start + SHINGLE_WORDS])
+        for start in range(len(words) - SHINGLE_WORDS + 1)
+    }
+    digests = b"".join(
+        hashlib.blake2b(shingle.encode("utf-8"), digest_size=8).digest()
+        for shingle in shingles
+    )
+    bits = np.unpackbits(np.frombuffer(digests, dtype=np.uint8)).reshape(-1, 64)
+    # A fingerprint bit is set when most shingle hashes have it set
+    majority = bits.sum(axis=0) * 2 > len(shingles)
+    return int("".join("1" if bit else "0" for bit in majority), 2)
+
+
+def hamming_distance(first, second):
+    return (first ^ second).bit_count()
+
+
+class ContentDeduplicator:
+    """
+    Detect scraped pages whose content is a near duplicate of a page seen before,
+    such as syndicated copies of a press release or mirrored profiles.
+
+    Pages are near duplicates when their SimHash fingerprints differ by at most
+    DEDUP_MAX_DISTANCE bits. The copy with the best search position is kept, and
+    the first copy seen when the pages have no position. Safe to share between
+    the threads scraping the results of a search.
+    """
+
+    def __init__(self):
+        self.tokens_saved = 0
+        self.duplicates = 0
+        # Search positions of the pages dropped for a better ranked copy seen later
+        self.dropped_positions = set()
+        self._seen = []
+        self._lock = threading.Lock()
+
+    def is_duplicate(self, content, tokens=None, position=None):
+        """
+        Check whether content is a near duplicate of content seen before, and
+        remember it otherwise.
+
+        Args:
+            content (str): The page content.
+            tokens (int): The prompt tokens the content would use, counted as
+                saved when it is a duplicate. Defaults to the content tokens.
+            position (int): The search position of the page. A page that ranks
+                better than the copies seen before is kept, and the positions of
+                those copies are added to ``dropped_positions``.
+
+        Returns:
+            bool: True when the content is a near duplicate and can be dropped.
+        """
+        if not config.DEDUP_ENABLED:
+            return False
+        fingerprint = simhash(content)
+        if fingerprint is None:
+            return False
+        if tokens is None:
+            tokens = token_budget.count_tokens(content)
+
+        with self._lock:
+            copies = [
+                seen
+                for seen in self._seen
+                if hamming_distance(fingerprint, seen[0]) <= config.DEDUP_MAX_DISTANCE
+            ]
+            if copies and (
+                position is None
+                or any(
+                    seen_position is None or seen_position <= position
+                    for _, seen_position, _ in copies
+                )
+            ):
+                self.duplicates += 1
+                self.tokens_saved += tokens
+                return True
+
+            for copy in copies:
+                self._seen.remove(copy)
+                self.dropped_positions.add(copy[1])
+                self.duplicates += 1
+                self.tokens_saved += copy[2]
+            self._seen.append((fingerprint, position, tokens))
+            return False
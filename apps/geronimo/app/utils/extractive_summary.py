@@ -0,0 +1,140 @@
+import hashlib
+import re
+import numpy as np
+import utils.config as config
+import utils.token_budget as token_budget
+
+# Summarization strategies picked by `summary_strategy`
+EXTRACTIVE = "extractive"
+LLM = "llm"
+HYBRID = "hybrid"
+STRATEGIES = {EXTRACTIVE, LLM, HYBRID}
+
+# Sentences end at punctuation followed by a space, or at a text block boundary
+SENTENCE_BOUNDARY = re.compile(r"(?<=[.!?])\s+|\n+")
+
+# Words are hashed into this many features to build the sentence vectors
+HASH_FEATURES = 1024
+
+# Sentences ranked together; longer pages are ranked in groups of this size
+MAX_GRAPH_SENTENCES = 1000
+
+# TextRank (PageRank) damping factor and iterations
+DAMPING = 0.85
+MAX_ITERATIONS = 50
+TOLERANCE = 1e-6
+
+
+def summary_strategy(content_tokens):
+    """
+    Pick how a page that overflows its token share is summarized.
+
+    SUMMARY_STRATEGY forces a strategy. With ``auto``, pages up to
+    SUMMARY_EXTRACTIVE_MAX_TOKENS are summarized locally (extractive), and larger
+    pages are first reduced locally to one summarization chunk that the LLM then
+    summarizes (hybrid), so they cost a single LLM call. The strategy depends on
+    the page size only, not on the chain the page is scraped for.
+
+    Args:
+        content_tokens (int): The tokens of the page.
+
+    Returns:
+        str: EXTRACTIVE, LLM or HYBRID.
+    """
+    if config.SUMMARY_STRATEGY in STRATEGIES:
+        return config.SUMMARY_STRATEGY
+    if content_tokens <= config.SUMMARY_EXTRACTIVE_MAX_TOKENS:
+        return EXTRACTIVE
+    return HYBRID
+
+
+def split_sentences(text):
+    return [
+        sentence.strip()
+        for sentence in SENTENCE_BOUNDARY.split(text)
+        if sentence.strip()
+    ]
+
+
+def sentence_vectors(sentences):
+    """
+    Build the unit length bag of words vector of each sentence, with the words
+    hashed into HASH_FEATURES features.
+    """
+    vectors = np.zeros((len(sentences), HASH_FEATURES), dtype=np.float32)
+    for row, sentence in enumerate(sentences):
+        for word in set(re.findall(r"\w+", sentence.casefold())):
+            digest = hashlib.blake2b(word.encode("utf-8"), digest_size=4).digest()
+            vectors[row, int.from_bytes(digest, "little") % HASH_FEATURES] = 1.0
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-9)
+
+
+def textrank_scores(sentences):
+    """
+    Score sentences with TextRank: PageRank over the graph of sentences weighted
+    by their cosine similarity, so sentences similar to many others rank first.
+
+    Returns:
+        numpy.ndarray: The score of each sentence.
+    """
+    if len(sentences) < 2:
+        return np.ones(len(sentences))
+
+    vectors = sentence_vectors(sentences)
+    similarity = vectors @ vectors.T
+    np.fill_diagonal(similarity, 0.0)
+    out_weights = similarity.sum(axis=1, keepdims=True)
+    # Sentences without similar sentences link to every sentence
+    transition = np.where(
+        out_weights > 0,
+        similarity / np.maximum(out_weights, 1e-9),
+        1 / len(sentences),
+    )
+
+    scores = np.full(len(sentences), 1 / len(sentences))
+    for _ in range(MAX_ITERATIONS):
+        updated = (1 - DAMPING) / len(sentences) + DAMPING * (transition.T @ scores)
+        if np.abs(updated - scores).sum() < TOLERANCE:
+            return updated
+        scores = updated
+    return scores
+
+
+def summarize(text, max_tokens):
+    """
+    Summarize a text locally by keeping its highest ranked sentences.
+
+    Pages with more than MAX_GRAPH_SENTENCES sentences are ranked in groups, and
+    each group gets a share of the budget by its number of sentences. The text
+    is truncated when none of its sentences fit.
+
+    Args:
+        text (str): The scraped text.
+        max_tokens (int): The tokens the summary may use.
+
+    Returns:
+        str: The selected sentences, in text order.
+    """
+    sentences = split_sentences(text)
+    groups = [
+        sentences[start : start + MAX_GRAPH_SENTENCES]
+        for start in range(0, len(sentences), MAX_GRAPH_SENTENCES)
+    ]
+
+    summary = []
+    for group in groups:
+        tokens_left = max_tokens * len(group) // len(sentences)
+        scores = textrank_scores(group)
+        selected = []
+        for index in np.argsort(-scores, kind="stable"):
+            sentence_tokens = token_budget.count_tokens(group[index])
+            if sentence_tokens <= tokens_left:
+                selected.append(index)
+                tokens_left -= sentence_tokens
+        summary.extend(group[index] for index in sorted(selected))
+
+    if not summary:
+        # No sentence fits, for example a page without sentence boundaries
+        return token_budget.truncate_to_tokens(text, max_tokens)
+    return "\n".join(summary)
@@ -0,0 +1,205 @@
+import socket
+import threading
+import time
+from collections import OrderedDict
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.exceptions import ConnectTimeoutError, NewConnectionError
+from urllib3.util.retry import Retry
+import utils.config as config
+import utils.constants as constants
+
+_session = None
+_adapter = None
+_lock = threading.Lock()
+
+
+class DNSCache:
+    """
+    Bounded cache of the addresses of the scraped hosts.
+
+    Entries expire after ``ttl`` seconds. When the cache is full, the expired
+    entries are dropped first, then the least recently used ones.
+    """
+
+    def __init__(self, ttl, max_entries, clock=time.monotonic):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._clock = clock
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+    def resolve(self, host, port):
+        """
+        Resolve a host to the addresses to connect to, in resolver order.
+
+        Raises:
+            socket.gaierror: If the host cannot be resolved.
+        """
+        key = (host, port)
+        now = self._clock()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[0] > now:
+                self._entries.move_to_end(key)
+                return entry[1]
+
+        addresses = list(
+            dict.fromkeys(
+                sockaddr[0]
+                for *_, sockaddr in socket.getaddrinfo(
+                    host, port, 0, socket.SOCK_STREAM
+                )
+            )
+        )
+        with self._lock:
+            self._entries[key] = (now + self.ttl, addresses)
+            self._entries.move_to_end(key)
+            if len(self._entries) > self.max_entries:
+                for expired_key in [
+                    cached_key
+                    for cached_key, (expires_at, _) in self._entries.items()
+                    if expires_at <= now
+                ]:
+                    del self._entries[expired_key]
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return addresses
+
+
+DNS_CACHE = DNSCache(config.DNS_CACHE_TTL, config.DNS_CACHE_MAX_ENTRIES)
+
+
+class CachedDNSConnectionMixin:
+    """
+    Open the connections of the scraping session to the cached addresses of the
+    host, trying each in turn until one connects, as urllib3 does for the
+    addresses it resolves. TLS still verifies the host name.
+    """
+
+    def _new_conn(self):
+        host = self._dns_host
+        try:
+            addresses = DNS_CACHE.resolve(host, self.port)
+        except OSError:
+            # Let urllib3 resolve the host and report the error
+            return super()._new_conn()
+
+        error = None
+        for address in addresses:
+            self._dns_host = address
+            try:
+                return super()._new_conn()
+            except (ConnectTimeoutError, NewConnectionError, OSError) as e:
+                # For example an IPv6 address on a host without IPv6
+                error = e
+            finally:
+                self._dns_host = host
+        raise error
+
+
+class CachedDNSHTTPConnection(CachedDNSConnectionMixin, HTTPConnection):
+    pass
+
+
+class CachedDNSHTTPSConnection(CachedDNSConnectionMixin, HTTPSConnection):
+    pass
+
+
+class CachedDNSHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = CachedDNSHTTPConnection
+
+
+class CachedDNSHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = CachedDNSHTTPSConnection
+
+
+class CachedDNSAdapter(HTTPAdapter):
+    """HTTP adapter whose connection pools resolve hosts through DNS_CACHE."""
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": CachedDNSHTTPConnectionPool,
+            "https": CachedDNSHTTPSConnectionPool,
+        }
+
+
+def get_session():
+    """
+    Get the process wide HTTP session used for scraping, creating it on first use.
+
+    The session keeps connections alive in a pool per host and applies the retry
+    policy to every request made through it. With DNS_CACHE_TTL, its connections
+    resolve hosts through DNS_CACHE, without affecting the other HTTP clients of
+    the process.
+    """
+    global _session, _adapter
+    with _lock:
+        if _session is None:
+            retries = Retry(
+                total=3, backoff_factor=0.5, status_forcelist=[500, 502, 503, 504]
+            )
+            adapter_class = HTTPAdapter
+            if config.DNS_CACHE_TTL > 0:
+                adapter_class = CachedDNSAdapter
+            _adapter = adapter_class(
+                pool_connections=config.HTTP_POOL_HOSTS,
+                pool_maxsize=config.HTTP_POOL_SIZE_PER_HOST,
+                max_retries=retries,
+            )
+            session = requests.Session()
+            session.mount("http://", _adapter)
+            session.mount("https://", _adapter)
+            session.headers.update(constants.HEADERS)
+            _session = session
+        return _session
+
+
+def get_pool_stats():
+    """
+    Get the connection pool statistics of the scraping session.
+
+    Returns:
+        dict: Per host pool statistics and their totals. ``connections`` counts the
+            connections opened, ``requests`` the requests sent and ``idle`` the
+            connections currently waiting for reuse.
+    """
+    hosts = {}
+    with _lock:
+        if _adapter is not None:
+            pools = _adapter.poolmanager.pools
+            for key in pools.keys():
+                pool = pools.get(key)
+                if pool is None:
+                    continue
+                hosts[f"{pool.scheme}://{pool.host}:{pool.port}"] = {
+                    "connections": pool.num_connections,
+                    "requests": pool.num_requests,
+                    "idle": pool.pool.qsize() if pool.pool else 0,
+                    "max_size": config.HTTP_POOL_SIZE_PER_HOST,
+                }
+
+    total_connections = sum(host["connections"] for host in hosts.values())
+    total_requests = sum(host["requests"] for host in hosts.values())
+    return {
+        "hosts": hosts,
+        "totals": {
+            "hosts": len(hosts),
+            "connections": total_connections,
+            "requests": total_requests,
+            "reuse_rate": (
+                round(1 - total_connections / total_requests, 4)
+                if total_requests
+                else 0.0
+            ),
+        },
+        "dns_cache_entries": len(DNS_CACHE),
+    }
+
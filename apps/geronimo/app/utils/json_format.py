@@ -9,8 +9,10 @@ def format_json_string(response):
     Args:
         response (str): The JSON-like string to be formatted
     Returns:
-        dict: The formatted JSON object
+        dict: The formatted JSON object, or None when there is no response
     """
+    if not response:
+        return None
     try:
         return json.loads(response)
     except json.JSONDecodeError:
@@ -26,3 +28,33 @@ def format_json_string(response):
                 return None
         else:
             return None
+
+
+def parse_json_object(response, required_keys):
+    """
+    Parse a JSON object returned by the LLM in JSON mode
+    Args:
+        response (str): The JSON string returned by the LLM
+        required_keys (list): The keys the object must have
+    Returns:
+        dict: The parsed JSON object
+    Raises:
+        ValueError: If the response is not a JSON object with the required keys,
+            or the value of one of them is not a string or a list
+    """
+    parsed_json = json.loads(response)
+    if not isinstance(parsed_json, dict):
+        raise ValueError("LLM response is not a JSON object")
+
+    missing_keys = [key for key in required_keys if key not in parsed_json]
+    if missing_keys:
+        raise ValueError(f"LLM response is missing keys: {', '.join(missing_keys)}")
+
+    invalid_keys = [
+        key for key in required_keys if not isinstance(parsed_json[key], (str, list))
+    ]
+    if invalid_keys:
+        raise ValueError(
+            f"LLM response has invalid values for keys: {', '.join(invalid_keys)}"
+        )
+    return parsed_json
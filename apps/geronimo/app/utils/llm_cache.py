@@ -0,0 +1,66 @@
+import hashlib
+import json
+import threading
+import utils.config as config
+from utils.sqlite_cache import SQLiteCache
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_llm_cache():
+    """Get the shared LLM response cache, creating it on first use."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = SQLiteCache(
+                config.CACHE_PATH,
+                namespace="llm",
+                max_entries=config.LLM_CACHE_MAX_ENTRIES,
+                max_bytes=config.LLM_CACHE_MAX_BYTES,
+            )
+        return _cache
+
+
+def llm_cache_key(prompt, variables):
+    """
+    Build the cache key of an LLM call.
+
+    The key is a hash of the deployment, the prompt template and the variables the
+    template uses, so byte identical prompts share one cached response. The model
+    runs with temperature 0, which makes these responses reusable.
+    """
+    payload = json.dumps(
+        {
+            "deployment": config.OPENAI_DEPLOYMENT_NAME,
+            "template": prompt.template,
+            "variables": {
+                variable: variables.get(variable)
+                for variable in sorted(prompt.input_variables)
+            },
+        },
+        sort_keys=True,
+        default=str,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def get_cached_response(prompt, variables):
+    """
+    Get the cached response of an LLM call.
+
+    Returns:
+        str: The cached response, or None on a miss or when caching is off.
+    """
+    if not config.CACHE_ENABLED:
+        return None
+    return get_llm_cache().get(
+        llm_cache_key(prompt, variables), ttl=config.LLM_CACHE_TTL
+    )
+
+
+def store_response(prompt, variables, response):
+    """Cache the response of an LLM call. Empty responses are not cached."""
+    if not config.CACHE_ENABLED or not response:
+        return
+    get_llm_cache().set(llm_cache_key(prompt, variables), response)
@@ -1,16 +1,29 @@
-from langchain.chains import LLMChain
+import asyncio
+import concurrent.futures
+import openai
 import utils.constants as constants
+import utils.llm_cache as llm_cache
+import utils.prompt_format as prompt_format
+import utils.dedup as dedup
+import utils.relevance as relevance
+import utils.token_budget as token_budget
+from utils import json_format as json_format
 import utils.config as config
 from datetime import datetime
 from langchain_openai import AzureChatOpenAI
 from tenacity import (
     retry,
+    retry_if_not_exception_type,
     stop_after_attempt,
+    stop_any,
     wait_exponential,
 )
 from utils.prompt_templates import (
     prompt_template_summarization,
 )
+from utils.deadline import NO_DEADLINE
+from utils.rate_limiter import RateLimiter, retry_after_seconds
+from utils.task_planner import build_chain_inputs
 
 # Initialize ChatOpenAI model
 llm = AzureChatOpenAI(
@@ -19,85 +32,565 @@ llm = AzureChatOpenAI(
     openai_api_key=config.OPENAI_API_KEY,
     temperature=0.0,
     request_timeout=30,
+    # Rate limits are handled by RATE_LIMITER, which reads the response headers
+    max_retries=0,
+    include_response_headers=True,
 )
 
+# Shared requests and tokens per minute limits of the deployment
+RATE_LIMITER = RateLimiter(
+    config.LLM_REQUESTS_PER_MINUTE,
+    config.LLM_TOKENS_PER_MINUTE,
+    config.LLM_MAX_CONCURRENCY,
+)
+
+# Bound the number of LLM calls running at once in the async pipeline
+LLM_SEMAPHORE = asyncio.Semaphore(config.ASYNC_LLM_CONCURRENCY)
+
+
+def estimate_call_tokens(prompt_value):
+    """Estimate the tokens of an LLM call from its prompt and the expected completion."""
+    return (
+        token_budget.count_tokens(prompt_value.to_string())
+        + config.LLM_COMPLETION_TOKENS_ESTIMATE
+    )
+
+
+def record_llm_response(message, estimated_tokens):
+    """Update the rate limiter with the headers and token usage of a response."""
+    RATE_LIMITER.update_from_headers(message.response_metadata.get("headers"))
+    if message.usage_metadata:
+        RATE_LIMITER.record_usage(
+            estimated_tokens, message.usage_metadata["total_tokens"]
+        )
+
+
+def handle_rate_limit_error(error, attempt):
+    """Slow every call down after a 429 response and raise once out of retries."""
+    RATE_LIMITER.penalize(retry_after_seconds(error.response.headers))
+    constants.LOGGER.warning(
+        f"LLM rate limited (attempt {attempt + 1} of "
+        f"{config.LLM_RATE_LIMIT_RETRIES + 1})"
+    )
+    if attempt == config.LLM_RATE_LIMIT_RETRIES:
+        raise error
+
+
+def get_model(json_keys, deadline=None):
+    """
+    Get the model to call, in JSON mode when a JSON object is expected and with
+    the request timeout bounded by the deadline when one is given.
+    """
+    model = llm
+    if json_keys:
+        model = model.bind(response_format={"type": "json_object"})
+    if deadline is not None:
+        model = model.bind(timeout=deadline.timeout(llm.request_timeout))
+    return model
+
+
+def stop_at_deadline(deadline):
+    """Tenacity stop condition that stops retrying once the deadline is reached."""
+    return lambda retry_state: deadline is not None and deadline.expired()
+
+
+def parse_response(response, json_keys):
+    """Parse a JSON mode response, or return a text response as is."""
+    if json_keys:
+        return json_format.parse_json_object(response, json_keys)
+    return response
+
+
+def call_llm(prompt, variables, key=None, json_keys=None, deadline=None):
+    """
+    Render a prompt and call the LLM, reusing the cached response of an identical
+    prompt.
+
+    Calls wait for the shared rate limiter and are retried after the retry-after
+    time of a 429 response, up to LLM_RATE_LIMIT_RETRIES times.
+
+    Args:
+        prompt (PromptTemplate): The prompt template.
+        variables (dict): The values of the template variables.
+        key (str): The lead or query the call is made for, so queued calls are
+            served fairly across leads.
+        json_keys (list): When given, the LLM is called in JSON mode and must
+            return a JSON object with these keys.
+        deadline (Deadline): The report deadline, which bounds the rate limit wait
+            and the request timeout.
+
+    Returns:
+        str | dict: The LLM response, parsed when json_keys is given.
+
+    Raises:
+        ValueError: If a JSON mode response is not a valid object. Invalid
+            responses are not cached.
+        TimeoutError: If the deadline is reached while waiting for the rate limit.
+    """
+    cached_response = llm_cache.get_cached_response(prompt, variables)
+    if cached_response is not None:
+        return parse_response(cached_response, json_keys)
+
+    prompt_value = prompt.format_prompt(**variables)
+    estimated_tokens = estimate_call_tokens(prompt_value)
+
+    for attempt in range(config.LLM_RATE_LIMIT_RETRIES + 1):
+        acquire_timeout = None if deadline is None else deadline.timeout()
+        if not RATE_LIMITER.acquire(estimated_tokens, key, timeout=acquire_timeout):
+            raise TimeoutError("Deadline reached while waiting for the LLM rate limit")
+        try:
+            message = get_model(json_keys, deadline).invoke(prompt_value)
+        except openai.RateLimitError as e:
+            RATE_LIMITER.release(success=False)
+            handle_rate_limit_error(e, attempt)
+            continue
+        except Exception:
+            RATE_LIMITER.release(success=False)
+            raise
+        RATE_LIMITER.release()
+        record_llm_response(message, estimated_tokens)
+        break
+
+    response = parse_response(message.content, json_keys)
+    llm_cache.store_response(prompt, variables, message.content)
+    return response
+
+
+async def async_call_llm(prompt, variables, key=None, json_keys=None, deadline=None):
+    """
+    Render a prompt and call the LLM without blocking the event loop, reusing the
+    cached response of an identical prompt. Shares the rate limiter of `call_llm`.
+    """
+    cached_response = llm_cache.get_cached_response(prompt, variables)
+    if cached_response is not None:
+        return parse_response(cached_response, json_keys)
+
+    prompt_value = prompt.format_prompt(**variables)
+    estimated_tokens = estimate_call_tokens(prompt_value)
+
+    for attempt in range(config.LLM_RATE_LIMIT_RETRIES + 1):
+        async with LLM_SEMAPHORE:
+            try:
+                await asyncio.wait_for(
+                    RATE_LIMITER.async_acquire(estimated_tokens, key),
+                    None if deadline is None else deadline.timeout(),
+                )
+            except asyncio.TimeoutError:
+                raise TimeoutError(
+                    "Deadline reached while waiting for the LLM rate limit"
+                )
+            try:
+                message = await get_model(json_keys, deadline).ainvoke(prompt_value)
+            except openai.RateLimitError as e:
+                RATE_LIMITER.release(success=False)
+                handle_rate_limit_error(e, attempt)
+                continue
+            except BaseException:
+                RATE_LIMITER.release(success=False)
+                raise
+        RATE_LIMITER.release()
+        record_llm_response(message, estimated_tokens)
+        break
+
+    response = parse_response(message.content, json_keys)
+    llm_cache.store_response(prompt, variables, message.content)
+    return response
+
 
 def run_chain(name, lead_info, query, llm_prompt, num_results):
     """
     Fetch Google results, scrape content, and run the LLM chain.
     """
+    gathered = gather_results(query, num_results)
+    return invoke_llm_chain(name, lead_info, llm_prompt, gathered["scraped"])
+
+
+async def async_run_chain(name, lead_info, query, llm_prompt, num_results, client):
+    """
+    Fetch Google results, scrape content, and run the LLM chain without blocking
+    the event loop.
+    """
+    gathered = await async_gather_results(query, num_results, client)
+    return await async_invoke_llm_chain(
+        name, lead_info, llm_prompt, gathered["scraped"]
+    )
+
+
+def gather_results(
+    query, num_results, deadline=None, terms=None, budget_results=None
+):
+    """
+    Fetch Google results and scrape the content of the relevant ones before the
+    deadline. Results that score below RELEVANCE_MIN_SCORE against the search
+    terms are not scraped (see `relevance.filter_relevant`), and results that
+    are the same page or a near duplicate of an earlier result are dropped (see
+    `dedup`). The chain token budget is split across the top ``budget_results``
+    results, the fewest any chain sharing the search uses.
+
+    Returns:
+        dict: The raw ``search_results``, the ``scraped`` items, ordered by their
+            search position, and the prompt ``tokens_saved`` by dropping
+            duplicate content.
+    """
     import utils.web_search as web_search
     import utils.web_scrape as web_scrape
 
     search_results = web_search.google_search(query, num_results)
 
+    deduplicator = dedup.ContentDeduplicator()
     formatted_results = web_scrape.parallel_scrape_caller(
-        search_results, query, num_results
+        dedup.dedupe_search_results(relevance.filter_relevant(search_results, terms)),
+        query,
+        num_results,
+        deadline,
+        deduplicator,
+        budget_results,
     )
 
+    return {
+        "search_results": search_results,
+        "scraped": formatted_results,
+        "tokens_saved": deduplicator.tokens_saved,
+    }
+
+
+async def async_gather_results(
+    query, num_results, client, deadline=None, terms=None, budget_results=None
+):
+    """
+    Fetch Google results and scrape the content of the relevant ones before the
+    deadline without blocking the event loop.
+
+    Returns:
+        dict: The raw ``search_results``, the ``scraped`` items, ordered by their
+            search position, and the prompt ``tokens_saved`` by dropping
+            duplicate content.
+    """
+    import utils.web_search as web_search
+    import utils.web_scrape as web_scrape
+
+    search_results = await web_search.async_google_search(
+        query, num_results, client, deadline
+    )
+
+    deduplicator = dedup.ContentDeduplicator()
+    formatted_results = await web_scrape.async_parallel_scrape_caller(
+        dedup.dedupe_search_results(relevance.filter_relevant(search_results, terms)),
+        query,
+        num_results,
+        client,
+        deadline,
+        deduplicator,
+        budget_results,
+    )
+
+    return {
+        "search_results": search_results,
+        "scraped": formatted_results,
+        "tokens_saved": deduplicator.tokens_saved,
+    }
+
+
+def select_results(gathered, num_results):
+    """
+    Select the scraped items of the top search results from gathered results.
+
+    Used when a search was run with more results than a chain needs.
+    """
+    links = {result.get("link") for result in gathered["search_results"][:num_results]}
+    return [item for item in gathered["scraped"] if item.get("link") in links]
+
+
+def invoke_llm_chain(
+    name, lead_info, llm_prompt, formatted_results, json_keys=None, deadline=None
+):
+    """
+    Run the LLM chain on the scraped search results.
+
+    The results are serialized compactly for the prompt (see
+    `prompt_format.format_results`). With json_keys, the chain returns a JSON
+    object with those keys, and invalid responses are retried like failed calls.
+    Failed calls are not retried past the deadline.
+    """
     # get date to pass to chain
     today_date = datetime.today().strftime("%Y-%m-%d")
 
-    chain = LLMChain(llm=llm, prompt=llm_prompt, output_key="result")
-
+    # 429s are already retried by the call, after their retry-after time
     @retry(
-        stop=stop_after_attempt(3), wait=wait_exponential(multiplier=2, min=2, max=8)
+        retry=retry_if_not_exception_type(openai.RateLimitError),
+        stop=stop_any(stop_after_attempt(3), stop_at_deadline(deadline)),
+        wait=wait_exponential(multiplier=2, min=2, max=8),
     )
     def invoke_chain():
-        return chain.invoke(
+        return call_llm(
+            llm_prompt,
             {
-                "name": name,
-                "company": lead_info.company,
-                "position": lead_info.job_title,
-                "country": lead_info.country,
-                "google_results": formatted_results,
+                **build_chain_inputs(name, lead_info),
+                "google_results": prompt_format.format_results(formatted_results),
                 "date": today_date,
-            }
-        )["result"]
+            },
+            key=name,
+            json_keys=json_keys,
+            deadline=deadline,
+        )
 
     try:
         return invoke_chain()
     except Exception as e:
         constants.LOGGER.error(f"Chain Failed: {str(e)}")
-        return "Geronimo was unable to gather data"
+        return constants.CHAIN_FAILED_MESSAGE
+
+
+async def async_invoke_llm_chain(
+    name, lead_info, llm_prompt, formatted_results, json_keys=None, deadline=None
+):
+    """
+    Run the LLM chain on the scraped search results without blocking the event loop.
+    """
+    # get date to pass to chain
+    today_date = datetime.today().strftime("%Y-%m-%d")
+
+    # 429s are already retried by the call, after their retry-after time
+    @retry(
+        retry=retry_if_not_exception_type(openai.RateLimitError),
+        stop=stop_any(stop_after_attempt(3), stop_at_deadline(deadline)),
+        wait=wait_exponential(multiplier=2, min=2, max=8),
+    )
+    async def invoke_chain():
+        return await async_call_llm(
+            llm_prompt,
+            {
+                **build_chain_inputs(name, lead_info),
+                "google_results": prompt_format.format_results(formatted_results),
+                "date": today_date,
+            },
+            key=name,
+            json_keys=json_keys,
+            deadline=deadline,
+        )
+
+    try:
+        return await invoke_chain()
+    except Exception as e:
+        constants.LOGGER.error(f"Chain Failed: {str(e)}")
+        return constants.CHAIN_FAILED_MESSAGE
+
 
+def take_within_budget(pieces, tokens_left):
+    """
+    Take the leading pieces whose tokens fit in the budget.
 
-def summarize_large_content(content, query, url, chunk_size=80000, overlap=2000):
+    Returns:
+        tuple: The pieces taken and the number of tokens they use.
     """
-    Summarize large content by splitting it into chunks and summarizing each chunk sequentially.
+    taken = []
+    used_tokens = 0
+    for piece in pieces:
+        piece_tokens = token_budget.count_tokens(piece)
+        if used_tokens + piece_tokens > tokens_left:
+            break
+        taken.append(piece)
+        used_tokens += piece_tokens
+    return taken, used_tokens
+
+
+def group_summaries(summaries, chunk_tokens):
+    """
+    Group consecutive summaries into pieces of at most chunk_tokens tokens to be
+    summarized again at the next level of the reduce tree.
+    """
+    groups = []
+    current = []
+    current_tokens = 0
+    for summary in summaries:
+        summary_tokens = token_budget.count_tokens(summary) + 1
+        if current and current_tokens + summary_tokens > chunk_tokens:
+            groups.append("\n".join(current))
+            current = []
+            current_tokens = 0
+        current.append(summary)
+        current_tokens += summary_tokens
+    if current:
+        groups.append("\n".join(current))
+    return groups
+
+
+def log_summary_deadline(url, level):
+    constants.LOGGER.warning(
+        f"Deadline reached while summarizing {url} at level {level}, "
+        f"truncating the content"
+    )
+
+
+def log_summary_budget(url, level, pieces, taken):
+    if len(taken) < len(pieces):
+        constants.LOGGER.warning(
+            f"Summary token budget exhausted for {url} at level {level}, "
+            f"summarizing {len(taken)} of {len(pieces)} pieces"
+        )
+
+
+def summarize_large_content(
+    content,
+    query,
+    url,
+    max_tokens=None,
+    chunk_tokens=None,
+    overlap_tokens=None,
+    deadline=None,
+):
+    """
+    Summarize large content with a map-reduce over its chunks.
+
+    The chunks are summarized concurrently by at most SUMMARY_MAX_WORKERS threads.
+    While the combined summaries are longer than max_tokens, they are grouped into
+    chunk sized pieces and summarized again, up to SUMMARY_MAX_DEPTH levels. The
+    tokens sent to the LLM for one page are bounded by SUMMARY_TOKEN_BUDGET; pieces
+    beyond the budget are dropped and the result is truncated to max_tokens when
+    a budget runs out. When the deadline is reached before a level is summarized,
+    the pieces of that level are truncated to max_tokens instead.
 
     Args:
         content (str): The large content to be summarized.
         query (str): The query related to the content.
-        chunk_size (int): The size of each chunk.
-        overlap (int): The overlap between chunks.
+        url (str): The URL the content was scraped from.
+        max_tokens (int): The maximum tokens of the summary. Defaults to the chunk size.
+        chunk_tokens (int): The tokens of each chunk. Defaults to SUMMARY_CHUNK_TOKENS.
+        overlap_tokens (int): The overlap between chunks. Defaults to
+            SUMMARY_CHUNK_OVERLAP_TOKENS.
+        deadline (Deadline): The report deadline.
 
     Returns:
         str: The summarized content.
     """
 
-    chunks = []
-    start = 0
-    while start < len(content):
-        end = min(start + chunk_size, len(content))
-        chunks.append(content[start:end])
-        start += chunk_size - overlap
+    def summarize_chunk(chunk):
+        try:
+            return call_llm(
+                prompt_template_summarization,
+                {"query": query, "chunk": chunk},
+                key=query,
+                deadline=deadline,
+            )
+        except Exception as e:
+            constants.LOGGER.error(f"Error summarizing chunk: {str(e)}", exc_info=True)
+            return ""
 
-    chain = LLMChain(llm=llm, prompt=prompt_template_summarization)
+    chunk_tokens = chunk_tokens or config.SUMMARY_CHUNK_TOKENS
+    max_tokens = max_tokens or chunk_tokens
+    if overlap_tokens is None:
+        overlap_tokens = config.SUMMARY_CHUNK_OVERLAP_TOKENS
+
+    pieces = token_budget.split_into_token_chunks(content, chunk_tokens, overlap_tokens)
+    tokens_left = config.SUMMARY_TOKEN_BUDGET
+
+    # Not used as a context manager, which would wait for the chunks still being
+    # summarized when the deadline is reached
+    executor = concurrent.futures.ThreadPoolExecutor(
+        max_workers=config.SUMMARY_MAX_WORKERS
+    )
+    try:
+        for level in range(config.SUMMARY_MAX_DEPTH):
+            taken, used_tokens = take_within_budget(pieces, tokens_left)
+            log_summary_budget(url, level, pieces, taken)
+            if not taken:
+                break
+            tokens_left -= used_tokens
+
+            futures = [executor.submit(summarize_chunk, piece) for piece in taken]
+            _, not_done = concurrent.futures.wait(
+                futures, timeout=(deadline or NO_DEADLINE).timeout()
+            )
+            if not_done:
+                log_summary_deadline(url, level)
+                pieces = taken
+                break
+
+            pieces = [future.result() for future in futures]
+            combined_summary = "\n".join(pieces)
+            if token_budget.count_tokens(combined_summary) <= max_tokens:
+                return combined_summary
+
+            pieces = group_summaries(pieces, chunk_tokens)
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    return token_budget.truncate_to_tokens("\n".join(pieces), max_tokens)
 
-    chunk_summaries = []
-    for chunk in chunks:
-        try:
-            chunk_summary = chain.run({"query": query, "chunk": chunk})
 
-            chunk_summaries.append(chunk_summary)
+async def async_summarize_large_content(
+    content,
+    query,
+    url=None,
+    max_tokens=None,
+    chunk_tokens=None,
+    overlap_tokens=None,
+    deadline=None,
+):
+    """
+    Summarize large content with a map-reduce over its chunks without blocking the
+    event loop. Uses the same reduce tree and budgets as `summarize_large_content`.
+
+    Args:
+        content (str): The large content to be summarized.
+        query (str): The query related to the content.
+        url (str): The URL the content was scraped from.
+        max_tokens (int): The maximum tokens of the summary. Defaults to the chunk size.
+        chunk_tokens (int): The tokens of each chunk. Defaults to SUMMARY_CHUNK_TOKENS.
+        overlap_tokens (int): The overlap between chunks. Defaults to
+            SUMMARY_CHUNK_OVERLAP_TOKENS.
+        deadline (Deadline): The report deadline.
+
+    Returns:
+        str: The summarized content.
+    """
+
+    page_semaphore = asyncio.Semaphore(config.SUMMARY_MAX_WORKERS)
+
+    async def summarize_chunk(chunk):
+        try:
+            async with page_semaphore:
+                return await async_call_llm(
+                    prompt_template_summarization,
+                    {"query": query, "chunk": chunk},
+                    key=query,
+                    deadline=deadline,
+                )
         except Exception as e:
             constants.LOGGER.error(f"Error summarizing chunk: {str(e)}", exc_info=True)
-            chunk_summaries.append("")
+            return ""
+
+    chunk_tokens = chunk_tokens or config.SUMMARY_CHUNK_TOKENS
+    max_tokens = max_tokens or chunk_tokens
+    if overlap_tokens is None:
+        overlap_tokens = config.SUMMARY_CHUNK_OVERLAP_TOKENS
+
+    pieces = token_budget.split_into_token_chunks(content, chunk_tokens, overlap_tokens)
+    tokens_left = config.SUMMARY_TOKEN_BUDGET
+
+    for level in range(config.SUMMARY_MAX_DEPTH):
+        taken, used_tokens = take_within_budget(pieces, tokens_left)
+        log_summary_budget(url, level, pieces, taken)
+        if not taken:
+            break
+        tokens_left -= used_tokens
+
+        tasks = [asyncio.ensure_future(summarize_chunk(piece)) for piece in taken]
+        _, not_done = await asyncio.wait(
+            tasks, timeout=(deadline or NO_DEADLINE).timeout()
+        )
+        if not_done:
+            for task in not_done:
+                task.cancel()
+            log_summary_deadline(url, level)
+            pieces = taken
+            break
 
-    combined_summary = "\n".join(chunk_summaries)
+        pieces = [task.result() for task in tasks]
+        combined_summary = "\n".join(pieces)
+        if token_budget.count_tokens(combined_summary) <= max_tokens:
+            return combined_summary
 
-    if len(combined_summary) > chunk_size:
-        return summarize_large_content(combined_summary, query, chunk_size, overlap)
+        pieces = group_summaries(pieces, chunk_tokens)
 
-    return combined_summary
+    return token_budget.truncate_to_tokens("\n".join(pieces), max_tokens)
@@ -0,0 +1,153 @@
+import asyncio
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import utils.config as config
+import utils.constants as constants
+import utils.extractive_summary as extractive_summary
+import utils.text_extractor as text_extractor
+
+_executor = None
+_lock = threading.Lock()
+
+
+def get_executor():
+    """
+    Get the shared process pool of the CPU bound page work, HTML parsing and
+    extractive summaries, creating it on first use.
+
+    Returns:
+        ProcessPoolExecutor: The pool of PARSE_WORKERS processes, or None when
+            PARSE_PROCESSES is off and pages are processed in the calling thread.
+    """
+    global _executor
+    if not config.PARSE_PROCESSES:
+        return None
+    with _lock:
+        if _executor is None:
+            # Spawned workers only import the page modules, and do not inherit the
+            # locks held by the scraping threads as forked workers would
+            _executor = ProcessPoolExecutor(
+                max_workers=config.PARSE_WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _executor
+
+
+def shutdown():
+    """Stop the parsing processes."""
+    global _executor
+    with _lock:
+        if _executor is not None:
+            _executor.shutdown(wait=False, cancel_futures=True)
+            _executor = None
+
+
+def reset_broken_pool(executor):
+    """Drop a pool whose processes died, so the next page starts a new one."""
+    global _executor
+    constants.LOGGER.warning("Page processing pool broke, using the scraping thread")
+    with _lock:
+        if _executor is executor:
+            _executor = None
+
+
+def parse_page(body, content_type):
+    """
+    Decode a page body and extract its text. Runs in a parsing process.
+
+    Args:
+        body (bytes): The raw page body.
+        content_type (str): The Content-Type header, which may declare the charset.
+
+    Returns:
+        str: The extracted text, or "none" when the page has no text.
+    """
+    return text_extractor.extract_text(
+        text_extractor.decode_markup(body, content_type)
+    )
+
+
+def run_in_pool(function, *args, timeout=None):
+    """
+    Run a page function in the process pool, so it does not hold the GIL of the
+    scraping threads. The function runs in the calling thread when the pool is
+    off or broken.
+
+    Args:
+        function (callable): A module level function, so it can be sent to the
+            pool.
+        timeout (float): Seconds to wait for the result. None to wait until done.
+
+    Raises:
+        TimeoutError: If the function does not finish within the timeout.
+    """
+    executor = get_executor()
+    if executor is None:
+        return function(*args)
+    try:
+        return executor.submit(function, *args).result(timeout)
+    except BrokenProcessPool:
+        reset_broken_pool(executor)
+        return function(*args)
+
+
+async def async_run_in_pool(function, *args):
+    """
+    Run a page function in the process pool without blocking the event loop. It
+    runs in a worker thread when the pool is off or broken.
+    """
+    executor = get_executor()
+    if executor is None:
+        return await asyncio.to_thread(function, *args)
+    try:
+        return await asyncio.wrap_future(executor.submit(function, *args))
+    except BrokenProcessPool:
+        reset_broken_pool(executor)
+        return await asyncio.to_thread(function, *args)
+
+
+def extract_page_text(body, content_type, timeout=None):
+    """
+    Extract the text of a page in the process pool. Only the raw body goes to the
+    pool and only the text comes back.
+
+    Args:
+        body (bytes): The raw page body.
+        content_type (str): The Content-Type header.
+        timeout (float): Seconds to wait for the text. None to wait until done.
+
+    Returns:
+        str: The extracted text.
+
+    Raises:
+        TimeoutError: If the text is not extracted within the timeout.
+    """
+    return run_in_pool(parse_page, body, content_type, timeout=timeout)
+
+
+async def async_extract_page_text(body, content_type):
+    """
+    Extract the text of a page in the process pool without blocking the event
+    loop.
+    """
+    return await async_run_in_pool(parse_page, body, content_type)
+
+
+def summarize_text(text, max_tokens, timeout=None):
+    """
+    Summarize a page locally in the process pool (see
+    `extractive_summary.summarize`), so pages are ranked in parallel across cores.
+
+    Raises:
+        TimeoutError: If the summary is not ready within the timeout.
+    """
+    return run_in_pool(extractive_summary.summarize, text, max_tokens, timeout=timeout)
+
+
+async def async_summarize_text(text, max_tokens):
+    """
+    Summarize a page locally in the process pool without blocking the event loop.
+    """
+    return await async_run_in_pool(extractive_summary.summarize, text, max_tokens)
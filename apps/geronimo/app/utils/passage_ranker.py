@@ -0,0 +1,130 @@
+import math
+import re
+from collections import Counter
+import utils.config as config
+import utils.token_budget as token_budget
+
+# Query words too common to tell passages apart
+STOPWORDS = {"a", "an", "and", "at", "by", "for", "in", "of", "on", "the", "to"}
+
+# BM25 term frequency saturation and passage length normalization
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+
+def tokenize(text):
+    return re.findall(r"\w+", text.casefold())
+
+
+def split_passages(text, passage_tokens):
+    """
+    Split scraped text into passages of about passage_tokens tokens.
+
+    The text blocks (the lines written by `text_extractor`) are grouped in order
+    until a passage is full, and blocks longer than a passage are split.
+
+    Returns:
+        list: The passages, in text order.
+    """
+    passages = []
+    lines = []
+    tokens = 0
+    for line in text.splitlines():
+        line = line.strip()
+        if not line:
+            continue
+        line_tokens = token_budget.count_tokens(line)
+        if lines and tokens + line_tokens > passage_tokens:
+            passages.append("\n".join(lines))
+            lines, tokens = [], 0
+        if line_tokens > passage_tokens:
+            passages.extend(
+                token_budget.split_into_token_chunks(line, passage_tokens, 0)
+            )
+            continue
+        lines.append(line)
+        tokens += line_tokens
+    if lines:
+        passages.append("\n".join(lines))
+    return passages
+
+
+def bm25_scores(passages, query):
+    """
+    Score passages against a query with Okapi BM25.
+
+    Args:
+        passages (list): The passages.
+        query (str): The query, for example the chain query with the lead name
+            and company.
+
+    Returns:
+        list: The score of each passage, 0 when it has none of the query words.
+    """
+    query_terms = {term for term in tokenize(query) if term not in STOPWORDS}
+    passage_terms = [Counter(tokenize(passage)) for passage in passages]
+    if not query_terms or not passage_terms:
+        return [0.0] * len(passages)
+
+    average_length = sum(sum(terms.values()) for terms in passage_terms) / len(
+        passage_terms
+    )
+    document_frequency = {
+        term: sum(term in terms for terms in passage_terms) for term in query_terms
+    }
+    idf = {
+        term: math.log(
+            1 + (len(passage_terms) - frequency + 0.5) / (frequency + 0.5)
+        )
+        for term, frequency in document_frequency.items()
+    }
+
+    scores = []
+    for terms in passage_terms:
+        length_norm = BM25_K1 * (
+            1 - BM25_B + BM25_B * sum(terms.values()) / max(average_length, 1)
+        )
+        scores.append(
+            sum(
+                idf[term] * terms[term] * (BM25_K1 + 1) / (terms[term] + length_norm)
+                for term in query_terms
+                if terms[term]
+            )
+        )
+    return scores
+
+
+def select_passages(text, query, max_tokens):
+    """
+    Keep the passages of a page that best match the query within a token budget.
+
+    A local, millisecond scale alternative to summarizing a page that overflows
+    its token share with the LLM.
+
+    Args:
+        text (str): The scraped text.
+        query (str): The chain query.
+        max_tokens (int): The tokens the selected passages may use.
+
+    Returns:
+        str: The selected passages in text order, or None when ranking is off or
+            no passage matches the query.
+    """
+    if not config.PASSAGE_RANKING:
+        return None
+    passages = split_passages(text, config.PASSAGE_TOKENS)
+    scores = bm25_scores(passages, query)
+
+    selected = []
+    tokens_left = max_tokens
+    for index in sorted(range(len(passages)), key=lambda index: -scores[index]):
+        if scores[index] <= 0:
+            break
+        passage_tokens = token_budget.count_tokens(passages[index])
+        if passage_tokens <= tokens_left:
+            selected.append(index)
+            tokens_left -= passage_tokens
+
+    if not selected:
+        return None
+    return "\n".join(passages[index] for index in sorted(selected))
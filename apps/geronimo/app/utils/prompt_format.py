@@ -0,0 +1,81 @@
+import re
+import utils.config as config
+import utils.token_budget as token_budget
+
+# Content of pages that could not be scraped or have no text
+EMPTY_CONTENT = {"", "none"}
+
+# Prompt label of each result field, in the order they are written
+FIELD_LABELS = (
+    ("title", "Title"),
+    ("link", "Link"),
+    ("snippet", "Snippet"),
+    ("content", "Content"),
+)
+
+
+def collapse_whitespace(text, keep_lines=False):
+    """
+    Collapse runs of whitespace to a single space. With keep_lines, line breaks
+    are kept as single new lines so the blocks of a scraped page stay apart.
+    """
+    if not keep_lines:
+        return " ".join(text.split())
+    lines = (" ".join(line.split()) for line in re.split(r"[\r\n]+", text))
+    return "\n".join(line for line in lines if line)
+
+
+def field_max_tokens(field):
+    """Get the tokens a result field may use in the prompt, 0 for no limit."""
+    return {
+        "title": config.PROMPT_TITLE_MAX_TOKENS,
+        "snippet": config.PROMPT_SNIPPET_MAX_TOKENS,
+        "content": config.PROMPT_CONTENT_MAX_TOKENS,
+    }.get(field, 0)
+
+
+def format_field(field, value):
+    """
+    Format a result field for the prompt.
+
+    Returns:
+        str: The field text, or None when it is empty or a failed scrape.
+    """
+    if not isinstance(value, str):
+        return None
+    text = collapse_whitespace(value, keep_lines=field == "content")
+    if field == "content" and text.lower() in EMPTY_CONTENT:
+        return None
+    if not text:
+        return None
+    max_tokens = field_max_tokens(field)
+    return token_budget.truncate_to_tokens(text, max_tokens) if max_tokens else text
+
+
+def format_results(scraped_items):
+    """
+    Serialize scraped search results for a chain prompt.
+
+    Each result is written as labelled lines under its search position instead
+    of the repr of a list of dicts, which repeats the quotes, braces and key
+    names of every result and escapes every new line. Whitespace is collapsed,
+    empty fields and the content of pages that could not be scraped are dropped,
+    and the title, snippet and content are truncated to their token limits. The
+    output only depends on the items and their order.
+
+    Args:
+        scraped_items (list): The scraped items, in search position order.
+
+    Returns:
+        str: The serialized results.
+    """
+    results = []
+    for item in scraped_items:
+        lines = []
+        for field, label in FIELD_LABELS:
+            text = format_field(field, item.get(field))
+            if text is not None:
+                lines.append(f"{label}: {text}")
+        if lines:
+            results.append(f"Position: {len(results) + 1}\n" + "\n".join(lines))
+    return "\n\n".join(results)
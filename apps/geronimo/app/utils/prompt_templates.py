@@ -153,6 +153,35 @@ prompt_template_news = PromptTemplate(
 )
 
 
+prompt_template_company_profile = PromptTemplate(
+    input_variables=["company", "country", "google_results", "date"],
+    template=(
+        "Create a company profile for {company} based in {country} using the provided search results. Each search result contains: "
+        "title, link, snippet, and content sections.\n\n"
+        "Return a JSON object with exactly these keys:\n"
+        "- 'company_summary': A comprehensive summary (around 200 words) of the company's primary business activities, key services "
+        "and products, geographical presence, notable projects or achievements and industry expertise. If multiple companies are found "
+        "with the same name, start with 'Geronimo Found multiple companies named {company}. Here are the details:' and describe each "
+        "company in a flowing paragraph within 250 words. If none of the search results describe the company's business, use "
+        "'Geronimo unable to find valid information about {company}'.\n"
+        "- 'company_competitors': An array of 3 to 5 competitor company names sorted alphabetically. Only include distinct companies "
+        "in the same domain/industry that are directly mentioned in the search results, never product names or services. Use an empty "
+        "array if no valid competitors are found.\n"
+        "- 'company_news': An array of the top 3 to 5 most relevant news articles about the company from the last 12 months, "
+        "referring to today's date. Include past big news as well. Focus on financial performance, major partnerships, executive "
+        "changes or significant industry developments, and skip articles about companies with similar names. Each article is an "
+        "object with 'title' (a clear, detailed and accurate title), 'url' (the full link to the article) and 'description' (a "
+        "concise summary of at most 100 words). Use an empty array if no valid news articles are found.\n\n"
+        "Important Guidelines:\n"
+        "- Give response based on the given data and do not hallucinate the data\n"
+        "- Ignore the Error massages that gives in search results when doing web scraping. do not inlcude about them in the response\n\n"
+        "Today's Date: {date}\n\n"
+        "Search Results: {google_results}\n\n"
+        "Company Profile JSON:"
+    ),
+)
+
+
 prompt_template_summarization = PromptTemplate(
     input_variables=["query", "chunk"],
     template=(
@@ -0,0 +1,268 @@
+import asyncio
+import threading
+import time
+from collections import deque
+
+# Longest time a waiter sleeps before checking the buckets again
+POLL_INTERVAL = 0.05
+
+# Pause applied on a 429 response that does not say when to retry
+DEFAULT_RETRY_AFTER = 10.0
+
+
+def retry_after_seconds(headers):
+    """
+    Get the time to wait before retrying from rate limit response headers.
+
+    Returns:
+        float: The seconds to wait, or None when the headers do not say.
+    """
+    if not headers:
+        return None
+    try:
+        if headers.get("retry-after-ms"):
+            return float(headers["retry-after-ms"]) / 1000
+        if headers.get("retry-after"):
+            return float(headers["retry-after"])
+    except (TypeError, ValueError):
+        return None
+    return None
+
+
+class RateLimiter:
+    """
+    A process wide limiter for calls to a rate limited API.
+
+    Calls must hold a request from a requests per minute bucket and their
+    estimated tokens from a tokens per minute bucket, and at most
+    ``concurrency_limit`` calls run at once. Both buckets refill continuously.
+
+    The limiter adapts to the API: the remaining requests and tokens reported in
+    response headers are applied to the buckets, and a 429 response blocks every
+    call for its retry-after time and halves the concurrency limit, which then
+    grows back by one for every ``concurrency_limit`` successful calls.
+
+    Waiting calls are queued per key (for example the lead a call is made for) and
+    the keys are served in turn, so a lead with many queued calls does not hold
+    back the others.
+    """
+
+    def __init__(
+        self,
+        requests_per_minute,
+        tokens_per_minute,
+        max_concurrency,
+        clock=time.monotonic,
+    ):
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.max_concurrency = max_concurrency
+        self.concurrency_limit = max_concurrency
+        self.granted = 0
+        self.throttled = 0
+
+        self._clock = clock
+        self._requests = float(requests_per_minute)
+        self._tokens = float(tokens_per_minute)
+        self._updated_at = clock()
+        self._blocked_until = 0.0
+        self._in_flight = 0
+        self._successes = 0
+        self._queues = {}
+        self._rotation = deque()
+        self._condition = threading.Condition()
+
+    def acquire(self, tokens, key=None, timeout=None):
+        """
+        Wait until a call with the estimated tokens may run.
+
+        Args:
+            tokens (int): The estimated tokens of the call.
+            key (str): The fairness key the call is queued under.
+            timeout (float): Maximum seconds to wait. Waits forever when None.
+
+        Returns:
+            bool: True once the call may run, False if the timeout expired.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._condition:
+            waiter = self._enqueue(key)
+            try:
+                while True:
+                    wait = self._wait_time(key, waiter, tokens)
+                    if wait <= 0:
+                        self._grant(key, waiter, tokens)
+                        waiter = None
+                        return True
+                    if deadline is not None:
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            return False
+                        wait = min(wait, remaining)
+                    self._condition.wait(min(wait, POLL_INTERVAL))
+            finally:
+                if waiter is not None:
+                    self._dequeue(key, waiter, rotate=False)
+                    self._condition.notify_all()
+
+    async def async_acquire(self, tokens, key=None):
+        """
+        Wait without blocking the event loop until a call with the estimated tokens
+        may run. Shares the buckets and queues of `acquire`.
+        """
+        with self._condition:
+            waiter = self._enqueue(key)
+        try:
+            while True:
+                with self._condition:
+                    wait = self._wait_time(key, waiter, tokens)
+                    if wait <= 0:
+                        self._grant(key, waiter, tokens)
+                        waiter = None
+                        return True
+                await asyncio.sleep(min(wait, POLL_INTERVAL))
+        finally:
+            if waiter is not None:
+                with self._condition:
+                    self._dequeue(key, waiter, rotate=False)
+                    self._condition.notify_all()
+
+    def release(self, success=True):
+        """
+        Release a call acquired with `acquire` or `async_acquire` once it finished.
+
+        Args:
+            success (bool): Whether the call succeeded. Successful calls grow the
+                concurrency limit back after it was reduced.
+        """
+        with self._condition:
+            self._in_flight -= 1
+            if success and self.concurrency_limit < self.max_concurrency:
+                self._successes += 1
+                if self._successes >= self.concurrency_limit:
+                    self.concurrency_limit += 1
+                    self._successes = 0
+            self._condition.notify_all()
+
+    def record_usage(self, estimated_tokens, used_tokens):
+        """Correct the tokens bucket with the tokens a call actually used."""
+        with self._condition:
+            self._refill()
+            self._tokens = min(
+                self._tokens + estimated_tokens - used_tokens, self.tokens_per_minute
+            )
+            self._condition.notify_all()
+
+    def update_from_headers(self, headers):
+        """
+        Apply the remaining requests and tokens reported by the API to the buckets.
+        """
+        if not headers:
+            return
+        with self._condition:
+            self._refill()
+            for header, attribute in (
+                ("x-ratelimit-remaining-requests", "_requests"),
+                ("x-ratelimit-remaining-tokens", "_tokens"),
+            ):
+                try:
+                    remaining = float(headers[header])
+                except (KeyError, TypeError, ValueError):
+                    continue
+                setattr(self, attribute, min(getattr(self, attribute), remaining))
+
+    def penalize(self, retry_after=None):
+        """
+        Block every call after a 429 response and halve the concurrency limit.
+
+        Args:
+            retry_after (float): The seconds the API asked to wait.
+        """
+        with self._condition:
+            self.throttled += 1
+            self._blocked_until = max(
+                self._blocked_until,
+                self._clock() + (retry_after or DEFAULT_RETRY_AFTER),
+            )
+            self.concurrency_limit = max(1, self.concurrency_limit // 2)
+            self._successes = 0
+
+    def stats(self):
+        """
+        Get the limiter statistics.
+
+        Returns:
+            dict: Remaining requests and tokens, the concurrency limit, calls in
+                flight and waiting, and the granted and throttled counters.
+        """
+        with self._condition:
+            self._refill()
+            return {
+                "requests_available": int(self._requests),
+                "tokens_available": int(self._tokens),
+                "concurrency_limit": self.concurrency_limit,
+                "in_flight": self._in_flight,
+                "waiting": sum(len(queue) for queue in self._queues.values()),
+                "granted": self.granted,
+                "throttled": self.throttled,
+            }
+
+    def _refill(self):
+        now = self._clock()
+        elapsed = max(now - self._updated_at, 0)
+        self._requests = min(
+            self._requests + elapsed * self.requests_per_minute / 60,
+            self.requests_per_minute,
+        )
+        self._tokens = min(
+            self._tokens + elapsed * self.tokens_per_minute / 60,
+            self.tokens_per_minute,
+        )
+        self._updated_at = now
+
+    def _enqueue(self, key):
+        waiter = object()
+        if key not in self._queues:
+            self._queues[key] = deque()
+            self._rotation.append(key)
+        self._queues[key].append(waiter)
+        return waiter
+
+    def _dequeue(self, key, waiter, rotate):
+        queue = self._queues[key]
+        queue.remove(waiter)
+        if not queue:
+            del self._queues[key]
+            self._rotation.remove(key)
+        elif rotate:
+            # A served key goes to the back of the rotation
+            self._rotation.remove(key)
+            self._rotation.append(key)
+
+    def _wait_time(self, key, waiter, tokens):
+        # Seconds until the waiter may run, 0 when it may run now
+        if self._rotation[0] != key or self._queues[key][0] is not waiter:
+            return POLL_INTERVAL
+
+        self._refill()
+        now = self._clock()
+        if now < self._blocked_until:
+            return self._blocked_until - now
+        if self._in_flight >= self.concurrency_limit:
+            return POLL_INTERVAL
+
+        # A call larger than the bucket runs once the bucket is full
+        tokens = min(tokens, self.tokens_per_minute)
+        return max(
+            (1 - self._requests) * 60 / self.requests_per_minute,
+            (tokens - self._tokens) * 60 / self.tokens_per_minute,
+            0,
+        )
+
+    def _grant(self, key, waiter, tokens):
+        self._requests -= 1
+        self._tokens -= min(tokens, self.tokens_per_minute)
+        self._in_flight += 1
+        self.granted += 1
+        self._dequeue(key, waiter, rotate=True)
+        self._condition.notify_all()
@@ -0,0 +1,68 @@
+from rapidfuzz import fuzz, utils as fuzz_utils
+import utils.config as config
+import utils.constants as constants
+
+
+def result_text(result):
+    """Get the text of a search result that is matched against the lead."""
+    return " ".join(
+        str(result.get(field) or "") for field in ("title", "snippet", "link")
+    )
+
+
+def score_result(result, terms):
+    """
+    Score how likely a search result is about the searched lead or company.
+
+    Each term is fuzzy matched against the best matching part of the result
+    title, snippet and link, so names written differently (for example in a
+    profile URL) still match.
+
+    Args:
+        result (dict): The search result.
+        terms (list): The (term, weight) pairs the result should mention, for
+            example the lead name and company.
+
+    Returns:
+        float: The weighted score from 0 to 100.
+    """
+    text = fuzz_utils.default_process(result_text(result))
+    total_weight = sum(weight for term, weight in terms if term)
+    if not text or not total_weight:
+        return 0.0
+
+    score = sum(
+        weight * fuzz.partial_ratio(fuzz_utils.default_process(term), text)
+        for term, weight in terms
+        if term
+    )
+    return score / total_weight
+
+
+def filter_relevant(search_results, terms):
+    """
+    Drop the search results that score below RELEVANCE_MIN_SCORE, so they are
+    not scraped and the chain token budget goes to the likely hits.
+
+    Args:
+        search_results (list): The search results, in search position order.
+        terms (list): The (term, weight) pairs of the search. Results are kept
+            as is when not given.
+
+    Returns:
+        list: The relevant results, in search position order.
+    """
+    if not terms or config.RELEVANCE_MIN_SCORE <= 0:
+        return search_results
+
+    relevant_results = [
+        result
+        for result in search_results
+        if score_result(result, terms) >= config.RELEVANCE_MIN_SCORE
+    ]
+    if len(relevant_results) < len(search_results):
+        constants.LOGGER.info(
+            f"Skipping {len(search_results) - len(relevant_results)} of "
+            f"{len(search_results)} search results below the relevance score"
+        )
+    return relevant_results
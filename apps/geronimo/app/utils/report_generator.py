@@ -1,66 +1,498 @@
-from concurrent.futures import ThreadPoolExecutor
+import asyncio
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+import httpx
 from utils import json_format as json_format
-from utils.llm_caller import run_chain
-import utils.constants as constants
-from utils.prompt_templates import (
-    prompt_template_personal_summary,
-    prompt_template_social_links,
-    prompt_template_company_summary,
-    prompt_template_competitors,
-    prompt_template_news,
+from utils.llm_caller import (
+    async_gather_results,
+    async_invoke_llm_chain,
+    gather_results,
+    invoke_llm_chain,
+    select_results,
 )
+from utils.deadline import NO_DEADLINE
+from utils.dedup import ContentDeduplicator, canonical_url
+from utils.task_planner import plan_batch
+import utils.company_cache as company_cache
+import utils.config as config
+import utils.constants as constants
+
+
+def merge_selected_results(gathered_by_search, task, deduplicator=None):
+    """
+    Merge the results a chain needs from each of its searches, dropping results
+    already found by an earlier search under the same canonical URL.
+
+    Args:
+        gathered_by_search (dict): Search keys mapped to their gathered results.
+        task (dict): The planned chain.
+        deduplicator (ContentDeduplicator): Drops the results whose content is a
+            near duplicate of a result found by an earlier search.
+
+    Returns:
+        list: The scraped items to pass to the chain.
+    """
+    merged = []
+    links = set()
+    for search_key, num_results in task["searches"]:
+        for item in select_results(gathered_by_search[search_key], num_results):
+            link = canonical_url(item.get("link"))
+            if link in links:
+                continue
+            links.add(link)
+            if deduplicator and deduplicator.is_duplicate(item.get("content") or ""):
+                continue
+            merged.append(item)
+    return merged
+
+
+def chain_complete(task, gathered_by_search, deadline):
+    """
+    Check whether a chain ran on the full results of its searches: every search
+    succeeded and scraped content, and the deadline did not cut the scraping
+    short. Only complete chain results are cached (see `company_cache.store_chain`).
+    """
+    if deadline.expired():
+        return False
+    return all(
+        gathered_by_search[search_key]["scraped"]
+        for search_key, _ in task["searches"]
+    )
 
 
-def parallel_chain_caller(lead_info):
+def log_tokens_saved(plan, gathered_by_search, merge_savings):
+    """
+    Log the prompt tokens saved for each lead by dropping duplicate content.
+
+    Args:
+        plan (dict): The plan built by `task_planner.plan_batch`.
+        gathered_by_search (dict): Search keys mapped to their gathered results,
+            holding the tokens saved while scraping each search.
+        merge_savings (dict): Chain signatures mapped to the tokens saved while
+            merging the results of the chain searches.
+    """
+    for index, lead_chains in enumerate(plan["leads"]):
+        signatures = set(lead_chains.values())
+        # A search shared by several chains of the lead is only counted once
+        search_keys = {
+            search_key
+            for signature in signatures
+            if signature in plan["chains"]
+            for search_key, _ in plan["chains"][signature]["searches"]
+        }
+        tokens_saved = sum(
+            gathered_by_search[search_key].get("tokens_saved", 0)
+            for search_key in search_keys
+            if search_key in gathered_by_search
+        ) + sum(merge_savings.get(signature, 0) for signature in signatures)
+        if tokens_saved:
+            constants.LOGGER.info(
+                f"Dropping duplicate content saved {tokens_saved} prompt tokens "
+                f"for lead {index + 1} of {len(plan['leads'])}"
+            )
+
+
+def failed_search(search, error):
+    """
+    Log a search that failed, for example without any result for an obscure lead,
+    and get an empty result for it, so the chains that use it still run and the
+    other leads of a batch are not affected.
+    """
+    constants.LOGGER.error(f"Search for {search['query']} failed: {str(error)}")
+    return {"search_results": [], "scraped": [], "tokens_saved": 0}
+
+
+def section_result(key, result):
+    """
+    Get the result of a report section from the result of the chain that generated
+    it. A company profile chain result holds every company section.
+    """
+    if isinstance(result, dict):
+        return result.get(key)
+    return result
+
+
+def iter_planned_chains(plan, max_workers=None, deadline=None):
+    """
+    Run planned searches and chains in parallel and yield each chain result as soon
+    as it is ready.
+
+    Company chains found in the company cache are yielded first without running.
+    Each distinct search is run and scraped once; a chain is started as soon as
+    all of its searches are done, with the slice of results it needs from each.
+    A failed search gives its chains no results (see `failed_search`).
+    When the deadline is reached, iteration stops with the chains that finished
+    and the remaining work is abandoned.
+
+    Args:
+        plan (dict): The plan built by `task_planner.plan_batch`.
+        max_workers (int): Maximum number of searches and chains running at once.
+        deadline (Deadline): The report deadline, passed down to every stage.
+
+    Yields:
+        tuple: The chain signature and the chain result, in completion order.
+    """
+    yield from company_cache.pop_cached_chains(plan).items()
+
+    chains_by_search = {}
+    waiting_searches = {}
+    for signature, task in plan["chains"].items():
+        waiting_searches[signature] = {search_key for search_key, _ in task["searches"]}
+        for search_key in waiting_searches[signature]:
+            chains_by_search.setdefault(search_key, []).append(signature)
+
+    gathered_by_search = {}
+    merge_savings = {}
+    deadline = deadline or NO_DEADLINE
+    # Not used as a context manager, which would wait for the abandoned work
+    executor = ThreadPoolExecutor(max_workers=max_workers)
+    try:
+        search_futures = {
+            executor.submit(
+                gather_results,
+                search["query"],
+                search["num_results"],
+                deadline=deadline,
+                terms=search.get("terms"),
+                budget_results=search["budget_results"],
+            ): search_key
+            for search_key, search in plan["searches"].items()
+        }
+        chain_futures = {}
+        pending = set(search_futures)
+
+        while pending:
+            done, pending = wait(
+                pending, timeout=deadline.timeout(), return_when=FIRST_COMPLETED
+            )
+            if not done:
+                constants.LOGGER.warning(
+                    f"Report deadline reached with {len(pending)} searches and "
+                    f"chains unfinished, returning the finished sections"
+                )
+                return
+
+            for future in done:
+                if future in search_futures:
+                    search_key = search_futures[future]
+                    try:
+                        gathered_by_search[search_key] = future.result()
+                    except Exception as e:
+                        gathered_by_search[search_key] = failed_search(
+                            plan["searches"][search_key], e
+                        )
+                    for signature in chains_by_search[search_key]:
+                        waiting_searches[signature].discard(search_key)
+                        if waiting_searches[signature]:
+                            continue
+
+                        task = plan["chains"][signature]
+                        deduplicator = ContentDeduplicator()
+                        merged = merge_selected_results(
+                            gathered_by_search, task, deduplicator
+                        )
+                        merge_savings[signature] = deduplicator.tokens_saved
+                        chain_future = executor.submit(
+                            invoke_llm_chain,
+                            task["name"],
+                            task["lead_info"],
+                            task["prompt"],
+                            merged,
+                            task.get("json_keys"),
+                            deadline=deadline,
+                        )
+                        chain_futures[chain_future] = signature
+                        pending.add(chain_future)
+                else:
+                    signature = chain_futures[future]
+                    task = plan["chains"][signature]
+                    result = future.result()
+                    company_cache.store_chain(
+                        task,
+                        result,
+                        chain_complete(task, gathered_by_search, deadline),
+                    )
+                    yield signature, result
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+        log_tokens_saved(plan, gathered_by_search, merge_savings)
+
+
+def run_planned_chains(plan, on_chain_complete=None, max_workers=None):
+    """
+    Run planned searches and chains in parallel.
+
+    Args:
+        plan (dict): The plan built by `task_planner.plan_batch`.
+        on_chain_complete (callable): Optional callback invoked with the chain
+            signature as soon as that chain finishes.
+        max_workers (int): Maximum number of searches and chains running at once.
+
+    Returns:
+        dict: Chain signatures mapped to the chain results.
+    """
+    results = {}
+    for signature, result in iter_planned_chains(plan, max_workers):
+        results[signature] = result
+        if on_chain_complete:
+            on_chain_complete(signature)
+
+    return results
+
+
+def iter_chain_results(lead_info, deadline=None):
+    """
+    Run all chains of a lead in parallel and yield each result as soon as it is
+    ready, until the deadline.
+
+    Yields:
+        tuple: The chain key and the raw chain result, in completion order.
+    """
+    plan = plan_batch([lead_info])
+    sections = {}
+    for key, signature in plan["leads"][0].items():
+        sections.setdefault(signature, []).append(key)
+
+    for signature, result in iter_planned_chains(plan, deadline=deadline):
+        for key in sections[signature]:
+            yield key, section_result(key, result)
+
+
+def iter_report_sections(lead_info, deadline=None):
+    """
+    Generate the report of a lead section by section. Sections that are not ready
+    by the deadline are not generated.
+
+    Yields:
+        tuple: The chain key and the formatted section, in completion order.
+    """
+    for key, result in iter_chain_results(lead_info, deadline):
+        yield key, format_section(key, {key: result})
+
+
+def parallel_chain_caller(lead_info, on_section_complete=None, deadline=None):
     """
     Run all chains in parallel to generate insights.
+
+    Args:
+        lead_info (LeadInfo): The lead details.
+        on_section_complete (callable): Optional callback invoked with the chain key
+            as soon as that chain finishes.
+        deadline (Deadline): The report deadline. Sections that are not ready by
+            then get their default value.
     """
-    name = f"{lead_info.first_name} {lead_info.last_name}"
-    tasks = {
-        constants.PROFESSIONAL_SUMMARY: {
-            "query": f"{name} in {lead_info.company}",
-            "prompt": prompt_template_personal_summary,
-            "num_results": 8,
-        },
-        constants.SOCIAL_MEDIA_LINKS: {
-            "query": f"{name} in {lead_info.company}",
-            "prompt": prompt_template_social_links,
-            "num_results": 5,
-        },
-        constants.COMPANY_SUMMARY: {
-            "query": f"{lead_info.company} in {lead_info.country} overview",
-            "prompt": prompt_template_company_summary,
-            "num_results": 5,
-        },
-        constants.COMPANY_COMPETITORS: {
-            "query": f"{lead_info.company} competitors",
-            "prompt": prompt_template_competitors,
-            "num_results": 4,
-        },
-        constants.COMPANY_NEWS: {
-            "query": f"{lead_info.company} company in {lead_info.country} recent news",
-            "prompt": prompt_template_news,
-            "num_results": 4,
-        },
-    }
+    results = {}
+    for key, result in iter_chain_results(lead_info, deadline):
+        results[key] = result
+        if on_section_complete:
+            on_section_complete(key)
+
+    return format_response(results)
+
+
+async def async_iter_planned_chains(plan, client, deadline=None):
+    """
+    Run planned searches and chains concurrently on the event loop and yield each
+    chain result as soon as it is ready, until the deadline.
+
+    Args:
+        plan (dict): The plan built by `task_planner.plan_batch`.
+        client (httpx.AsyncClient): The shared HTTP client.
+        deadline (Deadline): The report deadline, passed down to every stage.
+
+    Yields:
+        tuple: The chain signature and the chain result, in completion order.
+    """
+    for signature, result in company_cache.pop_cached_chains(plan).items():
+        yield signature, result
+
+    deadline = deadline or NO_DEADLINE
 
-    with ThreadPoolExecutor() as executor:
-        futures = {
-            key: executor.submit(
-                run_chain,
-                name,
-                lead_info,
-                data["query"],
-                data["prompt"],
-                data["num_results"],
+    async def gather(search):
+        try:
+            return await async_gather_results(
+                search["query"],
+                search["num_results"],
+                client,
+                deadline=deadline,
+                terms=search.get("terms"),
+                budget_results=search["budget_results"],
             )
-            for key, data in tasks.items()
+        except Exception as e:
+            return failed_search(search, e)
+
+    searches = {
+        search_key: asyncio.ensure_future(gather(search))
+        for search_key, search in plan["searches"].items()
+    }
+
+    merge_savings = {}
+
+    async def run(signature, task):
+        gathered_by_search = {
+            search_key: await searches[search_key]
+            for search_key, _ in task["searches"]
         }
-        results = {key: future.result() for key, future in futures.items()}
+        deduplicator = ContentDeduplicator()
+        merged = merge_selected_results(gathered_by_search, task, deduplicator)
+        merge_savings[signature] = deduplicator.tokens_saved
+        result = await async_invoke_llm_chain(
+            task["name"],
+            task["lead_info"],
+            task["prompt"],
+            merged,
+            task.get("json_keys"),
+            deadline=deadline,
+        )
+        company_cache.store_chain(
+            task, result, chain_complete(task, gathered_by_search, deadline)
+        )
+        return signature, result
+
+    chains = [
+        asyncio.ensure_future(run(signature, task))
+        for signature, task in plan["chains"].items()
+    ]
+    try:
+        for future in asyncio.as_completed(chains, timeout=deadline.timeout()):
+            yield await future
+    except asyncio.TimeoutError:
+        constants.LOGGER.warning(
+            "Report deadline reached with chains unfinished, "
+            "returning the finished sections"
+        )
+    finally:
+        for task in [*searches.values(), *chains]:
+            task.cancel()
+        log_tokens_saved(
+            plan,
+            {
+                search_key: search.result()
+                for search_key, search in searches.items()
+                if search.done() and not search.cancelled() and not search.exception()
+            },
+            merge_savings,
+        )
+
+
+async def async_parallel_chain_caller(
+    lead_info, client=None, on_section_complete=None, deadline=None
+):
+    """
+    Run all chains concurrently on the event loop to generate insights.
+
+    Args:
+        lead_info (LeadInfo): The lead details.
+        client (httpx.AsyncClient): The shared HTTP client. A client is created for
+            the call when not given.
+        on_section_complete (callable): Optional callback invoked with the chain key
+            as soon as that chain finishes.
+        deadline (Deadline): The report deadline. Sections that are not ready by
+            then get their default value.
+    """
+    if client is None:
+        async with httpx.AsyncClient() as client:
+            return await async_parallel_chain_caller(
+                lead_info, client, on_section_complete, deadline
+            )
+
+    plan = plan_batch([lead_info])
+    sections = {}
+    for key, signature in plan["leads"][0].items():
+        sections.setdefault(signature, []).append(key)
+
+    results = {}
+    async for signature, result in async_iter_planned_chains(
+        plan, client, deadline
+    ):
+        for key in sections[signature]:
+            results[key] = section_result(key, result)
+            if on_section_complete:
+                on_section_complete(key)
 
     return format_response(results)
 
 
+def batch_chain_caller(lead_infos, on_lead_complete=None):
+    """
+    Generate reports for a batch of leads, running shared chains only once.
+
+    Args:
+        lead_infos (list): The leads to generate reports for.
+        on_lead_complete (callable): Optional callback invoked with the index of a
+            lead as soon as all of its chains have finished.
+
+    Returns:
+        list: The formatted report of every lead, in the input order.
+    """
+    plan = plan_batch(lead_infos)
+
+    # Track which leads are still waiting for each chain
+    waiting_leads = {signature: [] for signature in plan["chains"]}
+    remaining_chains = []
+    for index, lead_chains in enumerate(plan["leads"]):
+        for signature in lead_chains.values():
+            waiting_leads[signature].append(index)
+        remaining_chains.append(len(lead_chains))
+
+    def on_chain_complete(signature):
+        for index in waiting_leads[signature]:
+            remaining_chains[index] -= 1
+            if remaining_chains[index] == 0 and on_lead_complete:
+                on_lead_complete(index)
+
+    results = run_planned_chains(
+        plan, on_chain_complete, max_workers=config.BATCH_MAX_WORKERS
+    )
+
+    return [
+        format_response(
+            {
+                key: section_result(key, results[signature])
+                for key, signature in lead_chains.items()
+            }
+        )
+        for lead_chains in plan["leads"]
+    ]
+
+
+def format_section(key, response_data):
+    """
+    Format a single section of the response data.
+    Args:
+        key (str): The chain key of the section.
+        response_data (dict): The response data from the chains.
+    Returns:
+        The formatted section.
+    """
+    value = response_data.get(key)
+    # Structured results of the combined company chain need no parsing
+    if isinstance(value, (list, dict)):
+        return value
+    # Missing, null or wrongly typed values get the section default
+    if not isinstance(value, str):
+        value = None
+
+    if key == constants.PROFESSIONAL_SUMMARY:
+        return value if value is not None else "No Personal Detail Available"
+    if key == constants.SOCIAL_MEDIA_LINKS:
+        return json_format.format_json_string(value)
+    if key == constants.COMPANY_SUMMARY:
+        return value if value is not None else "No Company Detail Available"
+    if key == constants.COMPANY_COMPETITORS:
+        return list(
+            filter(
+                None,
+                [
+                    competitor.strip()
+                    for competitor in (value or "").replace("\n", ",").split(",")
+                ],
+            )
+        )
+    if key == constants.COMPANY_NEWS:
+        return json_format.format_json_string(value)
+    raise ValueError(f"Unknown report section: {key}")
+
+
 def format_response(response_data):
     """
     Format the response data into a JSON object.
@@ -70,34 +502,4 @@ def format_response(response_data):
         dict: The formatted JSON object.
     """
 
-    return {
-        constants.PROFESSIONAL_SUMMARY: response_data.get(
-            constants.PROFESSIONAL_SUMMARY, "No Personal Detail Available"
-        ),
-        constants.SOCIAL_MEDIA_LINKS: json_format.format_json_string(
-            response_data.get(constants.SOCIAL_MEDIA_LINKS, None)
-        ),
-        constants.COMPANY_SUMMARY: response_data.get(
-            constants.COMPANY_SUMMARY, "No Company Detail Available"
-        ),
-        constants.COMPANY_COMPETITORS: (
-            response_data.get(constants.COMPANY_COMPETITORS, [])
-            if isinstance(response_data.get(constants.COMPANY_COMPETITORS), list)
-            else list(
-                filter(
-                    None,
-                    [
-                        competitor.strip()
-                        for competitor in response_data.get(
-                            constants.COMPANY_COMPETITORS, ""
-                        )
-                        .replace("\n", ",")
-                        .split(",")
-                    ],
-                )
-            )
-        ),
-        constants.COMPANY_NEWS: json_format.format_json_string(
-            response_data.get(constants.COMPANY_NEWS, None)
-        ),
-    }
+    return {key: format_section(key, response_data) for key in constants.CHAIN_KEYS}
@@ -0,0 +1,112 @@
+import hashlib
+import json
+import threading
+import utils.config as config
+from utils.sqlite_cache import SQLiteCache
+from utils.task_planner import normalize_text
+
+# Fetch results that mean the page could not be scraped, never cached
+FAILED_FETCHES = {"", " "}
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_scrape_cache():
+    """Get the shared scraped page cache, creating it on first use."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = SQLiteCache(
+                config.CACHE_PATH,
+                namespace="scrape",
+                max_entries=config.SCRAPE_CACHE_MAX_ENTRIES,
+                max_bytes=config.SCRAPE_CACHE_MAX_BYTES,
+            )
+        return _cache
+
+
+def page_key(url):
+    return f"page|{url}"
+
+
+def content_key(raw_content, query, max_tokens):
+    """
+    Build the cache key of the content passed to a chain for a scraped page.
+
+    The key is a hash of the page text, the query and the token share, so the
+    entry is replaced as soon as the page changes.
+    """
+    payload = json.dumps([raw_content, normalize_text(query), max_tokens])
+    return "content|" + hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def get_cached_page(url):
+    """
+    Get the cached text of a page.
+
+    Returns:
+        dict: The page ``content``, its ``etag`` and ``last_modified`` validators
+            and whether it is still ``fresh`` (younger than SCRAPE_CACHE_FRESH_TTL),
+            or None on a miss or when caching is off.
+    """
+    if not config.CACHE_ENABLED:
+        return None
+    entry = get_scrape_cache().get_entry(page_key(url))
+    if entry is None:
+        return None
+    return {**entry["value"], "fresh": entry["age"] <= config.SCRAPE_CACHE_FRESH_TTL}
+
+
+def revalidation_headers(cached_page):
+    """
+    Build the conditional request headers that revalidate a cached page.
+
+    Returns:
+        dict: The If-None-Match and If-Modified-Since headers the page supports.
+    """
+    headers = {}
+    if cached_page and cached_page.get("etag"):
+        headers["If-None-Match"] = cached_page["etag"]
+    if cached_page and cached_page.get("last_modified"):
+        headers["If-Modified-Since"] = cached_page["last_modified"]
+    return headers
+
+
+def store_page(url, content, headers):
+    """Cache the text of a page with its validators. Failed fetches are not cached."""
+    if not config.CACHE_ENABLED or content in FAILED_FETCHES:
+        return
+    get_scrape_cache().set(
+        page_key(url),
+        {
+            "content": content,
+            "etag": headers.get("ETag"),
+            "last_modified": headers.get("Last-Modified"),
+        },
+    )
+
+
+def refresh_page(url):
+    """Mark a cached page as fresh after the server answered 304 Not Modified."""
+    if config.CACHE_ENABLED:
+        get_scrape_cache().touch(page_key(url))
+
+
+def get_cached_content(raw_content, query, max_tokens):
+    """
+    Get the cached chain content of a page, for example its summary.
+
+    Returns:
+        str: The cached content, or None on a miss or when caching is off.
+    """
+    if not config.CACHE_ENABLED:
+        return None
+    return get_scrape_cache().get(content_key(raw_content, query, max_tokens))
+
+
+def store_content(raw_content, query, max_tokens, content):
+    """Cache the chain content of a page. Empty content is not cached."""
+    if not config.CACHE_ENABLED or not content:
+        return
+    get_scrape_cache().set(content_key(raw_content, query, max_tokens), content)
@@ -0,0 +1,197 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+import utils.constants as constants
+
+
+class SQLiteCache:
+    """
+    A persistent key-value cache stored in a local SQLite database.
+
+    Values are stored as JSON. Every entry records when it was written, so callers
+    can read it with their own TTL, and when it was last read, so the least
+    recently used entries are evicted first once the namespace grows beyond
+    ``max_entries`` entries or ``max_bytes`` bytes.
+    """
+
+    def __init__(self, path, namespace, max_entries=None, max_bytes=None):
+        self.path = path
+        self.namespace = namespace
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._connection = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        with self._lock, self._connection:
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute(
+                """
+                CREATE TABLE IF NOT EXISTS cache (
+                    namespace TEXT NOT NULL,
+                    key TEXT NOT NULL,
+                    value TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    created_at REAL NOT NULL,
+                    accessed_at REAL NOT NULL,
+                    PRIMARY KEY (namespace, key)
+                )
+                """
+            )
+            self._connection.execute(
+                "CREATE INDEX IF NOT EXISTS cache_lru ON cache (namespace, accessed_at)"
+            )
+
+    def get(self, key, ttl=None):
+        """
+        Get a value from the cache.
+
+        Args:
+            key (str): The cache key.
+            ttl (float): Maximum age of the entry in seconds. No limit when None.
+
+        Returns:
+            The cached value, or None on a miss or when the entry is too old.
+        """
+        entry = self._read(key)
+        fresh = entry is not None and (ttl is None or entry["age"] <= ttl)
+        self._count(fresh)
+        return entry["value"] if fresh else None
+
+    def get_entry(self, key):
+        """
+        Get a cache entry whatever its age, for callers that can revalidate old
+        entries. A found entry is counted as a hit.
+
+        Returns:
+            dict: The cached ``value`` and its ``age`` in seconds, or None on a miss.
+        """
+        entry = self._read(key)
+        self._count(entry is not None)
+        return entry
+
+    def touch(self, key):
+        """Reset the age of an entry after it was revalidated."""
+        now = time.time()
+        try:
+            with self._lock, self._connection:
+                self._connection.execute(
+                    """
+                    UPDATE cache SET created_at = ?, accessed_at = ?
+                    WHERE namespace = ? AND key = ?
+                    """,
+                    (now, now, self.namespace, key),
+                )
+        except sqlite3.Error as e:
+            constants.LOGGER.error(f"Cache write failed ({self.namespace}): {str(e)}")
+
+    def set(self, key, value):
+        """
+        Store a value in the cache and evict the least recently used entries if the
+        namespace grew beyond its limits.
+        """
+        now = time.time()
+        serialized = json.dumps(value)
+        try:
+            with self._lock, self._connection:
+                self._connection.execute(
+                    """
+                    INSERT OR REPLACE INTO cache
+                        (namespace, key, value, size, created_at, accessed_at)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                    """,
+                    (self.namespace, key, serialized, len(serialized), now, now),
+                )
+                self._evict()
+        except sqlite3.Error as e:
+            constants.LOGGER.error(f"Cache write failed ({self.namespace}): {str(e)}")
+
+    def stats(self):
+        """
+        Get the cache statistics.
+
+        Returns:
+            dict: Hit and miss counters, hit rate, number of entries and total size.
+        """
+        with self._lock:
+            entries, size = self._connection.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM cache WHERE namespace = ?",
+                (self.namespace,),
+            ).fetchone()
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "entries": entries,
+                "bytes": size,
+            }
+
+    def _read(self, key):
+        now = time.time()
+        try:
+            with self._lock, self._connection:
+                row = self._connection.execute(
+                    "SELECT value, created_at FROM cache WHERE namespace = ? AND key = ?",
+                    (self.namespace, key),
+                ).fetchone()
+                if row is None:
+                    return None
+
+                self._connection.execute(
+                    "UPDATE cache SET accessed_at = ? WHERE namespace = ? AND key = ?",
+                    (now, self.namespace, key),
+                )
+            return {"value": json.loads(row[0]), "age": now - row[1]}
+        except sqlite3.Error as e:
+            constants.LOGGER.error(f"Cache read failed ({self.namespace}): {str(e)}")
+            return None
+
+    def _count(self, hit):
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def _evict(self):
+        # Caller must hold the lock and an open transaction
+        if self.max_entries is not None:
+            self._connection.execute(
+                """
+                DELETE FROM cache WHERE namespace = ? AND key IN (
+                    SELECT key FROM cache WHERE namespace = ?
+                    ORDER BY accessed_at DESC LIMIT -1 OFFSET ?
+                )
+                """,
+                (self.namespace, self.namespace, self.max_entries),
+            )
+
+        if self.max_bytes is not None:
+            total = self._connection.execute(
+                "SELECT COALESCE(SUM(size), 0) FROM cache WHERE namespace = ?",
+                (self.namespace,),
+            ).fetchone()[0]
+            if total <= self.max_bytes:
+                return
+
+            rows = self._connection.execute(
+                "SELECT key, size FROM cache WHERE namespace = ? ORDER BY accessed_at",
+                (self.namespace,),
+            ).fetchall()
+            evicted = []
+            for key, size in rows:
+                if total <= self.max_bytes:
+                    break
+                evicted.append((self.namespace, key))
+                total -= size
+            self._connection.executemany(
+                "DELETE FROM cache WHERE namespace = ? AND key = ?", evicted
+            )
@@ -0,0 +1,41 @@
+import threading
+
+
+class StageTimer:
+    """
+    Thread safe totals of the time spent in each stage of a pipeline, for
+    example fetching and parsing scraped pages.
+    """
+
+    def __init__(self):
+        self._stages = {}
+        self._lock = threading.Lock()
+
+    def record(self, stage, seconds):
+        """Record one run of a stage that took the given seconds."""
+        with self._lock:
+            timing = self._stages.setdefault(
+                stage, {"count": 0, "total_seconds": 0.0, "max_seconds": 0.0}
+            )
+            timing["count"] += 1
+            timing["total_seconds"] += seconds
+            timing["max_seconds"] = max(timing["max_seconds"], seconds)
+
+    def stats(self):
+        """
+        Get the timing statistics.
+
+        Returns:
+            dict: For every stage, the number of runs and the total, mean and
+                maximum seconds.
+        """
+        with self._lock:
+            return {
+                stage: {
+                    "count": timing["count"],
+                    "total_seconds": round(timing["total_seconds"], 4),
+                    "mean_seconds": round(timing["total_seconds"] / timing["count"], 4),
+                    "max_seconds": round(timing["max_seconds"], 4),
+                }
+                for stage, timing in self._stages.items()
+            }
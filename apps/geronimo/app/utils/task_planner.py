@@ -0,0 +1,210 @@
+import utils.config as config
+import utils.constants as constants
+from utils.prompt_templates import (
+    prompt_template_personal_summary,
+    prompt_template_social_links,
+    prompt_template_company_summary,
+    prompt_template_competitors,
+    prompt_template_news,
+    prompt_template_company_profile,
+)
+
+# Prompt variables that are filled in by the chain itself, not by the lead
+CHAIN_FILLED_VARIABLES = {"google_results", "date"}
+
+
+def lead_name(lead_info):
+    """Get the full name of the lead."""
+    return f"{lead_info.first_name} {lead_info.last_name}"
+
+
+def build_chain_inputs(name, lead_info):
+    """
+    Build the lead related inputs passed to every chain prompt.
+    """
+    return {
+        "name": name,
+        "company": lead_info.company,
+        "position": lead_info.job_title,
+        "country": lead_info.country,
+    }
+
+
+def build_chain_tasks(lead_info):
+    """
+    Build the chain tasks needed to generate the report of a lead.
+
+    Returns:
+        dict: Chain keys mapped to their query, prompt, number of results and the
+            weighted terms that relevant search results mention.
+    """
+    name = lead_name(lead_info)
+    person_terms = [(name, 2), (lead_info.company, 1)]
+    company_terms = [(lead_info.company, 2), (lead_info.country, 1)]
+    return {
+        constants.PROFESSIONAL_SUMMARY: {
+            "query": f"{name} in {lead_info.company}",
+            "prompt": prompt_template_personal_summary,
+            "num_results": 8,
+            "terms": person_terms,
+        },
+        constants.SOCIAL_MEDIA_LINKS: {
+            "query": f"{name} in {lead_info.company}",
+            "prompt": prompt_template_social_links,
+            "num_results": 5,
+            "terms": person_terms,
+        },
+        constants.COMPANY_SUMMARY: {
+            "query": f"{lead_info.company} in {lead_info.country} overview",
+            "prompt": prompt_template_company_summary,
+            "num_results": 5,
+            "terms": company_terms,
+        },
+        constants.COMPANY_COMPETITORS: {
+            "query": f"{lead_info.company} competitors",
+            "prompt": prompt_template_competitors,
+            "num_results": 4,
+            "terms": [(lead_info.company, 1)],
+        },
+        constants.COMPANY_NEWS: {
+            "query": f"{lead_info.company} company in {lead_info.country} recent news",
+            "prompt": prompt_template_news,
+            "num_results": 4,
+            "terms": company_terms,
+        },
+    }
+
+
+def combine_company_tasks(tasks):
+    """
+    Replace the company level tasks with a single company profile task.
+
+    The profile task runs one LLM call over the merged results of the company
+    searches and returns all company sections as one JSON object.
+
+    Returns:
+        dict: Chain keys mapped to their tasks.
+    """
+    company_tasks = [tasks.pop(section) for section in constants.COMPANY_SECTIONS]
+    tasks[constants.COMPANY_PROFILE] = {
+        "searches": [task_searches(task)[0] for task in company_tasks],
+        "prompt": prompt_template_company_profile,
+        "sections": constants.COMPANY_SECTIONS,
+        "json_keys": constants.COMPANY_SECTIONS,
+    }
+    return tasks
+
+
+def task_searches(task):
+    """
+    Get the searches a task needs.
+
+    Returns:
+        list: The query, number of results and relevance terms of each search.
+    """
+    return task.get("searches") or [
+        {
+            "query": task["query"],
+            "num_results": task["num_results"],
+            "terms": task.get("terms"),
+        }
+    ]
+
+
+def normalize_text(value):
+    """Normalize a value for use in cache and deduplication keys."""
+    return " ".join(str(value or "").split()).casefold()
+
+
+def chain_signature(section, lead_info, task):
+    """
+    Build a key that identifies the work done by a chain.
+
+    Two chains with the same signature issue the same search and render the same
+    prompt, so they produce the same result. Only the prompt variables that the
+    template actually uses are part of the signature, which lets company level
+    chains be shared across every lead of the same company.
+    """
+    inputs = build_chain_inputs(lead_name(lead_info), lead_info)
+    used_inputs = tuple(
+        (variable, normalize_text(inputs.get(variable)))
+        for variable in sorted(task["prompt"].input_variables)
+        if variable not in CHAIN_FILLED_VARIABLES
+    )
+    searches = tuple(
+        (normalize_text(search["query"]), search["num_results"])
+        for search in task_searches(task)
+    )
+    return (section, searches, used_inputs)
+
+
+def plan_batch(lead_infos):
+    """
+    Plan the chains needed for a batch of leads, running each distinct chain once.
+
+    Chains that issue the same query share a single search, run with the largest
+    number of results any of them needs, and a single scrape of those results.
+    The scrape splits the chain token budget across the smallest number of
+    results any of them needs, so every chain gets its full budget.
+    With COMBINED_COMPANY_CALL, the company sections of a lead are planned as a
+    single company profile chain over all of the company searches.
+
+    Args:
+        lead_infos (list): The leads to generate reports for.
+
+    Returns:
+        dict: ``searches`` maps each distinct query to the search to run,
+            ``chains`` maps each distinct chain signature to the task to run, with
+            the search keys and number of results it uses in ``searches``, and
+            ``leads`` maps, for every lead, each chain key to its chain signature.
+    """
+    searches = {}
+    chains = {}
+    leads = []
+
+    for lead_info in lead_infos:
+        lead_chains = {}
+        tasks = build_chain_tasks(lead_info)
+        if config.COMBINED_COMPANY_CALL:
+            tasks = combine_company_tasks(tasks)
+
+        for section, task in tasks.items():
+            signature = chain_signature(section, lead_info, task)
+            if signature not in chains:
+                chain_searches = []
+                for task_search in task_searches(task):
+                    search_key = normalize_text(task_search["query"])
+                    search = searches.setdefault(
+                        search_key,
+                        {
+                            "query": task_search["query"],
+                            "num_results": 0,
+                            "budget_results": task_search["num_results"],
+                            "terms": task_search.get("terms"),
+                        },
+                    )
+                    search["num_results"] = max(
+                        search["num_results"], task_search["num_results"]
+                    )
+                    search["budget_results"] = min(
+                        search["budget_results"], task_search["num_results"]
+                    )
+                    chain_searches.append((search_key, task_search["num_results"]))
+
+                chains[signature] = {
+                    **task,
+                    "section": section,
+                    "name": lead_name(lead_info),
+                    "lead_info": lead_info,
+                    "searches": chain_searches,
+                }
+            for report_section in task.get("sections", [section]):
+                lead_chains[report_section] = signature
+        leads.append(lead_chains)
+
+    constants.LOGGER.info(
+        f"Planned {len(chains)} distinct chains and {len(searches)} distinct searches "
+        f"for {len(lead_infos)} leads "
+        f"({len(lead_infos) * len(constants.CHAIN_KEYS)} without deduplication)"
+    )
+    return {"searches": searches, "chains": chains, "leads": leads}
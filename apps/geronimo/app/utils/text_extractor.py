@@ -0,0 +1,125 @@
+import re
+import threading
+from lxml import etree
+import utils.constants as constants
+
+# Elements whose text is never part of the page content
+SKIPPED_TAGS = {"script", "style", "noscript", "template"}
+
+_TAGS = set(constants.TAGS)
+_parsers = threading.local()
+
+
+def _get_parser(encoding):
+    # lxml parsers are not thread safe, keep one per thread and encoding
+    if not hasattr(_parsers, "by_encoding"):
+        _parsers.by_encoding = {}
+    if encoding not in _parsers.by_encoding:
+        _parsers.by_encoding[encoding] = etree.HTMLParser(
+            encoding=encoding, remove_comments=True, remove_pis=True
+        )
+    return _parsers.by_encoding[encoding]
+
+
+def decode_markup(body, content_type):
+    """
+    Decode a page body with the charset declared in its Content-Type header.
+
+    Returns:
+        str | bytes: The decoded markup, or the raw bytes when no charset is
+            declared so the HTML parser can detect the encoding from the document.
+    """
+    match = re.search(r"charset=[\"']?([\w.:-]+)", content_type or "", re.I)
+    if not match:
+        return body
+    try:
+        return body.decode(match.group(1), errors="replace")
+    except LookupError:
+        return body
+
+
+def parse_markup(markup):
+    """
+    Parse page markup with the lxml HTML parser.
+
+    Args:
+        markup (str | bytes): The page markup. Bytes are decoded with the charset
+            declared in the document, or a detected one.
+
+    Returns:
+        lxml.etree._Element: The root element, or None when there is no markup.
+    """
+    if isinstance(markup, str):
+        markup = markup.encode("utf-8")
+        parser = _get_parser("utf-8")
+    else:
+        parser = _get_parser(None)
+
+    if not markup or not markup.strip():
+        return None
+    return etree.fromstring(markup, parser)
+
+
+def extract_blocks(root):
+    """
+    Extract the text blocks of the scrapable tags in a single pass over the tree.
+
+    Every text node is emitted once, as part of the innermost scrapable element
+    that contains it. Text of an element that is split by a nested scrapable
+    element gives one block before and one block after it, so the blocks stay in
+    document order. Whitespace inside a block is collapsed.
+
+    Args:
+        root (lxml.etree._Element): The parsed document.
+
+    Returns:
+        list: The non empty text blocks.
+    """
+    blocks = []
+    buffer = []
+    tag_depth = 0
+    skip_depth = 0
+
+    def flush():
+        text = " ".join("".join(buffer).split())
+        if text:
+            blocks.append(text)
+        buffer.clear()
+
+    for event, element in etree.iterwalk(root, events=("start", "end")):
+        tag = element.tag
+        if event == "start":
+            if tag in _TAGS:
+                flush()
+                tag_depth += 1
+            elif tag in SKIPPED_TAGS:
+                skip_depth += 1
+            if tag_depth and not skip_depth and element.text:
+                buffer.append(element.text)
+        else:
+            if tag in _TAGS:
+                flush()
+                tag_depth -= 1
+            elif tag in SKIPPED_TAGS:
+                skip_depth -= 1
+            if tag_depth and not skip_depth and element.tail:
+                buffer.append(element.tail)
+
+    flush()
+    return blocks
+
+
+def extract_text(markup):
+    """
+    Extract the text of the scrapable tags from a web page.
+
+    Args:
+        markup (str | bytes): The web page markup.
+
+    Returns:
+        str: The text blocks separated by new lines, or "none" when the page has
+            no text.
+    """
+    root = parse_markup(markup)
+    content = "\n".join(extract_blocks(root)) if root is not None else ""
+    return content if content else "none"
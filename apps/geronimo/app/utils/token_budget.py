@@ -0,0 +1,94 @@
+import functools
+import tiktoken
+import utils.config as config
+import utils.constants as constants
+
+
+class CharacterEncoding:
+    """
+    Approximate encoding that counts a token every ``chars_per_token`` characters.
+
+    Used when the tiktoken encoding cannot be loaded, for example when its files
+    cannot be downloaded.
+    """
+
+    def __init__(self, chars_per_token=4):
+        self.chars_per_token = chars_per_token
+
+    def encode(self, text, disallowed_special=()):
+        return [
+            text[start : start + self.chars_per_token]
+            for start in range(0, len(text), self.chars_per_token)
+        ]
+
+    def decode(self, tokens):
+        return "".join(tokens)
+
+
+@functools.lru_cache(maxsize=None)
+def get_encoding():
+    """Get the tokenizer of the model, falling back to an approximate encoding."""
+    try:
+        return tiktoken.get_encoding(config.TOKEN_ENCODING)
+    except Exception as e:
+        constants.LOGGER.warning(
+            f"Unable to load the {config.TOKEN_ENCODING} encoding, "
+            f"approximating token counts: {str(e)}"
+        )
+        return CharacterEncoding()
+
+
+def encode(text):
+    """Encode text to tokens. Special token markers in scraped text are plain text."""
+    return get_encoding().encode(text, disallowed_special=())
+
+
+def count_tokens(text):
+    """Count the tokens of a text."""
+    return len(encode(text)) if text else 0
+
+
+def truncate_to_tokens(text, max_tokens):
+    """Truncate a text to at most max_tokens tokens."""
+    tokens = encode(text)
+    if len(tokens) <= max_tokens:
+        return text
+    return get_encoding().decode(tokens[:max_tokens])
+
+
+def split_into_token_chunks(text, chunk_tokens, overlap_tokens):
+    """
+    Split a text into chunks of chunk_tokens tokens, overlapping by overlap_tokens.
+    """
+    tokens = encode(text)
+    step = max(chunk_tokens - overlap_tokens, 1)
+    # The last chunk must add tokens beyond the overlap with the previous one
+    end = max(len(tokens) - overlap_tokens, 1) if tokens else 0
+    return [
+        get_encoding().decode(tokens[start : start + chunk_tokens])
+        for start in range(0, end, step)
+    ]
+
+
+def position_shares(token_budget, num_results, budget_results=None):
+    """
+    Split a token budget across search results by their search position.
+
+    The result at position ``i`` gets a share proportional to ``1 / (i + 1)``, so
+    the top results, which are the most relevant, can keep more of their content.
+
+    Args:
+        token_budget (int): Tokens available for all results of a chain.
+        num_results (int): The number of results.
+        budget_results (int): The number of top results the budget is split
+            across, when a search is shared by chains that use fewer results than
+            it returns. The results past them get the same share by position, so
+            every chain gets its full budget and the chains using more results
+            get more. Defaults to all results.
+
+    Returns:
+        list: The token share of each result, in search position order.
+    """
+    weights = [1 / (position + 1) for position in range(num_results)]
+    total_weight = sum(weights[:budget_results])
+    return [int(token_budget * weight / total_weight) for weight in weights]
@@ -1,19 +1,54 @@
+import asyncio
 import concurrent.futures
-import requests
-from bs4 import BeautifulSoup
+import time
+import httpx
+import utils.extractive_summary as extractive_summary
+import utils.http_client as http_client
 import utils.llm_caller as llm_caller
+import utils.passage_ranker as passage_ranker
+import utils.scrape_cache as scrape_cache
+import utils.parse_pool as parse_pool
+import utils.token_budget as token_budget
+from utils.deadline import NO_DEADLINE, Deadline
+from utils.stage_timer import StageTimer
 import utils.constants as constants
-from requests.adapters import HTTPAdapter
-from urllib3.util.retry import Retry
+import utils.config as config
 
+# Bound the number of pages fetched at once by the async pipeline
+SCRAPE_SEMAPHORE = asyncio.Semaphore(config.ASYNC_SCRAPE_CONCURRENCY)
 
-def parallel_scrape_caller(search_results, query, num_result):
+# Time spent fetching and parsing pages, reported by /stats
+STAGE_TIMER = StageTimer()
+
+
+def parallel_scrape_caller(
+    search_results,
+    query,
+    num_result,
+    deadline=None,
+    deduplicator=None,
+    budget_results=None,
+):
     """
     Perform web scraping in parallel for the given search query's results with a timeout mechanism.
 
+    The chain token budget is split across the results by search position, and
+    only pages that overflow their share are summarized. Results are returned
+    after SCRAPE_TIMEOUT or at the deadline without waiting for the pages still
+    being scraped, which are cancelled or left to hit their own page timeout.
+    With SCRAPE_QUORUM, results are returned as soon as the quorum is reached
+    (see `wait_for_quorum`). Pages that are near duplicates of a page already
+    scraped are dropped before they are summarized.
+
     Args:
         search_results_dict (dict): A dictionary containing search queries as keys and lists of search results as values.
         query (str): The search query.
+        deadline (Deadline): The report deadline, which bounds the scraping timeout.
+        deduplicator (ContentDeduplicator): Tracks the content scraped for the
+            search, so near duplicate pages are dropped, keeping the copy with the
+            best search position.
+        budget_results (int): The number of top results the chain token budget is
+            split across (see `token_budget.position_shares`).
 
     Returns:
         list: A list of dictionaries containing scraped data.
@@ -21,98 +56,594 @@ def parallel_scrape_caller(search_results, query, num_result):
 
     scraped_data = []
     max_workers = num_result
-    timeout = 60
+    timeout = (deadline or NO_DEADLINE).timeout(config.SCRAPE_TIMEOUT)
+    shares = token_budget.position_shares(
+        config.CHAIN_RESULTS_TOKEN_BUDGET, len(search_results), budget_results
+    )
 
-    with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as scraper:
-        task_to_result = {
-            scraper.submit(web_scraping_handle, result, query): result
-            for result in search_results
+    # Not used as a context manager, which would wait for the timed out tasks
+    scraper = concurrent.futures.ThreadPoolExecutor(max_workers=max_workers)
+    try:
+        task_to_position = {
+            scraper.submit(
+                web_scraping_handle,
+                result,
+                query,
+                share,
+                deadline,
+                deduplicator,
+                position,
+            ): position
+            for position, (result, share) in enumerate(zip(search_results, shares))
         }
 
-        # Wait for all tasks to complete or timeout
-        done, not_done = concurrent.futures.wait(
-            task_to_result.keys(),
-            timeout=timeout,
-            return_when=concurrent.futures.ALL_COMPLETED,
-        )
+        if config.SCRAPE_QUORUM:
+            done, not_done = wait_for_quorum(list(task_to_position), timeout)
+        else:
+            # Wait for all tasks to complete or timeout
+            done, not_done = concurrent.futures.wait(
+                task_to_position.keys(),
+                timeout=timeout,
+                return_when=concurrent.futures.ALL_COMPLETED,
+            )
 
         for task in done:
+            position = task_to_position[task]
             try:
                 scraped_item = task.result()
                 if scraped_item:
-                    scraped_data.append(scraped_item)
+                    scraped_data.append((position, scraped_item))
             except Exception as e:
                 constants.LOGGER.error(
-                    f"Error scraping {task_to_result[task]['link']}: {str(e)}",
+                    f"Error scraping {search_results[position]['link']}: {str(e)}",
                     exc_info=True,
                 )
 
-        # Cancel tasks that exceeded the timeout
         for task in not_done:
-            task.cancel()
             constants.LOGGER.warning(
-                f"Scraping task for {task_to_result[task]['link']} timed out."
+                f"Scraping task for {search_results[task_to_position[task]]['link']} "
+                f"timed out."
+            )
+    finally:
+        # Queued tasks are cancelled, running ones are not waited for
+        scraper.shutdown(wait=False, cancel_futures=True)
+
+    return order_by_search_position(
+        drop_displaced_duplicates(scraped_data, deduplicator), search_results
+    )
+
+
+async def async_parallel_scrape_caller(
+    search_results,
+    query,
+    num_result,
+    client,
+    deadline=None,
+    deduplicator=None,
+    budget_results=None,
+):
+    """
+    Perform web scraping concurrently on the event loop for the given search query's results.
+
+    Args:
+        search_results (list): The search results to scrape.
+        query (str): The search query.
+        num_result (int): The number of search results requested.
+        client (httpx.AsyncClient): The shared HTTP client.
+        deadline (Deadline): The report deadline, which bounds the scraping timeout.
+        deduplicator (ContentDeduplicator): Tracks the content scraped for the
+            search, so near duplicate pages are dropped, keeping the copy with the
+            best search position.
+        budget_results (int): The number of top results the chain token budget is
+            split across (see `token_budget.position_shares`).
+
+    Returns:
+        list: A list of dictionaries containing scraped data.
+    """
+
+    scraped_data = []
+    timeout = (deadline or NO_DEADLINE).timeout(config.SCRAPE_TIMEOUT)
+    shares = token_budget.position_shares(
+        config.CHAIN_RESULTS_TOKEN_BUDGET, len(search_results), budget_results
+    )
+
+    tasks = {
+        asyncio.create_task(
+            async_web_scraping_handle(
+                result, query, client, share, deadline, deduplicator, position
+            )
+        ): position
+        for position, (result, share) in enumerate(zip(search_results, shares))
+    }
+    if not tasks:
+        return scraped_data
+
+    if config.SCRAPE_QUORUM:
+        done, not_done = await async_wait_for_quorum(list(tasks), timeout)
+    else:
+        # Wait for all tasks to complete or timeout
+        done, not_done = await asyncio.wait(tasks.keys(), timeout=timeout)
+
+    for task in done:
+        position = tasks[task]
+        try:
+            scraped_item = task.result()
+            if scraped_item:
+                scraped_data.append((position, scraped_item))
+        except Exception as e:
+            constants.LOGGER.error(
+                f"Error scraping {search_results[position]['link']}: {str(e)}",
+                exc_info=True,
             )
 
-    return scraped_data
+    # Cancel tasks that exceeded the timeout
+    for task in not_done:
+        task.cancel()
+        constants.LOGGER.warning(
+            f"Scraping task for {search_results[tasks[task]]['link']} timed out."
+        )
+
+    return order_by_search_position(
+        drop_displaced_duplicates(scraped_data, deduplicator), search_results
+    )
 
 
-def web_scraping_handle(result, query):
+def content_tokens(task):
+    """Count the content tokens of a finished scraping task, 0 when it failed."""
+    if task.exception() is not None:
+        return 0
+    scraped_item = task.result()
+    return token_budget.count_tokens(scraped_item["content"]) if scraped_item else 0
+
+
+def quorum_reached(tasks, done):
+    """
+    Check whether the finished scraping tasks are enough to run the chain: the
+    tasks of the top SCRAPE_QUORUM_RESULTS search results are done, or the
+    scraped content has SCRAPE_QUORUM_TOKENS tokens.
+
+    Args:
+        tasks (list): The scraping tasks, in search position order.
+        done (set): The finished tasks.
     """
-    Scrape content and summarize large content
+    if all(task in done for task in tasks[: config.SCRAPE_QUORUM_RESULTS]):
+        return True
+    return sum(content_tokens(task) for task in done) >= config.SCRAPE_QUORUM_TOKENS
+
+
+def wait_for_quorum(tasks, timeout):
+    """
+    Wait until the scraping tasks reach the quorum, or SCRAPE_QUORUM_TIMEOUT passed
+    and at least one task is done, or the timeout passed.
+
+    Args:
+        tasks (list): The scraping futures, in search position order.
+        timeout (float): The hard timeout in seconds, None to wait for the quorum.
+
+    Returns:
+        tuple: The done and not done futures.
+    """
+    hard_deadline = Deadline(timeout)
+    soft_deadline = hard_deadline.limit(config.SCRAPE_QUORUM_TIMEOUT)
+    done, pending = set(), set(tasks)
+
+    while pending and not quorum_reached(tasks, done):
+        # Without any result, keep waiting past the soft deadline
+        deadline = soft_deadline if done else hard_deadline
+        if deadline.expired():
+            break
+        newly_done, pending = concurrent.futures.wait(
+            pending,
+            timeout=deadline.timeout(),
+            return_when=concurrent.futures.FIRST_COMPLETED,
+        )
+        done |= newly_done
+
+    return done, pending
+
+
+async def async_wait_for_quorum(tasks, timeout):
+    """
+    Wait until the scraping tasks reach the quorum on the event loop, like
+    `wait_for_quorum`.
+    """
+    hard_deadline = Deadline(timeout)
+    soft_deadline = hard_deadline.limit(config.SCRAPE_QUORUM_TIMEOUT)
+    done, pending = set(), set(tasks)
+
+    while pending and not quorum_reached(tasks, done):
+        # Without any result, keep waiting past the soft deadline
+        deadline = soft_deadline if done else hard_deadline
+        if deadline.expired():
+            break
+        newly_done, pending = await asyncio.wait(
+            pending,
+            timeout=deadline.timeout(),
+            return_when=asyncio.FIRST_COMPLETED,
+        )
+        done |= newly_done
+
+    return done, pending
+
+
+def drop_displaced_duplicates(scraped_data, deduplicator):
+    """
+    Drop the scraped pages that a better ranked near duplicate, scraped later,
+    replaced (see `ContentDeduplicator.is_duplicate`).
+
+    Args:
+        scraped_data (list): Tuples of the search position and the scraped item.
+        deduplicator (ContentDeduplicator): The deduplicator of the search.
+
+    Returns:
+        list: The scraped items that are kept.
+    """
+    dropped = deduplicator.dropped_positions if deduplicator else set()
+    return [item for position, item in scraped_data if position not in dropped]
+
+
+def order_by_search_position(scraped_data, search_results):
+    """
+    Order scraped items the same way as the search results they were scraped from.
+    """
+    positions = {}
+    for position, result in enumerate(search_results):
+        positions.setdefault(result.get("link"), position)
+
+    return sorted(
+        scraped_data, key=lambda item: positions.get(item.get("link"), len(positions))
+    )
+
+
+def web_scraping_handle(
+    result, query, max_tokens=None, deadline=None, deduplicator=None, position=None
+):
+    """
+    Scrape content and summarize content that overflows its token share
+
+    Args:
+        result (dict): The search result to scrape.
+        query (str): The search query.
+        max_tokens (int): The tokens the content may use in the chain prompt.
+            Defaults to the whole CHAIN_RESULTS_TOKEN_BUDGET.
+        deadline (Deadline): The report deadline. Fetching and summarizing stop at
+            the deadline and the content is truncated to its share instead.
+        deduplicator (ContentDeduplicator): Drops the page, before it is
+            summarized, when it is a near duplicate of a better ranked page
+            already scraped.
+        position (int): The search position of the result.
+
+    Content that overflows its share is cut down to the passages that best match
+    the query (see `passage_ranker.select_passages`), and only summarized when
+    no passage matches (see `summarize_content`).
     """
     url = result.get("link")
     if not url:
         return None
 
-    raw_content = fetch_with_requests(url)
+    max_tokens = max_tokens or config.CHAIN_RESULTS_TOKEN_BUDGET
+    raw_content = fetch_with_requests(url, deadline)
 
     # Handle large Content
-    if len(raw_content) > 500000:
+    content_tokens = token_budget.count_tokens(raw_content)
+    if content_tokens > config.SCRAPE_MAX_TOKENS:
         content = ""
-    elif len(raw_content) > 4000:
-        content = llm_caller.summarize_large_content(raw_content, query, url)
+    elif deduplicator and deduplicator.is_duplicate(
+        raw_content, min(content_tokens, max_tokens), position
+    ):
+        constants.LOGGER.info(f"Skipping {url}, a near duplicate of a scraped page")
+        return None
+    elif content_tokens > max_tokens:
+        content = passage_ranker.select_passages(raw_content, query, max_tokens)
+        if content is None:
+            content = summarize_content(
+                raw_content, query, url, content_tokens, max_tokens, deadline
+            )
     else:
         content = raw_content
 
+    return build_scraped_item(result, content)
+
+
+async def async_web_scraping_handle(
+    result,
+    query,
+    client,
+    max_tokens=None,
+    deadline=None,
+    deduplicator=None,
+    position=None,
+):
+    """
+    Scrape content and summarize content that overflows its token share without
+    blocking the event loop
+    """
+    url = result.get("link")
+    if not url:
+        return None
+
+    max_tokens = max_tokens or config.CHAIN_RESULTS_TOKEN_BUDGET
+    raw_content = await async_fetch(url, client, deadline)
+
+    # Handle large Content
+    content_tokens = token_budget.count_tokens(raw_content)
+    if content_tokens > config.SCRAPE_MAX_TOKENS:
+        content = ""
+    elif deduplicator and deduplicator.is_duplicate(
+        raw_content, min(content_tokens, max_tokens), position
+    ):
+        constants.LOGGER.info(f"Skipping {url}, a near duplicate of a scraped page")
+        return None
+    elif content_tokens > max_tokens:
+        content = passage_ranker.select_passages(raw_content, query, max_tokens)
+        if content is None:
+            content = await async_summarize_content(
+                raw_content, query, url, content_tokens, max_tokens, deadline
+            )
+    else:
+        content = raw_content
+
+    return build_scraped_item(result, content)
+
+
+def summarize_content(
+    raw_content, query, url, content_tokens, max_tokens, deadline=None
+):
+    """
+    Summarize a page that overflows its token share with the strategy picked for
+    its size (see `extractive_summary.summary_strategy`).
+
+    Extractive summaries are computed locally in the process pool (see
+    `parse_pool.summarize_text`), and the content is truncated to its share when
+    they are not ready by the deadline. LLM and hybrid summaries are cached by
+    page text, query and share, so a page that did not change is not summarized
+    again.
+    """
+    strategy = extractive_summary.summary_strategy(content_tokens)
+    if strategy == extractive_summary.EXTRACTIVE:
+        return summarize_locally(raw_content, max_tokens, deadline)
+
+    content = scrape_cache.get_cached_content(raw_content, query, max_tokens)
+    if content is None:
+        text = raw_content
+        if strategy == extractive_summary.HYBRID:
+            text = summarize_locally(
+                raw_content, config.SUMMARY_CHUNK_TOKENS, deadline
+            )
+        content = llm_caller.summarize_large_content(
+            text, query, url, max_tokens=max_tokens, deadline=deadline
+        )
+        store_summary(raw_content, query, max_tokens, content, deadline)
+    return content
+
+
+async def async_summarize_content(
+    raw_content, query, url, content_tokens, max_tokens, deadline=None
+):
+    """
+    Summarize a page that overflows its token share without blocking the event
+    loop. Local summaries run in the process pool.
+    """
+    strategy = extractive_summary.summary_strategy(content_tokens)
+    if strategy == extractive_summary.EXTRACTIVE:
+        return await parse_pool.async_summarize_text(raw_content, max_tokens)
+
+    content = scrape_cache.get_cached_content(raw_content, query, max_tokens)
+    if content is None:
+        text = raw_content
+        if strategy == extractive_summary.HYBRID:
+            text = await parse_pool.async_summarize_text(
+                raw_content, config.SUMMARY_CHUNK_TOKENS
+            )
+        content = await llm_caller.async_summarize_large_content(
+            text, query, url, max_tokens=max_tokens, deadline=deadline
+        )
+        store_summary(raw_content, query, max_tokens, content, deadline)
+    return content
+
+
+def summarize_locally(raw_content, max_tokens, deadline=None):
+    """
+    Summarize a page in the process pool, or truncate it to max_tokens when the
+    summary is not ready by the deadline.
+    """
+    try:
+        return parse_pool.summarize_text(
+            raw_content, max_tokens, (deadline or NO_DEADLINE).timeout()
+        )
+    except TimeoutError:
+        constants.LOGGER.warning("Deadline reached while summarizing, truncating")
+        return token_budget.truncate_to_tokens(raw_content, max_tokens)
+
+
+def store_summary(raw_content, query, max_tokens, summary, deadline):
+    """
+    Cache the summary of a page, unless the deadline cut the summarization short
+    and the summary is only truncated content.
+    """
+    if deadline is None or not deadline.expired():
+        scrape_cache.store_content(raw_content, query, max_tokens, summary)
+
+
+def build_scraped_item(result, content):
+    """
+    Build the scraped item passed to the chain from a search result and its content.
+    """
     return {
         "title": result.get("title"),
-        "link": url,
+        "link": result.get("link"),
         "snippet": result.get("snippet"),
         "content": content,
     }
 
 
-def fetch_with_requests(url):
+def is_valid_content_type(headers):
+    """
+    Check whether the response Content-Type is a web page that can be scraped.
+    """
+    return (
+        headers.get("Content-Type", "").split(";")[0] in constants.VALID_CONTENT_TYPES
+    )
+
+
+def exceeds_byte_budget(headers):
+    """
+    Check whether the declared Content-Length is over the scrape byte budget.
+    """
+    try:
+        return int(headers.get("Content-Length", 0)) > config.SCRAPE_MAX_BYTES
+    except (TypeError, ValueError):
+        return False
+
+
+def record_stage_times(url, fetch_started, parse_started):
+    """Record the fetch and parse times of a page, from their start times."""
+    parse_ended = time.perf_counter()
+    STAGE_TIMER.record("fetch", parse_started - fetch_started)
+    STAGE_TIMER.record("parse", parse_ended - parse_started)
+    constants.LOGGER.debug(
+        f"Fetched {url} in {parse_started - fetch_started:.3f}s, "
+        f"parsed in {parse_ended - parse_started:.3f}s"
+    )
+
+
+def fetch_with_requests(url, deadline=None):
     """
-    Fetch content using requests and BeautifulSoup.
+    Fetch content using requests and extract its text in the parsing process pool
+    (see `parse_pool.extract_page_text`).
+
+    The body is streamed after the headers are checked and the download stops as
+    soon as it goes over SCRAPE_MAX_BYTES, in which case the page is skipped.
+
+    The whole fetch must finish within SCRAPE_PAGE_TIMEOUT and before the report
+    deadline. Socket timeouts only bound each connect and read, so the time left
+    is also checked between body chunks and a slow page is dropped.
+
+    Extracted text is cached by URL with the ETag and Last-Modified validators of
+    the page. Fresh entries are used without a request, older ones are
+    revalidated with a conditional GET.
+
+    The fetch and parse times of every page are recorded in STAGE_TIMER.
     """
 
+    cached_page = scrape_cache.get_cached_page(url)
+    if cached_page and cached_page["fresh"]:
+        return cached_page["content"]
+
+    page_deadline = (deadline or NO_DEADLINE).limit(config.SCRAPE_PAGE_TIMEOUT)
+    if page_deadline.expired():
+        return " "
+
     try:
-        # Set up a session with retries
-        session = requests.Session()
-        retries = Retry(
-            total=3, backoff_factor=0.5, status_forcelist=[500, 502, 503, 504]
+        fetch_started = time.perf_counter()
+        # Pooled session with keep-alive and retries
+        session = http_client.get_session()
+
+        response = session.get(
+            url,
+            headers={
+                **constants.HEADERS,
+                **scrape_cache.revalidation_headers(cached_page),
+            },
+            timeout=(
+                page_deadline.timeout(config.SCRAPE_CONNECT_TIMEOUT),
+                page_deadline.timeout(),
+            ),
+            stream=True,
         )
-        session.mount("http://", HTTPAdapter(max_retries=retries))
-        session.mount("https://", HTTPAdapter(max_retries=retries))
-
-        response = requests.get(url, headers=constants.HEADERS, timeout=10)
-        if (
-            response.headers.get("Content-Type", "").split(";")[0]
-            not in constants.VALID_CONTENT_TYPES
-        ):
-            return ""
-
-        response.raise_for_status()
-        response.encoding = response.apparent_encoding
-        soup = BeautifulSoup(response.text, "html.parser")
-
-        elements = soup.find_all(constants.TAGS)
-        content = "\n".join(
-            [tag.get_text(strip=True) for tag in elements if tag.get_text(strip=True)]
+        try:
+            if cached_page and response.status_code == 304:
+                scrape_cache.refresh_page(url)
+                return cached_page["content"]
+
+            if not is_valid_content_type(response.headers):
+                return ""
+
+            response.raise_for_status()
+            if exceeds_byte_budget(response.headers):
+                return ""
+
+            body = bytearray()
+            for chunk in response.iter_content(chunk_size=config.SCRAPE_CHUNK_SIZE):
+                body.extend(chunk)
+                if len(body) > config.SCRAPE_MAX_BYTES:
+                    return ""
+                if page_deadline.expired():
+                    raise TimeoutError(f"Fetching {url} timed out")
+        finally:
+            response.close()
+
+        parse_started = time.perf_counter()
+        content = parse_pool.extract_page_text(
+            bytes(body),
+            response.headers.get("Content-Type", ""),
+            page_deadline.timeout(),
         )
+        record_stage_times(url, fetch_started, parse_started)
+        scrape_cache.store_page(url, content, response.headers)
+        return content
+    except Exception as e:
+        return " "
+
+
+async def async_fetch(url, client, deadline=None):
+    """
+    Fetch content using the shared async HTTP client and extract its text in the
+    parsing process pool.
 
-        return content if content else "none"
+    Streams the body with the same header checks, byte budget, page timeout and
+    page cache as `fetch_with_requests`. A fetch still running at its page
+    deadline is cancelled.
+    """
+
+    cached_page = scrape_cache.get_cached_page(url)
+    if cached_page and cached_page["fresh"]:
+        return cached_page["content"]
+
+    try:
+        async with SCRAPE_SEMAPHORE:
+            page_deadline = (deadline or NO_DEADLINE).limit(config.SCRAPE_PAGE_TIMEOUT)
+            if page_deadline.expired():
+                return " "
+            fetch_started = time.perf_counter()
+            async with asyncio.timeout(page_deadline.timeout()):
+                async with client.stream(
+                    "GET",
+                    url,
+                    headers={
+                        **constants.HEADERS,
+                        **scrape_cache.revalidation_headers(cached_page),
+                    },
+                    timeout=httpx.Timeout(
+                        page_deadline.timeout(),
+                        connect=page_deadline.timeout(config.SCRAPE_CONNECT_TIMEOUT),
+                    ),
+                    follow_redirects=True,
+                ) as response:
+                    if cached_page and response.status_code == 304:
+                        scrape_cache.refresh_page(url)
+                        return cached_page["content"]
+
+                    if not is_valid_content_type(response.headers):
+                        return ""
+
+                    response.raise_for_status()
+                    if exceeds_byte_budget(response.headers):
+                        return ""
+
+                    body = bytearray()
+                    async for chunk in response.aiter_bytes(config.SCRAPE_CHUNK_SIZE):
+                        body.extend(chunk)
+                        if len(body) > config.SCRAPE_MAX_BYTES:
+                            return ""
+
+        # Parsing is CPU bound, keep it off the event loop
+        parse_started = time.perf_counter()
+        content = await parse_pool.async_extract_page_text(
+            bytes(body), response.headers.get("Content-Type", "")
+        )
+        record_stage_times(url, fetch_started, parse_started)
+        scrape_cache.store_page(url, content, response.headers)
+        return content
     except Exception as e:
         return " "
@@ -1,5 +1,77 @@
+import asyncio
+import queue
+import threading
+from contextlib import contextmanager
 from utils.web_scrape import web_scraping_handle
 from langchain_google_community import GoogleSearchAPIWrapper
+from utils.deadline import NO_DEADLINE
+from utils.sqlite_cache import SQLiteCache
+from utils.task_planner import normalize_text
+import utils.config as config
+import utils.constants as constants
+
+# Bound the number of searches running at once in the async pipeline
+SEARCH_SEMAPHORE = asyncio.Semaphore(config.ASYNC_SEARCH_CONCURRENCY)
+
+# Idle Google Search API clients. The underlying HTTP client is not thread safe,
+# so each client is used by one thread at a time and returned for reuse.
+_search_clients = queue.SimpleQueue()
+_search_cache = None
+_lock = threading.Lock()
+
+
+@contextmanager
+def search_client():
+    """Borrow a Google Search API client from the shared pool."""
+    try:
+        client = _search_clients.get_nowait()
+    except queue.Empty:
+        client = GoogleSearchAPIWrapper()
+    try:
+        yield client
+    finally:
+        _search_clients.put(client)
+
+
+def get_search_cache():
+    """Get the shared search result cache, creating it on first use."""
+    global _search_cache
+    with _lock:
+        if _search_cache is None:
+            _search_cache = SQLiteCache(
+                config.CACHE_PATH,
+                namespace="search",
+                max_entries=config.SEARCH_CACHE_MAX_ENTRIES,
+            )
+        return _search_cache
+
+
+def search_cache_key(query, num_results):
+    """Build the cache key of a search from the normalized query and result count."""
+    return f"{num_results}|{normalize_text(query)}"
+
+
+def get_cached_search(query, num_results):
+    """
+    Get cached search results.
+
+    Returns:
+        list: The cached search results, or None on a miss or when caching is off.
+    """
+    if not config.CACHE_ENABLED:
+        return None
+    return get_search_cache().get(
+        search_cache_key(query, num_results), ttl=config.SEARCH_CACHE_TTL
+    )
+
+
+def store_search(query, num_results, search_results):
+    """Cache search results. Results without links (no results found) are not cached."""
+    if not config.CACHE_ENABLED:
+        return
+    if not search_results or not all(result.get("link") for result in search_results):
+        return
+    get_search_cache().set(search_cache_key(query, num_results), search_results)
 
 
 def google_search(query, num_results=5):
@@ -13,12 +85,63 @@ def google_search(query, num_results=5):
     Returns:
         dict: A dictionary containing search results.
     """
-    google_search_wrapper = GoogleSearchAPIWrapper()
+    cached_results = get_cached_search(query, num_results)
+    if cached_results is not None:
+        return cached_results
 
     try:
-        search_results = google_search_wrapper.results(query, num_results=num_results)
+        with search_client() as google_search_wrapper:
+            search_results = google_search_wrapper.results(
+                query, num_results=num_results
+            )
         if not search_results:
             raise Exception(f"No search results found")
+        store_search(query, num_results, search_results)
         return search_results
     except Exception as e:
         raise
+
+
+async def async_google_search(query, num_results, client, deadline=None):
+    """
+    Perform a Google search with the Custom Search JSON API without blocking the event loop.
+
+    Args:
+        query (str): The search query.
+        num_results (int): Number of results to retrieve.
+        client (httpx.AsyncClient): The shared HTTP client.
+        deadline (Deadline): The report deadline, which bounds the request timeout.
+
+    Returns:
+        list: Search results with the same keys as `google_search`.
+    """
+    cached_results = get_cached_search(query, num_results)
+    if cached_results is not None:
+        return cached_results
+
+    async with SEARCH_SEMAPHORE:
+        response = await client.get(
+            constants.GOOGLE_SEARCH_URL,
+            params={
+                "key": config.GOOGLE_API_KEY,
+                "cx": config.GOOGLE_CSE_ID,
+                "q": query,
+                "num": num_results,
+            },
+            timeout=(deadline or NO_DEADLINE).timeout(10),
+        )
+    response.raise_for_status()
+
+    items = response.json().get("items", [])
+    if not items:
+        raise Exception(f"No search results found")
+
+    search_results = []
+    for item in items:
+        search_result = {"title": item["title"], "link": item["link"]}
+        if "snippet" in item:
+            search_result["snippet"] = item["snippet"]
+        search_results.append(search_result)
+
+    store_search(query, num_results, search_results)
+    return search_results